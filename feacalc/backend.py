@@ -0,0 +1,179 @@
+"""
+backend.py
+
+Optional JIT-compiled loops for the element operations that NumPy can only
+express with large temporaries: fused gather / internal force / scatter-add
+of bar elements, scatter-add of element matrices into a fixed CSR pattern,
+and per-element stable time steps.
+
+The NumPy code in elements and core stays the reference implementation and
+the fallback. Callers ask jit(name) for a compiled loop and use their NumPy
+path when it returns None. The backend is chosen at runtime with
+set_backend() or the MINIFEA_BACKEND environment variable:
+
+    'numpy'  always the NumPy path
+    'numba'  compiled loops (falls back to NumPy, with a warning, if Numba
+             is not installed)
+    'auto'   Numba if it is installed, NumPy otherwise (the default)
+
+Any other value is rejected with a ValueError, from the environment on
+import as from set_backend().
+
+Numba is imported, and each loop compiled, on first use only.
+"""
+import math
+import os
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+BACKENDS = ('numpy', 'numba', 'auto')
+
+_requested = os.environ.get('MINIFEA_BACKEND', 'auto')
+if _requested not in BACKENDS:
+    raise ValueError(f"Unknown backend '{_requested}' in MINIFEA_BACKEND; "
+                     f"use one of {BACKENDS}")
+_active = None        # resolved backend name, decided on first use
+_compiled = {}
+
+
+def _bar_internal_forces(x, conn, L0, EA_L0, out):
+    """out = f_int(x) of bar elements, one pass, no temporaries."""
+    dim = x.shape[1]
+    out[:] = 0.0
+    for e in range(conn.shape[0]):
+        i, j = conn[e, 0], conn[e, 1]
+        sq = 0.0
+        for c in range(dim):
+            d = x[j, c] - x[i, c]
+            sq += d * d
+        length = math.sqrt(sq)
+        scale = EA_L0[e] * (length - L0[e]) / length
+        for c in range(dim):
+            f = scale * (x[j, c] - x[i, c])
+            out[j * dim + c] += f
+            out[i * dim + c] -= f
+    return out
+
+
+def _scatter_add(data, slots, values):
+    """data[slots[k]] += values[k], accumulating repeated slots."""
+    for k in range(slots.shape[0]):
+        data[slots[k]] += values[k]
+    return data
+
+
+def _wave_dt(L, rho, E, out):
+    """out[e] = L[e] * sqrt(rho[e] / E[e]), with NumPy's result for E == 0."""
+    for e in range(L.shape[0]):
+        if E[e] == 0.0:
+            out[e] = math.inf if rho[e] > 0.0 else math.nan
+        else:
+            out[e] = L[e] * math.sqrt(rho[e] / E[e])
+    return out
+
+
+# Loop sources, kept as plain Python so they can also be checked uncompiled
+LOOPS = {
+    'bar_internal_forces': _bar_internal_forces,
+    'scatter_add':         _scatter_add,
+    'wave_dt':             _wave_dt,
+}
+
+
+def _numba():
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba
+
+
+def set_backend(name):
+    """
+    Select the kernel backend ('numpy', 'numba' or 'auto').
+
+    Returns:
+        str: the backend now in effect ('numpy' or 'numba').
+    """
+    global _requested, _active
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'; use one of {BACKENDS}")
+    _requested, _active = name, None
+    return active()
+
+
+def active():
+    """Backend in effect, resolving 'auto' (and a missing Numba) on first call."""
+    global _active
+    if _active is None:
+        if _requested == 'numpy':
+            _active = 'numpy'
+        elif _numba() is not None:
+            _active = 'numba'
+        else:
+            if _requested == 'numba':
+                warnings.warn("Numba is not installed; using the NumPy kernels",
+                              RuntimeWarning, stacklevel=2)
+            _active = 'numpy'
+    return _active
+
+
+@contextmanager
+def use(name):
+    """Temporarily select a backend (e.g. for parity tests)."""
+    previous = _requested
+    set_backend(name)
+    try:
+        yield active()
+    finally:
+        set_backend(previous)
+
+
+def jit(name):
+    """
+    Compiled loop `name` (see LOOPS) for the active backend, or None when
+    the NumPy path should be used.
+    """
+    if active() != 'numba':
+        return None
+    fn = _compiled.get(name)
+    if fn is None:
+        njit = _numba().njit(cache=True, nogil=True, error_model='numpy')
+        fn = _compiled[name] = njit(LOOPS[name])
+    return fn
+
+
+def scatter_add(data, slots, values):
+    """
+    Accumulate values into data at slots (repeated slots add up), in place.
+
+    Args:
+        data (np.ndarray): 1D target, e.g. CSR data of a fixed pattern.
+        slots (np.ndarray): int64 positions, same length as values.
+        values (np.ndarray): 1D contributions.
+
+    Returns:
+        data
+    """
+    fn = jit('scatter_add')
+    if fn is not None:
+        return fn(data, slots, values.astype(data.dtype, copy=False))
+    data += np.bincount(slots, weights=values, minlength=data.size).astype(data.dtype,
+                                                                          copy=False)
+    return data
+
+
+def wave_dt(L, rho, E):
+    """
+    Per-element critical step L * sqrt(rho / E) of a 1D wave.
+
+    Returns:
+        (n_elems,) array.
+    """
+    fn = jit('wave_dt')
+    if fn is not None:
+        return fn(L, rho, E, np.empty_like(L))
+    with np.errstate(divide='ignore'):
+        return L * np.sqrt(rho / E)
@@ -0,0 +1,266 @@
+"""
+core.py
+
+Global assembly for feacalc. A mesh is processed block by block: each
+homogeneous element block gets one batched kernel from the element registry,
+and global operators are scattered from the kernels' stacked element arrays.
+Repeated assembly of one mesh can reuse a StiffnessPattern.
+Also hosts the adaptive solve loop, which updates the assembled stiffness
+incrementally as the mesh is refined.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from .backend import scatter_add
+from .elements import kernel_for
+from .mesh import hanging_constraints, refine_quads
+from .postprocessing import mark_elements, zz_error
+from .solver import cg_solve
+from .utils import free_dofs
+
+
+def build_kernels(mesh, props):
+    """
+    Instantiate one registered kernel per element block.
+
+    Args:
+        mesh: Mesh or MixedMesh (anything with nodes and a blocks mapping).
+        props: dict elem_type -> dict of keyword arguments for that kernel
+               (e.g. {'bar': {'E': 210e9, 'A': 1e-4}}).
+
+    Returns:
+        dict elem_type -> kernel, in block order.
+    """
+    kernels = {}
+    for elem_type, elems in mesh.blocks.items():
+        if elem_type not in props:
+            raise ValueError(f"No properties given for element type '{elem_type}'")
+        kernels[elem_type] = kernel_for(elem_type)(mesh.nodes, elems, **props[elem_type])
+    return kernels
+
+
+def dofs_per_node(kernels):
+    """Global DOFs per node: the most any block uses."""
+    return max(k.node_dofs for k in kernels.values())
+
+
+def assemble_stiffness(kernels, n_nodes, stride=None, dtype=np.float64):
+    """
+    Assemble the global stiffness matrix from all blocks.
+
+    Element matrices are computed in float64 and rounded to dtype block by
+    block, before the global sum (see solver.PrecisionPolicy.storage).
+
+    Args:
+        kernels: dict elem_type -> kernel (see build_kernels).
+        n_nodes (int): number of mesh nodes.
+        stride (int): DOFs per node (default dofs_per_node(kernels)).
+        dtype: storage type of the assembled matrix (float64 or float32).
+
+    Returns:
+        scipy.sparse.csr_matrix of shape (n_nodes * stride, n_nodes * stride).
+    """
+    stride = stride or dofs_per_node(kernels)
+    rows, cols, vals = [], [], []
+    for kernel in kernels.values():
+        ke = kernel.stiffness()
+        dm = kernel.dof_map(stride)
+        rows.append(np.broadcast_to(dm[:, :, None], ke.shape).ravel().astype(np.int32))
+        cols.append(np.broadcast_to(dm[:, None, :], ke.shape).ravel().astype(np.int32))
+        vals.append(ke.astype(dtype, copy=False).ravel())
+    n = n_nodes * stride
+    K = sp.coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(n, n), dtype=dtype)
+    return K.tocsr()
+
+
+class StiffnessPattern:
+    """
+    CSR structure of the global stiffness of fixed element blocks, computed
+    once. assemble() then only scatters element matrices into the data
+    array (see backend.scatter_add), for loops that reassemble the same
+    mesh with new properties.
+
+    Attributes:
+        indptr, indices (np.ndarray): int32 CSR structure.
+        slots (list): per block, the data position of every element matrix
+            entry, in stiffness() order.
+        shape (tuple): matrix shape.
+    """
+    def __init__(self, kernels, n_nodes, stride=None):
+        """
+        Args:
+            kernels: dict elem_type -> kernel (see build_kernels); only the
+                     connectivity is used.
+            n_nodes (int): number of mesh nodes.
+            stride (int): DOFs per node (default dofs_per_node(kernels)).
+        """
+        self.stride = stride or dofs_per_node(kernels)
+        n = n_nodes * self.stride
+        keys, sizes = [], []
+        for kernel in kernels.values():
+            dm = kernel.dof_map(self.stride).astype(np.int64)
+            keys.append((dm[:, :, None] * n + dm[:, None, :]).ravel())
+            sizes.append(keys[-1].size)
+        unique, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        self.indices = (unique % n).astype(np.int32)
+        self.indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(unique // n, minlength=n), out=self.indptr[1:])
+        self.slots = np.split(inverse.ravel(), np.cumsum(sizes)[:-1])
+        self.shape = (n, n)
+
+    def assemble(self, kernels, dtype=np.float64):
+        """
+        Global stiffness of kernels, which must match the blocks (types and
+        connectivity) the pattern was built from.
+
+        Returns:
+            scipy.sparse.csr_matrix sharing this pattern's index arrays.
+        """
+        data = np.zeros(self.indices.size, dtype=dtype)
+        for kernel, slots in zip(kernels.values(), self.slots):
+            scatter_add(data, slots, kernel.stiffness().astype(dtype, copy=False).ravel())
+        return sp.csr_matrix((data, self.indices, self.indptr), shape=self.shape)
+
+
+def assemble_lumped_mass(kernels, n_nodes, stride=None):
+    """
+    Sum the blocks' lumped mass vectors.
+
+    Returns:
+        (n_nodes * stride,) mass vector.
+    """
+    stride = stride or dofs_per_node(kernels)
+    mass = np.zeros(n_nodes * stride)
+    for kernel in kernels.values():
+        mass += kernel.lumped_mass(stride)
+    return mass
+
+
+def recover(kernels, u, stride=None):
+    """
+    Element results of every block for a global displacement vector.
+
+    Returns:
+        dict elem_type -> dict of result arrays (see each kernel's recover()).
+    """
+    stride = stride or dofs_per_node(kernels)
+    return {t: k.recover(u, stride) for t, k in kernels.items()}
+
+
+def _scatter(ke, dofs, n):
+    """Sum stacked element matrices into an (n, n) CSR matrix, plus a
+    same-pattern matrix counting the contributions to each entry."""
+    rows = np.broadcast_to(dofs[:, :, None], ke.shape).ravel()
+    cols = np.broadcast_to(dofs[:, None, :], ke.shape).ravel()
+    K = sp.coo_matrix((ke.ravel(), (rows, cols)), shape=(n, n)).tocsr()
+    C = sp.coo_matrix((np.ones(rows.size), (rows, cols)), shape=(n, n)).tocsr()
+    return K, C
+
+
+class IncrementalAssembler:
+    """
+    Global stiffness of a single-block mesh that is updated rather than
+    rebuilt after refinement. Element matrices are kept per element; a
+    refinement subtracts the split elements, adds their children and leaves
+    every other element alone. A matrix counting the contributions per entry
+    lets the sparsity pattern shrink as well as grow.
+
+    Attributes:
+        K (scipy.sparse.csr_matrix): current global stiffness.
+        stride (int): DOFs per node.
+    """
+    def __init__(self, mesh, props, stride=None):
+        """
+        Args:
+            mesh: homogeneous Mesh (elem_type registered in elements).
+            props (dict): keyword arguments of the element kernel.
+            stride (int): DOFs per node (default the kernel's).
+        """
+        self.kernel_cls = kernel_for(mesh.elem_type)
+        self.props = props
+        kernel = self.kernel_cls(mesh.nodes, mesh.elems, **props)
+        self.stride = stride or kernel.node_dofs
+        self.ke = kernel.stiffness()
+        self.dofs = kernel.dof_map(self.stride)
+        self.K, self._count = _scatter(self.ke, self.dofs, mesh.n_nodes * self.stride)
+
+    def update(self, mesh, removed, n_added):
+        """
+        Bring K up to date with a refined mesh.
+
+        Args:
+            mesh: the refined Mesh; its elements must be the surviving old
+                  elements in order followed by n_added new ones (the layout
+                  refine_quads produces). New nodes are appended.
+            removed: indices (into the previous elements) that were replaced.
+            n_added (int): number of new elements at the end of mesh.elems.
+        """
+        n = mesh.n_nodes * self.stride
+        for M in (self.K, self._count):
+            M.resize((n, n))
+
+        # Take out the replaced elements, put in the new ones
+        dK, dC = _scatter(self.ke[removed], self.dofs[removed], n)
+        new = self.kernel_cls(mesh.nodes, mesh.elems[mesh.n_elems - n_added:], **self.props)
+        ke_new, dofs_new = new.stiffness(), new.dof_map(self.stride)
+        aK, aC = _scatter(ke_new, dofs_new, n)
+        self._count = (self._count - dC + aC).tocsr()
+        self._count.eliminate_zeros()
+        self.K = (self.K - dK + aK).multiply(self._count.astype(bool)).tocsr()
+
+        keep = np.ones(self.ke.shape[0], dtype=bool)
+        keep[removed] = False
+        self.ke = np.concatenate([self.ke[keep], ke_new])
+        self.dofs = np.concatenate([self.dofs[keep], dofs_new])
+
+
+def adaptive_solve(mesh, props, fixed_dofs, force, target=0.05, fraction=0.5,
+                   max_cycles=8, tol=1e-10):
+    """
+    Solve, estimate, refine, repeat: ZZ-driven adaptive refinement of a
+    quad4 mesh with incremental reassembly and warm-started CG.
+
+    Args:
+        mesh: quad4 Mesh.
+        props (dict): Quad4Kernel keyword arguments.
+        fixed_dofs: callable fixed_dofs(mesh) -> constrained DOF indices
+                    (on nodes that never hang, e.g. boundary nodes).
+        force: callable force(mesh) -> (n_dofs,) load vector.
+        target (float): stop once the relative ZZ estimate is below this.
+        fraction (float): Doerfler marking fraction.
+        max_cycles (int): refinement cycles at most.
+        tol (float): CG tolerance.
+
+    Returns:
+        dict with 'mesh', 'u' (full DOF vector), 'estimate' (last zz_error
+        result) and 'history' (list of (n_dofs, relative error, CG iterations)).
+    """
+    asm = IncrementalAssembler(mesh, props)
+    stride = asm.stride
+    u = None
+    history = []
+    for cycle in range(max_cycles + 1):
+        # Reduce to unconstrained DOFs (hanging nodes follow their edges)
+        T, masters = hanging_constraints(mesh, stride)
+        K_r = (T.T @ asm.K @ T).tocsr()
+        f_r = T.T @ force(mesh)
+        pos = np.full(mesh.n_nodes * stride, -1)
+        pos[masters] = np.arange(masters.size)
+        free = free_dofs(masters.size, pos[np.asarray(fixed_dofs(mesh), dtype=int)])
+
+        x0 = None if u is None else u[masters][free]
+        q = np.zeros(masters.size)
+        q[free], iterations = cg_solve(K_r[free][:, free], f_r[free], x0=x0, tol=tol)
+        u = T @ q
+
+        estimate = zz_error(kernel_for(mesh.elem_type)(mesh.nodes, mesh.elems, **props),
+                            u, stride)
+        history.append((masters.size, estimate['relative'], iterations))
+        if estimate['relative'] <= target or cycle == max_cycles:
+            break
+
+        mesh, split, P = refine_quads(mesh, mark_elements(estimate['elem_error'], fraction))
+        asm.update(mesh, split, 4 * split.size)
+        u = (P @ u.reshape(-1, stride)).reshape(-1)          # warm start
+    return {'mesh': mesh, 'u': u, 'estimate': estimate, 'history': history}
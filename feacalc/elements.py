@@ -0,0 +1,658 @@
+"""
+elements.py
+
+Batched element kernels for feacalc. Every kernel works on whole arrays of
+elements at once: node coordinates of shape (n_nodes, dim) and a connectivity
+array of shape (n_elems, nodes_per_elem), the same layout MeshData uses.
+DOFs are numbered node-major: dof = node * stride + component, where stride
+defaults to the kernel's own DOFs per node and is larger when element types
+with more DOFs per node share the mesh.
+
+Kernels are registered per element type name (see register_kernel) so that
+assembly can dispatch once per homogeneous block. A registered kernel is
+constructed as Kernel(coords, conn, **props) and provides n_elems, node_dofs,
+stiffness(), dof_map(stride), lumped_mass(stride) and recover(u, stride).
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from . import backend
+from .utils import spmv
+
+ELEMENT_KERNELS = {}
+
+
+def register_kernel(elem_type):
+    """Class decorator registering a batched kernel for an element type name."""
+    def decorator(cls):
+        ELEMENT_KERNELS[elem_type] = cls
+        cls.elem_type = elem_type
+        return cls
+    return decorator
+
+
+def kernel_for(elem_type):
+    """Kernel class registered for elem_type."""
+    try:
+        return ELEMENT_KERNELS[elem_type]
+    except KeyError:
+        raise ValueError(f"No element kernel registered for '{elem_type}'") from None
+
+
+def _dof_map(conn, node_dofs, stride):
+    """Global DOFs of every element node, shape (n_elems, k * node_dofs)."""
+    comp = np.arange(node_dofs)
+    return (conn[:, :, None] * stride + comp).reshape(conn.shape[0], -1)
+
+
+def _spread_nodal(node_values, node_dofs, stride):
+    """Repeat a per-node value over the first node_dofs of each node's stride."""
+    out = np.zeros((node_values.shape[0], stride))
+    out[:, :node_dofs] = node_values[:, None]
+    return out.reshape(-1)
+
+
+def _scatter_matrix(conn, signs, n_nodes, dim):
+    """
+    Sparse operator mapping per-element, per-component values (n_elems * dim)
+    onto node-major DOFs, with the given sign for each element node.
+
+    Args:
+        conn: (n_elems, k) connectivity.
+        signs: length-k sequence of +1/-1, one per element node.
+        n_nodes, dim: global sizes.
+
+    Returns:
+        scipy.sparse.csr_matrix of shape (n_nodes * dim, n_elems * dim).
+    """
+    n_elems, k = conn.shape
+    comp = np.arange(dim)
+    cols = (np.arange(n_elems)[:, None] * dim + comp).ravel()
+    rows = np.concatenate([(conn[:, a, None] * dim + comp).ravel() for a in range(k)])
+    vals = np.concatenate([np.full(n_elems * dim, s, dtype=float) for s in signs])
+    return sp.csr_matrix((vals, (rows, np.tile(cols, k))),
+                         shape=(n_nodes * dim, n_elems * dim))
+
+
+@register_kernel('bar')
+class BarKernel:
+    """
+    Two-node axial bar (truss) elements, evaluated in batch.
+
+    Internal forces are corotational (axial force from the current length),
+    so they remain valid for the large rigid rotations seen in impact runs.
+    All work arrays are allocated once, so internal_forces() performs no
+    per-call allocation beyond scipy's sparse product.
+    """
+    def __init__(self, coords, conn, E, A, rho=0.0):
+        """
+        Args:
+            coords: (n_nodes, dim) reference node coordinates, dim in (1, 2, 3).
+            conn: (n_elems, 2) node indices.
+            E, A, rho: scalars or (n_elems,) arrays of modulus, area, density.
+        """
+        self.coords = np.atleast_2d(np.asarray(coords, dtype=float))
+        self.conn   = np.asarray(conn, dtype=np.int64)
+        n_elems     = self.conn.shape[0]
+        self.n_nodes, self.dim = self.coords.shape
+        self.E   = np.broadcast_to(np.asarray(E, dtype=float), (n_elems,)).copy()
+        self.A   = np.broadcast_to(np.asarray(A, dtype=float), (n_elems,)).copy()
+        self.rho = np.broadcast_to(np.asarray(rho, dtype=float), (n_elems,)).copy()
+
+        d = self.coords[self.conn[:, 1]] - self.coords[self.conn[:, 0]]
+        self.L0 = np.linalg.norm(d, axis=1)
+        if np.any(self.L0 == 0.0):
+            raise ValueError("Zero-length bar elements")
+        self.EA_L0 = self.E * self.A / self.L0
+
+        # Scatter of per-element axial force vectors onto DOFs: -N e on i, +N e on j
+        self._B = _scatter_matrix(self.conn, (-1.0, 1.0), self.n_nodes, self.dim)
+
+        # Work arrays
+        self._xi  = np.empty((n_elems, self.dim))
+        self._xj  = np.empty((n_elems, self.dim))
+        self._len = np.empty(n_elems)
+        self._N   = np.empty(n_elems)
+
+    @property
+    def n_elems(self):
+        return self.conn.shape[0]
+
+    @property
+    def n_dofs(self):
+        return self.n_nodes * self.dim
+
+    @property
+    def node_dofs(self):
+        return self.dim
+
+    def subset(self, idx):
+        """New BarKernel over the elements idx (same nodes and DOF numbering)."""
+        return BarKernel(self.coords, self.conn[idx], self.E[idx], self.A[idx],
+                         self.rho[idx])
+
+    def axial_forces(self, x):
+        """
+        Axial force per element for current positions x.
+
+        Args:
+            x: (n_nodes, dim) current node positions.
+
+        Returns:
+            (n_elems,) axial forces (tension positive); a view of a work array.
+        """
+        np.take(x, self.conn[:, 0], axis=0, out=self._xi)
+        np.take(x, self.conn[:, 1], axis=0, out=self._xj)
+        self._xj -= self._xi                                # d = x_j - x_i
+        np.einsum('ij,ij->i', self._xj, self._xj, out=self._len)
+        np.sqrt(self._len, out=self._len)
+        np.subtract(self._len, self.L0, out=self._N)
+        self._N *= self.EA_L0
+        return self._N
+
+    def internal_forces(self, x, out):
+        """
+        Assemble the internal force vector for current positions x.
+
+        Args:
+            x: (n_nodes, dim) current node positions.
+            out: (n_dofs,) preallocated output vector.
+
+        Returns:
+            out
+
+        With the compiled backend the force is fused into one loop that never
+        touches the _xj / _len / _N work arrays, so unlike the NumPy path it
+        leaves no axial forces or lengths behind in them; call axial_forces()
+        for those.
+        """
+        fused = backend.jit('bar_internal_forces')
+        if fused is not None:
+            return fused(x, self.conn, self.L0, self.EA_L0, out)
+        N = self.axial_forces(x)
+        # Unit direction scaled by N: d * (N / L), reusing the d work array
+        np.divide(N, self._len, out=self._len)
+        self._xj *= self._len[:, None]
+        return spmv(self._B, self._xj.reshape(-1), out)
+
+    def lumped_mass(self, stride=None):
+        """
+        Row-sum lumped mass per DOF: half of rho * A * L0 to each end node.
+
+        Args:
+            stride (int): DOFs per node of the global numbering (default dim).
+
+        Returns:
+            (n_nodes * stride,) mass vector.
+        """
+        half = 0.5 * self.rho * self.A * self.L0
+        node_mass = np.bincount(self.conn.ravel(), weights=np.repeat(half, 2),
+                                minlength=self.n_nodes)
+        return _spread_nodal(node_mass, self.dim, stride or self.dim)
+
+    def stable_dt(self):
+        """
+        Per-element critical time step L0 / c with wave speed c = sqrt(E / rho).
+
+        Returns:
+            (n_elems,) array.
+        """
+        return backend.wave_dt(self.L0, self.rho, self.E)
+
+    def stiffness(self):
+        """
+        Small-displacement element stiffness matrices in global axes.
+
+        Returns:
+            (n_elems, 2 * dim, 2 * dim) array, DOF order [node i, node j].
+        """
+        d = self.coords[self.conn[:, 1]] - self.coords[self.conn[:, 0]]
+        e = d / self.L0[:, None]
+        kee = self.EA_L0[:, None, None] * (e[:, :, None] * e[:, None, :])
+        return np.block([[kee, -kee], [-kee, kee]])
+
+    def dof_map(self, stride=None):
+        """
+        Global DOF indices of every element, in stiffness() order.
+
+        Args:
+            stride (int): DOFs per node of the global numbering (default dim).
+
+        Returns:
+            (n_elems, 2 * dim) int array.
+        """
+        return _dof_map(self.conn, self.dim, stride or self.dim)
+
+    def recover(self, u, stride=None):
+        """
+        Element results for a global displacement vector.
+
+        Args:
+            u: (n_nodes * stride,) displacements.
+            stride (int): DOFs per node of u (default dim).
+
+        Returns:
+            dict with 'axial_force' (n_elems,).
+        """
+        u = np.asarray(u, dtype=float).reshape(self.n_nodes, stride or self.dim)
+        return {'axial_force': self.axial_forces(self.coords + u[:, :self.dim]).copy()}
+
+
+# 2x2 Gauss rule on [-1, 1]^2, points in the same order as the quad corners
+_GAUSS_2x2 = np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]]) / np.sqrt(3.0)
+_QUAD_CORNERS = np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]])
+
+
+def _quad_shape_derivatives(points):
+    """
+    Bilinear shape function derivatives at natural points.
+
+    Returns:
+        (n_points, 4, 2) array of dN_a / d(xi, eta).
+    """
+    xi, eta = points[:, 0, None], points[:, 1, None]
+    cx, cy = _QUAD_CORNERS[:, 0], _QUAD_CORNERS[:, 1]
+    return 0.25 * np.stack([cx * (1.0 + cy * eta), cy * (1.0 + cx * xi)], axis=-1)
+
+
+def _quad_shape_functions(points):
+    """
+    Bilinear shape function values at natural points.
+
+    Returns:
+        (n_points, 4) array of N_a.
+    """
+    xi, eta = points[:, 0, None], points[:, 1, None]
+    return 0.25 * (1.0 + _QUAD_CORNERS[:, 0] * xi) * (1.0 + _QUAD_CORNERS[:, 1] * eta)
+
+
+# Gauss-point interpolation of corner values, and its inverse (extrapolation)
+_QUAD_GAUSS_N = _quad_shape_functions(_GAUSS_2x2)
+_QUAD_EXTRAPOLATE = np.linalg.inv(_QUAD_GAUSS_N)
+
+
+@register_kernel('quad4')
+class Quad4Kernel:
+    """
+    Four-node bilinear plane-stress quadrilaterals in the x-y plane, evaluated
+    in batch with 2x2 Gauss integration. Corners are ordered counter-clockwise.
+    """
+    def __init__(self, coords, conn, E, nu, t=1.0, rho=0.0):
+        """
+        Args:
+            coords: (n_nodes, dim) node coordinates; only x and y are used.
+            conn: (n_elems, 4) node indices.
+            E, nu, t, rho: scalars or (n_elems,) arrays of modulus, Poisson
+                           ratio, thickness and density.
+        """
+        self.coords = np.atleast_2d(np.asarray(coords, dtype=float))
+        self.conn   = np.asarray(conn, dtype=np.int64)
+        n_elems     = self.conn.shape[0]
+        self.n_nodes = self.coords.shape[0]
+        self.E   = np.broadcast_to(np.asarray(E, dtype=float), (n_elems,)).copy()
+        self.nu  = np.broadcast_to(np.asarray(nu, dtype=float), (n_elems,)).copy()
+        self.t   = np.broadcast_to(np.asarray(t, dtype=float), (n_elems,)).copy()
+        self.rho = np.broadcast_to(np.asarray(rho, dtype=float), (n_elems,)).copy()
+
+        # Plane-stress constitutive matrices, (n_elems, 3, 3)
+        c = self.E / (1.0 - self.nu ** 2)
+        self.D = np.zeros((n_elems, 3, 3))
+        self.D[:, 0, 0] = self.D[:, 1, 1] = c
+        self.D[:, 0, 1] = self.D[:, 1, 0] = c * self.nu
+        self.D[:, 2, 2] = c * 0.5 * (1.0 - self.nu)
+
+        # Strain-displacement matrices and Jacobian determinants per Gauss point
+        self.B, self.detJ = self._strain_displacement(_GAUSS_2x2)
+        if np.any(self.detJ <= 0.0):
+            raise ValueError("Degenerate or clockwise quad elements")
+
+    @property
+    def n_elems(self):
+        return self.conn.shape[0]
+
+    @property
+    def node_dofs(self):
+        return 2
+
+    @property
+    def n_dofs(self):
+        return self.n_nodes * 2
+
+    def _strain_displacement(self, points):
+        """
+        B matrices at natural points for every element.
+
+        Returns:
+            B: (n_elems, n_points, 3, 8) with DOF order [u0, v0, u1, v1, ...].
+            detJ: (n_elems, n_points).
+        """
+        X = self.coords[self.conn][..., :2]                       # (n_e, 4, 2)
+        dN = _quad_shape_derivatives(points)                      # (n_p, 4, 2)
+        J = np.einsum('pai,eaj->epij', dN, X)                     # (n_e, n_p, 2, 2)
+        detJ = J[..., 0, 0] * J[..., 1, 1] - J[..., 0, 1] * J[..., 1, 0]
+        inv = np.empty_like(J)
+        inv[..., 0, 0] = J[..., 1, 1]
+        inv[..., 1, 1] = J[..., 0, 0]
+        inv[..., 0, 1] = -J[..., 0, 1]
+        inv[..., 1, 0] = -J[..., 1, 0]
+        inv /= detJ[..., None, None]
+        dNdx = np.einsum('epij,paj->epai', inv, dN)               # (n_e, n_p, 4, 2)
+
+        B = np.zeros(dNdx.shape[:2] + (3, 8))
+        B[..., 0, 0::2] = dNdx[..., 0]
+        B[..., 1, 1::2] = dNdx[..., 1]
+        B[..., 2, 0::2] = dNdx[..., 1]
+        B[..., 2, 1::2] = dNdx[..., 0]
+        return B, detJ
+
+    def areas(self):
+        """Element areas, (n_elems,)."""
+        return self.detJ.sum(axis=1)
+
+    def stiffness(self):
+        """
+        Element stiffness matrices sum_g t detJ B^T D B (unit Gauss weights).
+
+        Returns:
+            (n_elems, 8, 8) array, DOF order [u0, v0, ..., u3, v3].
+        """
+        DB = np.einsum('eij,epjk->epik', self.D, self.B)
+        return np.einsum('ep,epji,epjk->eik', self.t[:, None] * self.detJ, self.B, DB)
+
+    def dof_map(self, stride=None):
+        """
+        Global DOF indices of every element, in stiffness() order.
+
+        Returns:
+            (n_elems, 8) int array.
+        """
+        return _dof_map(self.conn, 2, stride or 2)
+
+    def lumped_mass(self, stride=None):
+        """
+        Lumped mass per DOF: a quarter of rho * t * area to each corner.
+
+        Returns:
+            (n_nodes * stride,) mass vector.
+        """
+        quarter = 0.25 * self.rho * self.t * self.areas()
+        node_mass = np.bincount(self.conn.ravel(), weights=np.repeat(quarter, 4),
+                                minlength=self.n_nodes)
+        return _spread_nodal(node_mass, 2, stride or 2)
+
+    def recover(self, u, stride=None):
+        """
+        Gauss-point stresses for a global displacement vector.
+
+        Args:
+            u: (n_nodes * stride,) displacements.
+            stride (int): DOFs per node of u (default 2).
+
+        Returns:
+            dict with 'stress' (n_elems, 4, 3) as [sxx, syy, sxy] per Gauss
+            point and 'centroid_stress' (n_elems, 3).
+        """
+        u_e = np.asarray(u, dtype=float)[self.dof_map(stride)]    # (n_e, 8)
+        strain = np.einsum('epik,ek->epi', self.B, u_e)
+        stress = np.einsum('eij,epj->epi', self.D, strain)
+        return {'stress': stress, 'centroid_stress': stress.mean(axis=1)}
+
+    @staticmethod
+    def gauss_to_corners(values):
+        """
+        Bilinear extrapolation of Gauss-point values to the element corners.
+
+        Args:
+            values: (n_elems, 4, ...) values at the 2x2 Gauss points.
+
+        Returns:
+            (n_elems, 4, ...) values at the corners.
+        """
+        return np.einsum('ag,eg...->ea...', _QUAD_EXTRAPOLATE, values)
+
+    @staticmethod
+    def corners_to_gauss(values):
+        """
+        Bilinear interpolation of corner values to the 2x2 Gauss points.
+
+        Args:
+            values: (n_elems, 4, ...) values at the corners.
+
+        Returns:
+            (n_elems, 4, ...) values at the Gauss points.
+        """
+        return np.einsum('ga,ea...->eg...', _QUAD_GAUSS_N, values)
+
+
+def _frame_local_stiffness(E, G, A, Iy, Iz, J, L):
+    """
+    Local 12x12 Euler-Bernoulli stiffness matrices, DOF order per node
+    [u, v, w, rx, ry, rz].
+
+    Returns:
+        (n_elems, 12, 12) array.
+    """
+    k = np.zeros((L.shape[0], 12, 12))
+    L2, L3 = L * L, L * L * L
+
+    def put(i, j, val):
+        k[:, i, j] = val
+        k[:, j, i] = val
+
+    # Axial and torsion
+    for i, j, c in ((0, 6, E * A / L), (3, 9, G * J / L)):
+        put(i, i, c)
+        put(j, j, c)
+        put(i, j, -c)
+
+    # Bending in the local x-y plane (v, rz) and x-z plane (w, ry); the x-z
+    # terms flip sign on the rotation couplings because ry = -dw/dx
+    for v, r, EI, s in ((1, 5, E * Iz, 1.0), (2, 4, E * Iy, -1.0)):
+        a, b, c, d = 12 * EI / L3, 6 * EI / L2, 4 * EI / L, 2 * EI / L
+        v2, r2 = v + 6, r + 6
+        put(v, v, a)
+        put(v2, v2, a)
+        put(v, v2, -a)
+        put(v, r, s * b)
+        put(v, r2, s * b)
+        put(v2, r, -s * b)
+        put(v2, r2, -s * b)
+        put(r, r, c)
+        put(r2, r2, c)
+        put(r, r2, d)
+    return k
+
+
+def _condense(k, released):
+    """
+    Batched static condensation of released (force-free) local DOFs.
+
+    Elements are grouped by release pattern, so each distinct pattern costs
+    one batched solve: k_kept -= k_kr k_rr^-1 k_rk, released rows/columns
+    are zeroed.
+
+    Args:
+        k: (n_elems, 12, 12) local stiffness, modified in place.
+        released: (n_elems, 12) bool mask.
+
+    Returns:
+        k
+    """
+    patterns, which = np.unique(released, axis=0, return_inverse=True)
+    which = which.reshape(-1)
+    for p, mask in enumerate(patterns):
+        if not mask.any():
+            continue
+        idx = np.flatnonzero(which == p)
+        r = np.flatnonzero(mask)
+        kk = k[idx]
+        k_rr = kk[:, r[:, None], r]
+        k_rx = kk[:, r, :]
+        kk -= kk[:, :, r] @ np.linalg.solve(k_rr, k_rx)
+        kk[:, r, :] = 0.0
+        kk[:, :, r] = 0.0
+        k[idx] = kk
+    return k
+
+
+@register_kernel('frame')
+class FrameKernel:
+    """
+    Two-node 3D Euler-Bernoulli frame elements (12 DOFs), evaluated in batch.
+
+    Local axes: x runs from node i to node j, the local x-y plane contains the
+    orientation vector, z = x cross y. Iz is the second moment for bending in
+    the local x-y plane, Iy for the x-z plane. Released end DOFs (hinges) are
+    removed by static condensation before the rotation to global axes.
+    """
+    def __init__(self, coords, conn, E, G, A, Iy, Iz, J, rho=0.0,
+                 orientation=None, releases=None):
+        """
+        Args:
+            coords: (n_nodes, 3) node coordinates.
+            conn: (n_elems, 2) node indices.
+            E, G, A, Iy, Iz, J, rho: scalars or (n_elems,) arrays of moduli,
+                area, second moments, torsion constant and density.
+            orientation: (3,) or (n_elems, 3) vectors in the local x-y plane;
+                defaults to global y, or global x for members parallel to y.
+            releases: (12,) or (n_elems, 12) bool mask of released local DOFs
+                (e.g. index 11 releases the end-j rz moment).
+        """
+        self.coords = np.asarray(coords, dtype=float)
+        self.conn   = np.asarray(conn, dtype=np.int64)
+        n_elems     = self.conn.shape[0]
+        self.n_nodes = self.coords.shape[0]
+        if self.coords.shape[1] != 3:
+            raise ValueError("Frame elements need 3D node coordinates")
+
+        def per_elem(x):
+            return np.broadcast_to(np.asarray(x, dtype=float), (n_elems,)).copy()
+        self.E, self.G, self.A = per_elem(E), per_elem(G), per_elem(A)
+        self.Iy, self.Iz, self.J = per_elem(Iy), per_elem(Iz), per_elem(J)
+        self.rho = per_elem(rho)
+
+        d = self.coords[self.conn[:, 1]] - self.coords[self.conn[:, 0]]
+        self.L = np.linalg.norm(d, axis=1)
+        if np.any(self.L == 0.0):
+            raise ValueError("Zero-length frame elements")
+        self.R = self._rotations(d / self.L[:, None], orientation)
+
+        if releases is None:
+            self.releases = np.zeros((n_elems, 12), dtype=bool)
+        else:
+            self.releases = np.broadcast_to(np.asarray(releases, dtype=bool),
+                                            (n_elems, 12)).copy()
+        self.k_local = _frame_local_stiffness(self.E, self.G, self.A, self.Iy,
+                                              self.Iz, self.J, self.L)
+        if self.releases.any():
+            _condense(self.k_local, self.releases)
+
+    @staticmethod
+    def _rotations(ex, orientation):
+        """
+        Direction cosine matrices with rows = local x, y, z in global axes.
+
+        Returns:
+            (n_elems, 3, 3) array.
+        """
+        n = ex.shape[0]
+        if orientation is None:
+            v = np.tile([0.0, 1.0, 0.0], (n, 1))
+            v[np.abs(ex[:, 1]) > 1.0 - 1e-9] = (1.0, 0.0, 0.0)
+        else:
+            v = np.broadcast_to(np.asarray(orientation, dtype=float), (n, 3))
+        ez = np.cross(ex, v)
+        norm = np.linalg.norm(ez, axis=1)
+        if np.any(norm < 1e-12):
+            raise ValueError("Orientation vector parallel to a frame member")
+        ez /= norm[:, None]
+        ey = np.cross(ez, ex)
+        return np.stack([ex, ey, ez], axis=1)
+
+    @property
+    def n_elems(self):
+        return self.conn.shape[0]
+
+    @property
+    def node_dofs(self):
+        return 6
+
+    @property
+    def n_dofs(self):
+        return self.n_nodes * 6
+
+    def _to_global(self, k):
+        """
+        T^T k T for block-diagonal T = diag(R, R, R, R), done as one batched
+        product over the 4 x 4 grid of 3x3 blocks.
+        """
+        n = k.shape[0]
+        blocks = k.reshape(n, 4, 3, 4, 3).transpose(0, 1, 3, 2, 4)    # (n, 4, 4, 3, 3)
+        R = self.R[:, None, None]
+        out = R.swapaxes(-1, -2) @ blocks @ R
+        return out.transpose(0, 1, 3, 2, 4).reshape(n, 12, 12)
+
+    def stiffness(self):
+        """
+        Element stiffness matrices in global axes.
+
+        Returns:
+            (n_elems, 12, 12) array, DOF order [node i, node j] x
+            [ux, uy, uz, rx, ry, rz].
+        """
+        return self._to_global(self.k_local)
+
+    def dof_map(self, stride=None):
+        """
+        Global DOF indices of every element, in stiffness() order.
+
+        Returns:
+            (n_elems, 12) int array.
+        """
+        return _dof_map(self.conn, 6, stride or 6)
+
+    def lumped_mass(self, stride=None):
+        """
+        Lumped mass per DOF: half of rho * A * L to the translations of each
+        end node and (rho * A * L / 2) * L^2 / 12 to its rotations, which keeps
+        the rotational DOFs of an explicit model nonsingular.
+
+        Returns:
+            (n_nodes * stride,) mass vector.
+        """
+        half = 0.5 * self.rho * self.A * self.L
+        node_dofs = np.zeros((self.n_nodes, 2))
+        ends = self.conn.ravel()
+        node_dofs[:, 0] = np.bincount(ends, weights=np.repeat(half, 2), minlength=self.n_nodes)
+        node_dofs[:, 1] = np.bincount(ends, weights=np.repeat(half * self.L ** 2 / 12.0, 2),
+                                      minlength=self.n_nodes)
+        out = np.zeros((self.n_nodes, stride or 6))
+        out[:, 0:3] = node_dofs[:, 0, None]
+        out[:, 3:6] = node_dofs[:, 1, None]
+        return out.reshape(-1)
+
+    def stable_dt(self):
+        """
+        Per-element critical step from the axial wave speed, L / sqrt(E / rho).
+        Bending modes of slender members can be stiffer; apply a safety factor.
+
+        Returns:
+            (n_elems,) array.
+        """
+        return backend.wave_dt(self.L, self.rho, self.E)
+
+    def recover(self, u, stride=None):
+        """
+        Local end forces for a global displacement vector.
+
+        Args:
+            u: (n_nodes * stride,) displacements and rotations.
+            stride (int): DOFs per node of u (default 6).
+
+        Returns:
+            dict with 'end_forces' (n_elems, 12): [N, Vy, Vz, T, My, Mz] acting
+            on end i, then on end j, in local axes.
+        """
+        u_e = np.asarray(u, dtype=float)[self.dof_map(stride)]   # (n_e, 12)
+        u_loc = (self.R[:, None] @ u_e.reshape(-1, 4, 3, 1)).reshape(-1, 12)
+        return {'end_forces': np.einsum('eij,ej->ei', self.k_local, u_loc)}
@@ -0,0 +1,200 @@
+"""
+explicit.py
+
+Explicit central-difference dynamics for short-duration events. No stiffness
+matrix is ever assembled: each step evaluates batched element internal forces
+and divides by a lumped mass vector. Runs can checkpoint their state
+periodically and resume from the latest checkpoint.
+"""
+import numpy as np
+
+from .solver import (content_hash, history_state, open_history, restore_checkpoint,
+                     saved_rows)
+from .utils import free_dofs
+
+
+class CentralDifferenceSolver:
+    """
+    Leapfrog integration of M a = f_ext - f_int(u) with diagonal M.
+
+    The stable step comes from the element kernel's per-element estimate
+    (times a safety factor). With max_level > 0, elements are binned into
+    groups whose stable step is at least 2^k times the smallest one. Each
+    node advances with the step of the finest group touching it, and each
+    element is re-evaluated at the rate of its finest node, with its forces
+    held in between. Elements on a group boundary therefore run at the fine
+    rate, seeing their coarse nodes at positions interpolated along the
+    coarse drift, so no force is frozen while a node it acts on moves.
+    """
+    def __init__(self, kernel, fixed_dofs=None, dt=None, safety=0.9, max_level=0):
+        """
+        Args:
+            kernel: batched element kernel providing coords, conn, n_dofs,
+                    internal_forces(x, out), lumped_mass(), stable_dt() and
+                    subset(idx) (e.g. elements.BarKernel).
+            fixed_dofs: optional DOF indices held at zero displacement.
+            dt (float): base time step; defaults to the stable estimate.
+            safety (float): factor applied to the per-element stable steps.
+            max_level (int): deepest subcycling level (0 disables subcycling).
+        """
+        self.kernel = kernel
+        self.n_dofs = kernel.n_dofs
+        dim = kernel.dim
+
+        # Fixed DOFs get zero inverse mass, so they never move
+        mass = kernel.lumped_mass()
+        self.free = free_dofs(self.n_dofs, fixed_dofs)
+        if np.any(mass[self.free] <= 0.0):
+            raise ValueError("Every free DOF needs positive lumped mass")
+        self.inv_mass = np.zeros(self.n_dofs)
+        self.inv_mass[self.free] = 1.0 / mass[self.free]
+
+        dt_elem = safety * kernel.stable_dt()
+        self.dt_stable = float(dt_elem.min())
+        self.dt = self.dt_stable if dt is None else dt
+
+        # Element groups by power-of-two step multiple, nodes by finest group
+        if max_level > 0:
+            ratio = np.maximum(dt_elem / self.dt, 1.0)
+            level = np.minimum(np.floor(np.log2(ratio)).astype(int), max_level)
+        else:
+            level = np.zeros(kernel.n_elems, dtype=int)
+        node_level = np.full(kernel.n_nodes, level.max() if level.size else 0)
+        np.minimum.at(node_level, kernel.conn, level[:, None])
+        dof_level = np.repeat(node_level, dim)
+
+        # Elements on a group boundary follow their finest node
+        if level.size:
+            level = node_level[kernel.conn].min(axis=1)
+
+        self.groups = []
+        for k in np.unique(level):
+            idx = np.flatnonzero(level == k)
+            group = kernel if idx.size == kernel.n_elems else kernel.subset(idx)
+            self.groups.append((1 << int(k), group))
+        self.dof_groups = [(1 << int(k), np.flatnonzero(dof_level == k))
+                           for k in np.unique(dof_level)]
+
+    def run(self, n_steps, force, u0=None, v0=None, stride=1, out_path=None,
+            callback=None, checkpoint=None, restart=False):
+        """
+        Integrate n_steps base steps.
+
+        Args:
+            n_steps (int): number of base time steps.
+            force: callable force(t, out) writing the external load into out,
+                   or a constant (n_dofs,) array.
+            u0, v0: optional initial displacement/velocity (n_dofs,).
+            stride (int): record every stride-th step (step 0 is always recorded).
+            out_path (str): stream recorded displacements to this .npy file.
+            callback: optional callback(step, t, u).
+            checkpoint (Checkpointer): write the state every checkpoint.every
+                base steps (in the background).
+            restart (bool): resume from checkpoint's latest file, if any, with
+                the same n_steps, load, stride and out_path as the original
+                run; u0/v0 are then ignored.
+
+        Returns:
+            dict with 'u' (final displacements), 'v', 'history' and 'times'.
+            'v' is the leapfrog half-step velocity, not in sync with 'u':
+            v(t_n - dt / 2) for a single-rate run, and h / 2 behind its
+            node's displacement for a node subcycled with step h. It is the
+            state the integration (and a checkpoint) continues from.
+        """
+        n, dt = self.n_dofs, self.dt
+        dim = self.kernel.dim
+        X = self.kernel.coords.reshape(-1)
+
+        u = np.zeros(n)
+        v = np.zeros(n)
+        if u0 is not None:
+            u[self.free] = np.asarray(u0, dtype=float)[self.free]
+        if v0 is not None:
+            v[self.free] = np.asarray(v0, dtype=float)[self.free]
+        x = np.empty(n)
+        f_ext = np.zeros(n)
+        f_int = np.zeros(n)
+        acc = np.empty(n)
+        work = np.empty(n)
+        held = [np.zeros(n) for _ in self.groups]
+
+        if callable(force):
+            load = force
+        else:
+            const = np.asarray(force, dtype=float)
+            def load(t, out):
+                out[:] = const
+
+        # Resume from the latest checkpoint of the same model, if asked; the
+        # held forces of subcycled groups are part of the state
+        pattern = content_hash('explicit', self.kernel.conn, self.free,
+                               [every for every, _ in self.groups])
+        state = restore_checkpoint(checkpoint, pattern, dt=dt) if restart else None
+        start = 0 if state is None else int(state['step'])
+        if state is not None:
+            u[:], v[:], f_int[:] = state['u'], state['v'], state['f_int']
+            for g, saved in zip(held, state['held']):
+                g[:] = saved
+
+        n_records = n_steps // stride + 1
+        history = open_history(out_path, n_records, n, state)
+        saved = saved_rows(state)
+        times = np.arange(n_records) * stride * dt
+        if state is None:
+            history[0] = u
+
+        for step in range(start, n_steps):
+            t = step * dt
+
+            # Coarse nodes drifted ahead to the end of their step; evaluate
+            # boundary elements with them interpolated back to time t
+            np.add(X, u, out=x)
+            for every, dofs in self.dof_groups:
+                lag = -step % every
+                if lag:
+                    x[dofs] -= (lag * dt) * v[dofs]
+
+            # Internal forces of every group due this step, others held
+            for (every, group), g in zip(self.groups, held):
+                if step % every == 0:
+                    f_int -= g
+                    group.internal_forces(x.reshape(-1, dim), g)
+                    f_int += g
+
+            # a = (f_ext - f_int) / m
+            load(t, f_ext)
+            np.subtract(f_ext, f_int, out=acc)
+            acc *= self.inv_mass
+
+            # Leapfrog kick/drift; the first kick is a half step
+            for every, dofs in self.dof_groups:
+                if step % every:
+                    continue
+                h = every * dt
+                kick = 0.5 * h if step == 0 else h
+                if dofs.size == n:
+                    np.multiply(acc, kick, out=work)
+                    v += work
+                    np.multiply(v, h, out=work)
+                    u += work
+                else:
+                    v[dofs] += kick * acc[dofs]
+                    u[dofs] += h * v[dofs]
+
+            if (step + 1) % stride == 0:
+                history[(step + 1) // stride] = u
+            if callback is not None:
+                callback(step + 1, t + dt, u)
+
+            if checkpoint is not None and checkpoint.due(step + 1):
+                rows = (step + 1) // stride + 1
+                checkpoint.save(step + 1, dict(u=u, v=v, f_int=f_int, held=np.stack(held),
+                                               time=t + dt, dt=dt, pattern=pattern),
+                                **history_state(history, saved, rows))
+                saved = rows
+
+        if out_path is not None:
+            history.flush()
+        if checkpoint is not None:
+            checkpoint.wait()
+        return {'u': u, 'v': v, 'history': history, 'times': times}
@@ -0,0 +1,742 @@
+"""
+mesh.py
+
+Mesh containers, vectorized structured mesh generators and mesh cleanup for
+feacalc. Node coordinates are (n_nodes, dim) float arrays and connectivity is
+an (n_elems, nodes_per_elem) int array, matching MeshData. Meshes that mix
+element types keep one such array per type (MixedMesh). Generated 3D
+structures use y as the vertical axis, like the viewer.
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+from scipy.spatial import cKDTree
+
+
+class Adjacency:
+    """
+    Compressed sparse row adjacency: the neighbours of row i are
+    indices[indptr[i]:indptr[i + 1]].
+
+    Attributes:
+        indptr (np.ndarray): row offsets, shape (n_rows + 1,).
+        indices (np.ndarray): concatenated neighbour ids.
+    """
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self):
+        return self.indptr.size - 1
+
+    def __getitem__(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    @property
+    def degree(self):
+        """Number of neighbours of every row."""
+        return np.diff(self.indptr)
+
+    @classmethod
+    def from_pairs(cls, rows, cols, n_rows):
+        """
+        Build from (row, col) pairs by a single stable sort on row.
+
+        Args:
+            rows, cols: int arrays of equal length.
+            n_rows (int): number of rows.
+        """
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, cols[order])
+
+
+class Mesh:
+    """
+    Node coordinates plus homogeneous element connectivity, with node-to-
+    element and node-to-node adjacency built once on first use.
+
+    Attributes:
+        nodes (np.ndarray): coordinates, shape (n_nodes, dim).
+        elems (np.ndarray): connectivity, shape (n_elems, nodes_per_elem).
+        elem_type (str): element type name, e.g. 'bar' or 'quad4'.
+        hanging (np.ndarray): (n_hanging, 3) rows [node, a, b]: node lies on
+            the edge a-b of a coarser element and follows its midpoint (see
+            refine_quads and hanging_constraints).
+    """
+    def __init__(self, nodes, elems, elem_type=None, hanging=None):
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.elems = np.asarray(elems, dtype=np.int64)
+        self.elem_type = elem_type
+        self.hanging = (np.zeros((0, 3), dtype=np.int64) if hanging is None
+                        else np.asarray(hanging, dtype=np.int64).reshape(-1, 3))
+        self._node_elems = None
+        self._node_nodes = None
+
+    @property
+    def n_nodes(self):
+        return self.nodes.shape[0]
+
+    @property
+    def n_elems(self):
+        return self.elems.shape[0]
+
+    @property
+    def dim(self):
+        return self.nodes.shape[1]
+
+    @property
+    def blocks(self):
+        """The single homogeneous block, as {elem_type: elems}."""
+        return {self.elem_type: self.elems}
+
+    @property
+    def node_elements(self):
+        """Adjacency from each node to the elements that use it."""
+        if self._node_elems is None:
+            k = self.elems.shape[1]
+            self._node_elems = Adjacency.from_pairs(
+                self.elems.ravel(), np.repeat(np.arange(self.n_elems), k), self.n_nodes)
+        return self._node_elems
+
+    @property
+    def node_neighbors(self):
+        """Adjacency from each node to the distinct nodes sharing an element with it."""
+        if self._node_nodes is None:
+            k = self.elems.shape[1]
+            a, b = np.triu_indices(k, 1)
+            i = self.elems[:, a].ravel()
+            j = self.elems[:, b].ravel()
+            rows = np.concatenate([i, j])
+            cols = np.concatenate([j, i])
+            keys = np.unique(rows * self.n_nodes + cols)
+            rows, cols = np.divmod(keys, self.n_nodes)
+            # keys are sorted, so rows already are: offsets come from a bincount
+            indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=self.n_nodes), out=indptr[1:])
+            self._node_nodes = Adjacency(indptr, cols)
+        return self._node_nodes
+
+    def nodal_average(self, elem_values):
+        """
+        Average per-element values onto nodes over the elements using each node.
+
+        Args:
+            elem_values: array of shape (n_elems,) or (n_elems, m).
+
+        Returns:
+            array of shape (n_nodes,) or (n_nodes, m); zero for unused nodes.
+        """
+        adj = self.node_elements
+        vals = np.asarray(elem_values, dtype=float)[adj.indices]
+        sums = np.zeros((self.n_nodes,) + vals.shape[1:])
+        used = adj.degree > 0
+        sums[used] = np.add.reduceat(vals, adj.indptr[:-1][used], axis=0)
+        deg = np.maximum(adj.degree, 1).reshape((-1,) + (1,) * (vals.ndim - 1))
+        return sums / deg
+
+
+class MixedMesh:
+    """
+    Node coordinates plus elements grouped into homogeneous type blocks, each
+    with its own connectivity array. Global element ids run block by block in
+    insertion order, so per-element arrays concatenate the blocks' values.
+
+    Attributes:
+        nodes (np.ndarray): coordinates, shape (n_nodes, dim).
+        blocks (dict): elem_type -> (n_elems_of_type, nodes_per_elem) array.
+    """
+    def __init__(self, nodes, blocks=None):
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.blocks = {}
+        self._node_elems = None
+        for elem_type, elems in (blocks or {}).items():
+            self.add_block(elem_type, elems)
+
+    @classmethod
+    def from_meshes(cls, *meshes):
+        """
+        Combine meshes into one, stacking their nodes (no merging) and
+        renumbering their connectivity.
+        """
+        nodes, blocks, shift = [], {}, 0
+        for mesh in meshes:
+            nodes.append(mesh.nodes)
+            for elem_type, elems in mesh.blocks.items():
+                blocks.setdefault(elem_type, []).append(elems + shift)
+            shift += mesh.n_nodes
+        dim = max(n.shape[1] for n in nodes)
+        nodes = np.vstack([np.pad(n, ((0, 0), (0, dim - n.shape[1]))) for n in nodes])
+        return cls(nodes, {t: np.concatenate(e) for t, e in blocks.items()})
+
+    def add_block(self, elem_type, elems):
+        """Append elements of one type, extending an existing block of that type."""
+        elems = np.asarray(elems, dtype=np.int64)
+        if elem_type in self.blocks:
+            elems = np.concatenate([self.blocks[elem_type], elems])
+        self.blocks[elem_type] = elems
+        self._node_elems = None
+
+    def block_mesh(self, elem_type):
+        """Homogeneous Mesh view of one block (sharing the node array)."""
+        return Mesh(self.nodes, self.blocks[elem_type], elem_type)
+
+    @property
+    def n_nodes(self):
+        return self.nodes.shape[0]
+
+    @property
+    def n_elems(self):
+        return sum(e.shape[0] for e in self.blocks.values())
+
+    @property
+    def dim(self):
+        return self.nodes.shape[1]
+
+    @property
+    def elem_offsets(self):
+        """First global element id of every block, as {elem_type: offset}."""
+        counts = [e.shape[0] for e in self.blocks.values()]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+        return dict(zip(self.blocks, starts.tolist()))
+
+    @property
+    def node_elements(self):
+        """Adjacency from each node to the global ids of the elements using it."""
+        if self._node_elems is None:
+            offsets = self.elem_offsets
+            rows = [np.empty(0, dtype=np.int64)] + [e.ravel() for e in self.blocks.values()]
+            cols = [np.empty(0, dtype=np.int64)] + [
+                np.repeat(np.arange(e.shape[0]) + offsets[t], e.shape[1])
+                for t, e in self.blocks.items()]
+            self._node_elems = Adjacency.from_pairs(
+                np.concatenate(rows), np.concatenate(cols), self.n_nodes)
+        return self._node_elems
+
+
+def _edge_keys(a, b, n_nodes):
+    """Orientation-free integer key of the edges a-b."""
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return np.minimum(a, b) * n_nodes + np.maximum(a, b)
+
+
+def refine_quads(mesh, marked):
+    """
+    Split marked quads into four children, keeping the mesh 1-irregular (at
+    most one hanging node per edge).
+
+    A marked element that is itself the fine side of a hanging node forces
+    the coarse neighbour across that edge to be refined too; this closure
+    is repeated until nothing changes. Midpoint nodes already hanging on a
+    refined edge are reused (and stop hanging); new midpoints on edges with
+    an unrefined neighbour become hanging.
+
+    Args:
+        mesh: quad4 Mesh, corners counter-clockwise.
+        marked: indices (or bool mask) of elements to refine.
+
+    Returns:
+        refined (Mesh): unrefined elements in their original order, then the
+            4 children of each refined element.
+        split (np.ndarray): indices of the elements that were refined (after
+            closure), in the order their children appear.
+        prolongation (scipy.sparse.csr_matrix): (n_new_nodes, n_old_nodes)
+            interpolation of nodal values onto the refined mesh.
+    """
+    n, elems, hang = mesh.n_nodes, mesh.elems, mesh.hanging
+    mask = np.zeros(mesh.n_elems, dtype=bool)
+    mask[marked] = True
+
+    # Element edge table, sorted by key for owner lookups
+    ea, eb = elems, np.roll(elems, -1, axis=1)
+    flat = _edge_keys(ea, eb, n).ravel()
+    order = np.argsort(flat, kind='stable')
+    sorted_keys = flat[order]
+
+    # Closure: refining the fine side of a hanging node refines the coarse side
+    row = np.full(n, -1)
+    row[hang[:, 0]] = np.arange(hang.shape[0])
+    hang_keys = _edge_keys(hang[:, 1], hang[:, 2], n)
+    coarse_owner = order[np.searchsorted(sorted_keys, hang_keys)] // 4
+    while hang.shape[0]:
+        idx = np.flatnonzero(mask)
+        A, B = ea[idx].ravel(), eb[idx].ravel()
+        need = []
+        for p, q in ((A, B), (B, A)):
+            r = row[p]
+            sel = r >= 0
+            r, q = r[sel], q[sel]
+            on_coarse_edge = (q == hang[r, 1]) | (q == hang[r, 2])
+            need.append(coarse_owner[r[on_coarse_edge]])
+        need = np.concatenate(need)
+        if mask[need].all():
+            break
+        mask[need] = True
+
+    # Edge midpoints: reuse hanging nodes, create the rest
+    split = np.flatnonzero(mask)
+    corners = elems[split]
+    keys = _edge_keys(corners, np.roll(corners, -1, axis=1), n)
+    uk, inv = np.unique(keys.ravel(), return_inverse=True)
+    if hang.shape[0]:
+        hang_sort = np.argsort(hang_keys)
+        hpos = np.searchsorted(hang_keys[hang_sort], uk)
+        hpos = np.minimum(hpos, hang.shape[0] - 1)
+        reuse = hang_keys[hang_sort][hpos] == uk
+        reused_rows = hang_sort[hpos[reuse]]
+    else:
+        reuse = np.zeros(uk.size, dtype=bool)
+        reused_rows = np.zeros(0, dtype=np.int64)
+    mid = np.empty(uk.size, dtype=np.int64)
+    mid[reuse] = hang[reused_rows, 0]
+    n_mid = int((~reuse).sum())
+    mid[~reuse] = n + np.arange(n_mid)
+    lo, hi = np.divmod(uk[~reuse], n)
+    center = n + n_mid + np.arange(split.size)
+
+    nodes = np.concatenate([mesh.nodes,
+                            0.5 * (mesh.nodes[lo] + mesh.nodes[hi]),
+                            mesh.nodes[corners].mean(axis=1)])
+
+    # Children, counter-clockwise like their parent
+    m = mid[inv].reshape(-1, 4)                       # m[:, k] on edge k -> k+1
+    c = corners
+    children = np.stack([
+        np.column_stack([c[:, 0], m[:, 0], center, m[:, 3]]),
+        np.column_stack([m[:, 0], c[:, 1], m[:, 1], center]),
+        np.column_stack([center, m[:, 1], c[:, 2], m[:, 2]]),
+        np.column_stack([m[:, 3], center, m[:, 2], c[:, 3]]),
+    ], axis=1).reshape(-1, 4)
+
+    # New midpoints hang when their whole edge is still an element edge
+    new_elems = np.concatenate([elems[~mask], children])
+    n_new = nodes.shape[0]
+    live = np.unique(_edge_keys(new_elems, np.roll(new_elems, -1, axis=1), n_new))
+    hangs = np.isin(_edge_keys(lo, hi, n_new), live, assume_unique=True)
+    keep_rows = np.ones(hang.shape[0], dtype=bool)
+    keep_rows[reused_rows] = False
+    hanging = np.concatenate([hang[keep_rows],
+                              np.column_stack([mid[~reuse], lo, hi])[hangs]])
+
+    refined = Mesh(nodes, new_elems, mesh.elem_type, hanging)
+
+    # Prolongation: identity on old nodes, averages on new ones
+    rows = np.concatenate([np.arange(n), np.repeat(n + np.arange(n_mid), 2),
+                           np.repeat(center, 4)])
+    cols = np.concatenate([np.arange(n), np.column_stack([lo, hi]).ravel(),
+                           corners.ravel()])
+    vals = np.concatenate([np.ones(n), np.full(2 * n_mid, 0.5),
+                           np.full(4 * split.size, 0.25)])
+    prolongation = sp.csr_matrix((vals, (rows, cols)), shape=(n_new, n))
+    return refined, split, prolongation
+
+
+def hanging_constraints(mesh, stride):
+    """
+    Map from the unconstrained DOFs to all DOFs, u = T q, with every hanging
+    node following the midpoint of its edge (chains of hanging nodes are
+    resolved down to unconstrained nodes).
+
+    Args:
+        mesh: Mesh with a hanging table.
+        stride (int): DOFs per node.
+
+    Returns:
+        T (scipy.sparse.csr_matrix): (n_nodes * stride, n_masters * stride).
+        masters (np.ndarray): DOF indices that are the columns of T, i.e.
+            q = u[masters].
+    """
+    n, hang = mesh.n_nodes, mesh.hanging
+    is_hanging = np.zeros(n, dtype=bool)
+    is_hanging[hang[:, 0]] = True
+    rows = np.concatenate([np.flatnonzero(~is_hanging), np.repeat(hang[:, 0], 2)])
+    cols = np.concatenate([np.flatnonzero(~is_hanging), hang[:, 1:].ravel()])
+    vals = np.concatenate([np.ones(n - hang.shape[0]), np.full(2 * hang.shape[0], 0.5)])
+    P = sp.csr_matrix((vals, (rows, cols)), shape=(n, n))
+
+    # Substitute until no hanging node feeds another one
+    T = P
+    for _ in range(hang.shape[0]):
+        if not T[:, is_hanging].count_nonzero():
+            break
+        T = (T @ P).tocsr()
+    masters_nodes = np.flatnonzero(~is_hanging)
+    T = sp.kron(T[:, masters_nodes], sp.identity(stride), format='csr')
+    masters = (masters_nodes[:, None] * stride + np.arange(stride)).ravel()
+    return T, masters
+
+
+def merge_nodes(nodes, tol):
+    """
+    Group nodes closer than tol. Groups are the connected components of the
+    "within tol" pairs found with a k-d tree, so a chain of close nodes
+    merges even if its ends are farther apart than tol.
+
+    Args:
+        nodes: (n_nodes, dim) coordinates.
+        tol (float): merge distance.
+
+    Returns:
+        (n_nodes,) int array: the lowest node id of each node's group.
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    n = nodes.shape[0]
+    pairs = cKDTree(nodes).query_pairs(tol, output_type='ndarray')
+    if pairs.size == 0:
+        return np.arange(n)
+    graph = sp.coo_matrix((np.ones(pairs.shape[0]), (pairs[:, 0], pairs[:, 1])),
+                          shape=(n, n))
+    n_groups, label = csgraph.connected_components(graph, directed=False)
+    first = np.full(n_groups, n)
+    np.minimum.at(first, label, np.arange(n))
+    return first[label]
+
+
+def clean_mesh(mesh, tol=None, drop_unused=True):
+    """
+    Merge coincident nodes and drop the elements that become degenerate
+    (a node repeated, e.g. zero-length bars) or duplicate (the same node
+    set as an earlier element of the block, in any order).
+
+    Args:
+        mesh: Mesh or MixedMesh.
+        tol (float): merge distance; defaults to 1e-9 of the bounding-box
+                     diagonal.
+        drop_unused (bool): also remove nodes no element uses.
+
+    Returns:
+        cleaned mesh (same class), and a report dict with
+            'node_map' (n_nodes,): new id of every old node (-1 if removed),
+            'merged' (int): nodes merged into another node,
+            'unused' (int): unused nodes removed,
+            'degenerate', 'duplicate' (dict): elements dropped per block,
+            'kept' (dict): old indices of the surviving elements per block.
+    """
+    nodes = mesh.nodes
+    n = nodes.shape[0]
+    if tol is None:
+        tol = 1e-9 * float(np.linalg.norm(np.ptp(nodes, axis=0))) if n else 0.0
+    target = merge_nodes(nodes, tol) if tol > 0.0 else np.arange(n)
+
+    blocks, report = {}, {'degenerate': {}, 'duplicate': {}, 'kept': {}}
+    for elem_type, elems in mesh.blocks.items():
+        elems = target[elems]
+        rows = np.sort(elems, axis=1)
+        valid = np.flatnonzero(~np.any(rows[:, 1:] == rows[:, :-1], axis=1))
+        _, first = np.unique(rows[valid], axis=0, return_index=True)
+        kept = valid[np.sort(first)]
+        blocks[elem_type] = elems[kept]
+        report['degenerate'][elem_type] = elems.shape[0] - valid.size
+        report['duplicate'][elem_type] = valid.size - kept.size
+        report['kept'][elem_type] = kept
+
+    # Renumber the surviving nodes in their original order
+    if drop_unused:
+        used = np.unique(np.concatenate([np.empty(0, dtype=np.int64)]
+                                        + [e.ravel() for e in blocks.values()]))
+    else:
+        used = np.unique(target)
+    new_id = np.full(n, -1, dtype=np.int64)
+    new_id[used] = np.arange(used.size)
+    node_map = new_id[target]
+    blocks = {t: new_id[e] for t, e in blocks.items()}
+    report.update(node_map=node_map, merged=n - np.unique(target).size,
+                  unused=np.unique(target).size - used.size)
+
+    if isinstance(mesh, MixedMesh):
+        return MixedMesh(nodes[used], blocks), report
+    hanging = node_map[mesh.hanging]
+    hanging = hanging[np.all(hanging >= 0, axis=1)]
+    return Mesh(nodes[used], blocks[mesh.elem_type], mesh.elem_type, hanging), report
+
+
+def _hilbert_transpose(X, bits):
+    """
+    Hilbert index of integer coordinates in Skilling's transposed form,
+    computed for all points at once (in place).
+
+    Args:
+        X: (n, dim) int64 coordinates in [0, 2^bits).
+        bits (int): bits per axis.
+    """
+    dim = X.shape[1]
+    Q = 1 << (bits - 1)
+    while Q > 1:                            # undo excess work
+        P = Q - 1
+        for i in range(dim):
+            hit = (X[:, i] & Q) != 0
+            t = np.where(hit, 0, (X[:, 0] ^ X[:, i]) & P)
+            X[:, 0] ^= np.where(hit, P, t)
+            X[:, i] ^= t
+        Q >>= 1
+    for i in range(1, dim):                 # Gray encode
+        X[:, i] ^= X[:, i - 1]
+    t = np.zeros(X.shape[0], dtype=X.dtype)
+    Q = 1 << (bits - 1)
+    while Q > 1:
+        t ^= np.where(X[:, dim - 1] & Q, Q - 1, 0)
+        Q >>= 1
+    X ^= t[:, None]
+    return X
+
+
+def curve_codes(points, curve='hilbert', bits=10):
+    """
+    Position of every point along a space-filling curve through its
+    bounding box, in any dimension.
+
+    Args:
+        points: (n, dim) coordinates.
+        curve (str): 'hilbert' (no jumps between consecutive cells) or
+                     'morton' (Z-order; cheaper, with jumps).
+        bits (int): grid resolution per axis (dim * bits <= 63).
+
+    Returns:
+        (n,) uint64 codes.
+    """
+    points = np.asarray(points, dtype=float)
+    n, dim = points.shape
+    if dim * bits > 63:
+        raise ValueError(f"{bits} bits per axis do not fit in 63 bits for dim={dim}")
+    lo = points.min(axis=0) if n else np.zeros(dim)
+    span = (points.max(axis=0) - lo) if n else np.ones(dim)
+    span[span == 0.0] = 1.0
+    X = ((points - lo) / span * ((1 << bits) - 1)).astype(np.int64)
+    if curve == 'hilbert':
+        X = _hilbert_transpose(X, bits)
+    elif curve != 'morton':
+        raise ValueError(f"Unknown curve '{curve}'")
+
+    # Interleave bits, most significant level first, axis 0 leading
+    X = X.astype(np.uint64)
+    code = np.zeros(n, dtype=np.uint64)
+    one = np.uint64(1)
+    for j in range(bits - 1, -1, -1):
+        for i in range(dim):
+            code = (code << one) | ((X[:, i] >> np.uint64(j)) & one)
+    return code
+
+
+def locality_order(nodes, blocks, curve='hilbert', bits=10):
+    """
+    Node order along a space-filling curve, and per-block element orders
+    that follow it (sorted by lowest, then highest, new node id).
+
+    Args:
+        nodes: (n_nodes, dim) coordinates.
+        blocks: dict elem_type -> connectivity.
+        curve, bits: see curve_codes.
+
+    Returns:
+        node_order (np.ndarray): old id of each new node.
+        elem_order (dict): elem_type -> old index of each new element.
+        rank (np.ndarray): new id of each old node (inverse of node_order).
+    """
+    node_order = np.argsort(curve_codes(nodes, curve, bits), kind='stable')
+    rank = np.empty_like(node_order)
+    rank[node_order] = np.arange(node_order.size)
+    elem_order = {}
+    for elem_type, elems in blocks.items():
+        renum = rank[np.asarray(elems)]
+        elem_order[elem_type] = (np.lexsort((renum.max(axis=1), renum.min(axis=1)))
+                                 if renum.size else np.arange(renum.shape[0]))
+    return node_order, elem_order, rank
+
+
+def reorder_mesh(mesh, curve='hilbert', bits=10):
+    """
+    Renumber nodes along a space-filling curve and put elements in the same
+    order, so that gathers in assembly, recovery and matrix-free products
+    touch nearby memory. Use restore_order to map results back.
+
+    Args:
+        mesh: Mesh or MixedMesh.
+        curve, bits: see curve_codes.
+
+    Returns:
+        reordered mesh (same class), and a dict with
+            'node_order' (n_nodes,): old id of each new node,
+            'elem_order' (dict): per block, old index of each new element.
+    """
+    node_order, elem_order, rank = locality_order(mesh.nodes, mesh.blocks, curve, bits)
+    nodes = mesh.nodes[node_order]
+    blocks = {t: rank[e[elem_order[t]]] for t, e in mesh.blocks.items()}
+    perm = {'node_order': node_order, 'elem_order': elem_order}
+    if isinstance(mesh, MixedMesh):
+        return MixedMesh(nodes, blocks), perm
+    return Mesh(nodes, blocks[mesh.elem_type], mesh.elem_type, rank[mesh.hanging]), perm
+
+
+def restore_order(values, order, stride=None):
+    """
+    Map per-node or per-element results of a reordered mesh back to the
+    original numbering.
+
+    Args:
+        values: (n, ...) array in the new order, or a flat DOF vector with
+                `stride` entries per node.
+        order: node_order or one block's elem_order from reorder_mesh.
+        stride (int): DOFs per node of a flat DOF vector.
+
+    Returns:
+        array of the same shape in the original order.
+    """
+    values = np.asarray(values)
+    rows = values.reshape(len(order), -1) if stride is not None else values
+    out = np.empty_like(rows)
+    out[order] = rows
+    return out.reshape(values.shape)
+
+
+def rect_grid(nx, ny, lx=1.0, ly=1.0, origin=(0.0, 0.0)):
+    """
+    Structured grid of 4-node quadrilaterals over a rectangle.
+
+    Args:
+        nx, ny (int): number of elements along x and y.
+        lx, ly (float): rectangle size.
+        origin: lower-left corner.
+
+    Returns:
+        Mesh with elem_type 'quad4'; element nodes counter-clockwise.
+    """
+    x = origin[0] + np.linspace(0.0, lx, nx + 1)
+    y = origin[1] + np.linspace(0.0, ly, ny + 1)
+    X, Y = np.meshgrid(x, y)                       # node id = j * (nx + 1) + i
+    nodes = np.column_stack([X.ravel(), Y.ravel()])
+
+    ids = np.arange((nx + 1) * (ny + 1)).reshape(ny + 1, nx + 1)
+    elems = np.stack([ids[:-1, :-1], ids[:-1, 1:], ids[1:, 1:], ids[1:, :-1]],
+                     axis=-1).reshape(-1, 4)
+    return Mesh(nodes, elems, 'quad4')
+
+
+def lattice_truss(nx, ny, nz, spacing=1.0, diagonals=True):
+    """
+    3D space-truss lattice on a box of nx * ny * nz cells.
+
+    Bars run along every grid line; with diagonals, every cell face also gets
+    one diagonal (in a consistent direction per plane) to brace it.
+
+    Args:
+        nx, ny, nz (int): number of cells along x, y, z.
+        spacing (float or 3-sequence): cell size.
+        diagonals (bool): add face diagonals.
+
+    Returns:
+        Mesh with elem_type 'bar'.
+    """
+    h = np.broadcast_to(np.asarray(spacing, dtype=float), (3,))
+    ix, iy, iz = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1), np.arange(nz + 1),
+                             indexing='ij')
+    nodes = np.column_stack([ix.ravel(), iy.ravel(), iz.ravel()]) * h
+    ids = np.arange(nodes.shape[0]).reshape(nx + 1, ny + 1, nz + 1)
+
+    def bars(a, b):
+        return np.column_stack([a.ravel(), b.ravel()])
+
+    parts = [
+        bars(ids[:-1, :, :], ids[1:, :, :]),      # x
+        bars(ids[:, :-1, :], ids[:, 1:, :]),      # y
+        bars(ids[:, :, :-1], ids[:, :, 1:]),      # z
+    ]
+    if diagonals:
+        parts += [
+            bars(ids[:-1, :-1, :], ids[1:, 1:, :]),   # xy faces
+            bars(ids[:, :-1, :-1], ids[:, 1:, 1:]),   # yz faces
+            bars(ids[:-1, :, :-1], ids[1:, :, 1:]),   # xz faces
+        ]
+    return Mesh(nodes, np.concatenate(parts), 'bar')
+
+
+def _ring(n_sides, half_width, start):
+    """
+    x/z offsets of a regular polygon's vertices, circumradius half_width *
+    sqrt(2) (half the edge of a square). Offsets are rounded at 1e-14 of
+    half_width so that the square's vertices land exactly on +-half_width.
+    """
+    theta = start + 2.0 * np.pi * np.arange(n_sides) / n_sides
+    unit = np.sqrt(2.0) * np.column_stack([np.cos(theta), np.sin(theta)])
+    return half_width * np.round(unit, 14)
+
+
+def pyramid_truss(base=1.0, height=1.0, n_sides=4):
+    """
+    Pyramid truss: a regular polygon base ring in the x-z plane plus an apex.
+
+    For n_sides=4 the base is the axis-aligned square [0, base]^2 and the
+    apex sits above its center.
+
+    Args:
+        base (float): edge length of the square base (n_sides=4), or base
+            circumradius * sqrt(2) in general.
+        height (float): apex height (y).
+        n_sides (int): number of base vertices.
+
+    Returns:
+        Mesh with elem_type 'bar': n_sides base edges followed by n_sides sides.
+    """
+    center = 0.5 * base
+    xz = center + _ring(n_sides, 0.5 * base, -0.75 * np.pi)
+    nodes = np.zeros((n_sides + 1, 3))
+    nodes[:n_sides, 0] = xz[:, 0]
+    nodes[:n_sides, 2] = xz[:, 1]
+    nodes[n_sides] = (center, height, center)
+
+    k = np.arange(n_sides)
+    base_edges = np.column_stack([k, (k + 1) % n_sides])
+    sides = np.column_stack([k, np.full(n_sides, n_sides)])
+    return Mesh(nodes, np.concatenate([base_edges, sides]), 'bar')
+
+
+def tower_truss(n_levels, width=1.0, level_height=1.0, taper=0.0, n_sides=4,
+                bracing='x'):
+    """
+    Lattice tower: stacked regular polygon rings along y joined by legs and
+    face bracing.
+
+    Args:
+        n_levels (int): number of stories (rings = n_levels + 1).
+        width (float): base ring edge length for n_sides=4 (circumradius *
+            sqrt(2) in general).
+        level_height (float): story height.
+        taper (float): fractional width reduction from base to top, in [0, 1).
+        n_sides (int): number of legs.
+        bracing: 'x' for two crossing diagonals per face, 'single' for one,
+            None for no bracing.
+
+    Returns:
+        Mesh with elem_type 'bar'.
+    """
+    if n_levels < 1 or n_sides < 3:
+        raise ValueError(f"A tower needs at least 1 level and 3 sides, "
+                         f"got n_levels={n_levels}, n_sides={n_sides}")
+    levels = np.arange(n_levels + 1)
+    scale = 1.0 - taper * levels / n_levels
+    ring = _ring(n_sides, 0.5 * width, -0.75 * np.pi)            # (n_sides, 2)
+    xz = scale[:, None, None] * ring[None]                       # (levels, sides, 2)
+    nodes = np.empty((n_levels + 1, n_sides, 3))
+    nodes[..., 0] = xz[..., 0]
+    nodes[..., 1] = (levels * level_height)[:, None]
+    nodes[..., 2] = xz[..., 1]
+    nodes = nodes.reshape(-1, 3)
+
+    ids = np.arange(nodes.shape[0]).reshape(n_levels + 1, n_sides)
+    nxt = np.roll(ids, -1, axis=1)                               # next leg, same ring
+
+    def bars(a, b):
+        return np.column_stack([a.ravel(), b.ravel()])
+
+    parts = [
+        bars(ids, nxt),                     # ring members
+        bars(ids[:-1], ids[1:]),            # legs
+    ]
+    if bracing in ('x', 'single'):
+        parts.append(bars(ids[:-1], nxt[1:]))
+    if bracing == 'x':
+        parts.append(bars(nxt[:-1], ids[1:]))
+    elif bracing not in (None, 'single'):
+        raise ValueError(f"Unknown bracing '{bracing}'")
+    return Mesh(nodes, np.concatenate(parts), 'bar')
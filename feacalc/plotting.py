@@ -0,0 +1,211 @@
+"""
+plotting.py
+
+Headless 2D plots of feacalc meshes and results for reports. Every element
+block is drawn as one matplotlib collection (a LineCollection for bars and
+frames, a PolyCollection for area elements), optionally coloured by a field
+and overlaid on the undeformed shape. Geometry finer than the output pixel
+grid is thinned before it reaches matplotlib. Figures are rendered with the
+Agg canvas and never touch pyplot, so no display is needed.
+
+matplotlib is imported on first use only.
+"""
+import os
+
+import numpy as np
+
+
+def _mpl():
+    """The matplotlib pieces used here (imported lazily)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection, PolyCollection
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvasAgg, LineCollection, PolyCollection
+
+
+def _displacements(u, n_nodes, dim):
+    """Nodal translations (n_nodes, dim) from a DOF vector or a nodal array."""
+    u = np.asarray(u, dtype=float)
+    if u.ndim == 1:
+        u = u.reshape(n_nodes, -1)
+    return u[:, :dim]
+
+
+def _element_values(field, blocks, n_nodes):
+    """
+    Split a field into per-element values for each block. Nodal fields are
+    averaged over each element's nodes.
+    """
+    field = np.asarray(field, dtype=float)
+    n_elems = sum(e.shape[0] for e in blocks.values())
+    if field.shape[0] == n_nodes and field.shape[0] != n_elems:
+        return [field[elems].mean(axis=1) for elems in blocks.values()]
+    if field.shape[0] != n_elems:
+        raise ValueError(f"field has {field.shape[0]} values; expected "
+                         f"{n_nodes} (nodes) or {n_elems} (elements)")
+    starts = np.cumsum([0] + [e.shape[0] for e in blocks.values()])
+    return [field[a:b] for a, b in zip(starts[:-1], starts[1:])]
+
+
+def thin_to_pixels(lo, hi, pixel, values=None):
+    """
+    Indices of the primitives worth drawing at a given pixel size.
+
+    Primitives are given by two points: a segment's ends or a polygon's
+    bounding-box corners. Both points are snapped to the pixel grid, and
+    primitives that snap to the same pair of cells would cover the same
+    pixels. Only one of each such group is kept, the one with the largest
+    |value|, so peaks survive. This collapses sub-pixel detail and
+    coincident lines, e.g. a 3D lattice seen along an axis.
+
+    Args:
+        lo, hi: (n, 2) point pairs.
+        pixel (float): pixel size in data units.
+        values: optional (n,) values ranking primitives within a group.
+
+    Returns:
+        Sorted int array of kept indices.
+    """
+    lo = np.asarray(lo, dtype=float)
+    hi = np.asarray(hi, dtype=float)
+    n = lo.shape[0]
+    if n == 0 or not pixel > 0.0:
+        return np.arange(n)
+    origin = np.minimum(lo.min(axis=0), hi.min(axis=0))
+    a = np.floor((lo - origin) / pixel).astype(np.int64)
+    b = np.floor((hi - origin) / pixel).astype(np.int64)
+
+    # One key per pair of cells, independent of orientation
+    swap = (a[:, 0] > b[:, 0]) | ((a[:, 0] == b[:, 0]) & (a[:, 1] > b[:, 1]))
+    a[swap], b[swap] = b[swap], a[swap].copy()
+    cells = np.concatenate([a, b], axis=1)
+    rank = np.zeros(n) if values is None else -np.abs(np.asarray(values, dtype=float))
+    order = np.lexsort((rank,) + tuple(cells.T[::-1]))
+    cells = cells[order]
+    first = np.ones(n, dtype=bool)
+    first[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+    keep = order[first]
+    keep.sort()
+    return keep
+
+
+def plot_mesh(mesh, u=None, field=None, scale=1.0, ax=None, axes=(0, 1),
+              cmap='viridis', clim=None, undeformed=True, decimate=True,
+              linewidth=0.6, edges=None, colorbar=True, label=None,
+              figsize=(8.0, 6.0), dpi=150):
+    """
+    Draw a mesh, optionally deformed and coloured by a field.
+
+    Args:
+        mesh: Mesh or MixedMesh (anything with nodes and blocks).
+        u: optional displacements, a DOF vector with a fixed stride per node or
+           an (n_nodes, k) array; the first dim components per node are used.
+        field: optional scalar per node or per element (elements numbered
+               block by block). Nodal values are averaged per element.
+        scale (float): displacement magnification.
+        ax: matplotlib Axes to draw into; a new Agg-backed figure otherwise.
+        axes (tuple): coordinate components plotted as x and y (3D meshes are
+                      projected onto them).
+        cmap (str): colormap name.
+        clim (tuple): (vmin, vmax); defaults to the field's range.
+        undeformed (bool): draw the undeformed shape in grey under a
+                           deformed plot.
+        decimate (bool): thin geometry below the pixel size (see thin_to_pixels).
+        linewidth (float): line width of line elements and polygon edges.
+        edges (bool): draw polygon outlines; by default only while elements
+                      are a few pixels across.
+        colorbar (bool): add a colorbar when a field is given.
+        label (str): colorbar label.
+        figsize, dpi: size of a new figure.
+
+    Returns:
+        The Axes drawn into (its figure is ax.figure).
+    """
+    Figure, FigureCanvasAgg, LineCollection, PolyCollection = _mpl()
+    if ax is None:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
+
+    nodes = np.asarray(mesh.nodes, dtype=float)
+    blocks = {t: e for t, e in mesh.blocks.items() if e.shape[0]}
+    ref = nodes[:, list(axes)]
+    xy = ref
+    if u is not None:
+        xy = ref + scale * _displacements(u, nodes.shape[0], nodes.shape[1])[:, list(axes)]
+
+    # Axis limits first: they fix the pixel size used for thinning
+    span_lo = np.minimum(ref.min(axis=0), xy.min(axis=0))
+    span_hi = np.maximum(ref.max(axis=0), xy.max(axis=0))
+    pad = 0.02 * max(float((span_hi - span_lo).max()), 1e-12)
+    ax.set_xlim(span_lo[0] - pad, span_hi[0] + pad)
+    ax.set_ylim(span_lo[1] - pad, span_hi[1] + pad)
+    ax.set_aspect('equal')
+    bbox = ax.get_position()
+    fig_w, fig_h = ax.figure.get_size_inches() * ax.figure.dpi
+    pixel = max((span_hi[0] - span_lo[0] + 2 * pad) / (bbox.width * fig_w),
+                (span_hi[1] - span_lo[1] + 2 * pad) / (bbox.height * fig_h))
+    if not decimate:
+        pixel = 0.0
+
+    values = (_element_values(field, blocks, nodes.shape[0]) if field is not None
+              else [None] * len(blocks))
+    if field is not None and clim is None:
+        finite = np.concatenate(values)
+        finite = finite[np.isfinite(finite)]
+        clim = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+
+    mappable = None
+    for elems, vals in zip(blocks.values(), values):
+        # (points, values, role): the undeformed shape is a grey backdrop
+        layers = [(xy, vals, 'main')]
+        if u is not None and undeformed:
+            layers.insert(0, (ref, None, 'backdrop'))
+        for pts, v, role in layers:
+            corners = pts[elems]                                   # (n_e, k, 2)
+            line = '0.2' if role == 'main' else '0.65'
+            # Fixed colours only without a field: explicit colours would stop
+            # the colormap from reaching the lines (edges) or polygons (faces)
+            if elems.shape[1] == 2:
+                keep = thin_to_pixels(corners[:, 0], corners[:, 1], pixel, v)
+                coll = LineCollection(corners[keep], linewidths=linewidth,
+                                      colors=line if v is None else None)
+            else:
+                keep = thin_to_pixels(corners.min(axis=1), corners.max(axis=1), pixel, v)
+                size = np.median((corners.max(axis=1) - corners.min(axis=1)).max(axis=1))
+                outline = edges if edges is not None else size > 4.0 * pixel
+                fill = '0.85' if role == 'main' and u is None else 'none'
+                coll = PolyCollection(corners[keep], edgecolors=line,
+                                      linewidths=linewidth if outline else 0.0,
+                                      **({'facecolors': fill} if v is None else {}))
+            if v is not None:
+                coll.set_array(v[keep])
+                coll.set_cmap(cmap)
+                coll.set_clim(*clim)
+                mappable = coll
+            coll.set_zorder(2 if role == 'main' else 1)
+            # Huge collections go into vector output as one Agg raster
+            coll.set_rasterized(keep.size > 10000)
+            ax.add_collection(coll)
+
+    if mappable is not None and colorbar:
+        ax.figure.colorbar(mappable, ax=ax, label=label)
+    return ax
+
+
+def save_plot(path, mesh, **kwargs):
+    """
+    Render plot_mesh into a new figure and write it to path. The format
+    follows the extension (e.g. .png or .pdf).
+
+    Args:
+        path (str): output file.
+        mesh: mesh to draw.
+        **kwargs: plot_mesh arguments (figsize and dpi set the output size).
+
+    Returns:
+        path
+    """
+    ax = plot_mesh(mesh, **kwargs)
+    ax.figure.savefig(path, dpi=ax.figure.dpi, bbox_inches='tight')
+    return os.fspath(path)
@@ -0,0 +1,84 @@
+"""
+postprocessing.py
+
+Derived results for feacalc: recovered (smoothed) nodal stresses and
+Zienkiewicz-Zhu error estimates, evaluated for all elements at once.
+"""
+import numpy as np
+
+
+def recover_nodal_stress(kernel, stress):
+    """
+    Smoothed nodal stresses: Gauss-point stresses extrapolated to the
+    element corners and averaged over the elements sharing each node.
+
+    Args:
+        kernel: Quad4Kernel the stresses belong to.
+        stress: (n_elems, 4, n_comp) Gauss-point stresses.
+
+    Returns:
+        (n_nodes, n_comp) array; zero for nodes used by no element.
+    """
+    corners = kernel.gauss_to_corners(stress)                  # (n_e, 4, n_comp)
+    ends = kernel.conn.ravel()
+    count = np.bincount(ends, minlength=kernel.n_nodes)
+    flat = corners.reshape(-1, corners.shape[-1])
+    out = np.stack([np.bincount(ends, weights=flat[:, c], minlength=kernel.n_nodes)
+                    for c in range(flat.shape[1])], axis=1)
+    return out / np.maximum(count, 1)[:, None]
+
+
+def zz_error(kernel, u, stride=None):
+    """
+    Zienkiewicz-Zhu error estimate in the energy norm.
+
+    The recovered field sigma* is the bilinear interpolant of the smoothed
+    nodal stresses; the element error is
+    ||e||^2 = int (sigma* - sigma_h)^T D^-1 (sigma* - sigma_h) dV.
+
+    Args:
+        kernel: Quad4Kernel of the analysed mesh.
+        u: global displacement vector.
+        stride (int): DOFs per node of u.
+
+    Returns:
+        dict with
+            'elem_error' (n_elems,): element error energy norms,
+            'energy' (n_elems,): element energy norms of the FE stresses,
+            'nodal_stress' (n_nodes, 3): recovered stresses,
+            'relative' (float): global estimate ||e|| / sqrt(||u||^2 + ||e||^2).
+    """
+    stress = kernel.recover(u, stride)['stress']               # (n_e, 4, 3)
+    nodal = recover_nodal_stress(kernel, stress)
+    diff = kernel.corners_to_gauss(nodal[kernel.conn]) - stress
+    C = np.linalg.inv(kernel.D)                                # compliance, (n_e, 3, 3)
+    w = kernel.t[:, None] * kernel.detJ                        # (n_e, 4)
+    err2 = np.einsum('eg,egi,eij,egj->e', w, diff, C, diff)
+    energy2 = np.einsum('eg,egi,eij,egj->e', w, stress, C, stress)
+    total_err2 = err2.sum()
+    denom = energy2.sum() + total_err2
+    return {
+        'elem_error':   np.sqrt(err2),
+        'energy':       np.sqrt(energy2),
+        'nodal_stress': nodal,
+        'relative':     float(np.sqrt(total_err2 / denom)) if denom > 0.0 else 0.0,
+    }
+
+
+def mark_elements(elem_error, fraction=0.5):
+    """
+    Bulk (Doerfler) marking: the fewest elements whose squared errors sum
+    to at least `fraction` of the total.
+
+    Args:
+        elem_error: (n_elems,) element error norms.
+        fraction (float): share of the total squared error to capture.
+
+    Returns:
+        Sorted indices of the marked elements.
+    """
+    e2 = np.asarray(elem_error, dtype=float) ** 2
+    order = np.argsort(e2)[::-1]
+    cum = np.cumsum(e2[order])
+    n = int(np.searchsorted(cum, fraction * cum[-1])) + 1 if cum.size else 0
+    return np.sort(order[:n])
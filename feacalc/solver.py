@@ -0,0 +1,761 @@
+"""
+solver.py
+
+Linear solver layer for feacalc: factor a system matrix once and reuse the
+factorization for any number of right-hand sides, optionally in single
+precision with float64 iterative refinement, and optionally backed by a
+content-addressed on-disk cache of factorizations and solutions. Long
+time integrations write restart checkpoints through a Checkpointer, which
+saves on a background thread.
+
+Precision boundary: solutions, right-hand sides and residuals are always
+float64. A PrecisionPolicy only decides the dtype matrices are stored in
+(core.assemble_stiffness) and factored in. Rendering buffers (MeshData) are
+a separate float32 copy and never feed back into a solve.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.linalg as sla
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+
+class PrecisionPolicy:
+    """
+    Floating-point types used for one model's linear algebra.
+
+    Attributes:
+        storage: dtype of assembled matrices.
+        factor: dtype the factorization is computed and applied in. When it
+            is narrower than float64, solves are refined on float64 residuals.
+    """
+    def __init__(self, storage=np.float64, factor=np.float64):
+        self.storage = np.dtype(storage)
+        self.factor = np.dtype(factor)
+
+    @property
+    def refined(self):
+        return self.factor != np.float64
+
+    def __repr__(self):
+        return f"PrecisionPolicy(storage={self.storage.name}, factor={self.factor.name})"
+
+
+DOUBLE = PrecisionPolicy(np.float64, np.float64)
+# float64 matrix, float32 factors: float64 accuracy, half the factor memory
+MIXED = PrecisionPolicy(np.float64, np.float32)
+# float32 matrix and factors: accurate to the float32-rounded matrix entries
+SINGLE = PrecisionPolicy(np.float32, np.float32)
+
+
+class Factorization:
+    """
+    LU factorization of a square sparse or dense matrix.
+
+    Attributes:
+        shape (tuple): shape of the factored matrix.
+        dtype (np.dtype): precision of the factors.
+    """
+    def __init__(self, A, dtype=np.float64):
+        """
+        Args:
+            A: square scipy sparse matrix or dense 2D array.
+            dtype: precision to factor in (float32 or float64). A float32
+                   matrix is still factored in float64 unless asked
+                   otherwise; single precision is chosen explicitly, e.g.
+                   through a PrecisionPolicy (see factorize).
+        """
+        self.shape = A.shape
+        if A.shape[0] != A.shape[1]:
+            raise ValueError(f"Expected a square matrix, got {A.shape}")
+        self.dtype = np.dtype(dtype)
+        if sp.issparse(A):
+            self._lu = spla.splu(sp.csc_matrix(A, dtype=self.dtype))
+            self._dense = False
+        else:
+            self._lu = sla.lu_factor(np.asarray(A, dtype=self.dtype))
+            self._dense = True
+
+    def solve(self, b, out=None):
+        """
+        Solve A x = b.
+
+        Args:
+            b (np.ndarray): right-hand side, shape (n,) or (n, k).
+            out (np.ndarray): optional array to receive x.
+
+        Returns:
+            x (np.ndarray), in the factor's precision unless out is given
+        """
+        b = np.asarray(b, dtype=self.dtype)
+        x = sla.lu_solve(self._lu, b) if self._dense else self._lu.solve(b)
+        if out is None:
+            return x
+        out[...] = x
+        return out
+
+    def to_arrays(self):
+        """
+        Factors as plain arrays for persistence, or None when the backend
+        cannot export them (SuperLU objects cannot be rebuilt from arrays).
+        """
+        if not self._dense:
+            return None
+        lu, piv = self._lu
+        return {'lu': lu, 'piv': piv}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a Factorization from to_arrays() output."""
+        self = cls.__new__(cls)
+        self._lu = (arrays['lu'], arrays['piv'])
+        self._dense = True
+        self.shape = arrays['lu'].shape
+        self.dtype = arrays['lu'].dtype
+        return self
+
+
+class RefinedSolver:
+    """
+    Solves A x = b with a low-precision factorization and float64 iterative
+    refinement: x += solve32(b - A x), with the residual formed in float64
+    from A's stored values. Converges to float64 accuracy for A with
+    condition number well below 1 / eps(float32); if refinement stalls it
+    falls back to a float64 factorization of A.
+
+    Convergence is measured by the normwise backward error
+    ||b - A x|| / (||A|| ||x|| + ||b||) in the infinity norm.
+
+    Attributes:
+        iterations (int): refinement steps taken by the last solve.
+        residual (float): backward error of the last solve.
+    """
+    def __init__(self, A, dtype=np.float32, tol=1e-14, max_iter=20, fallback=True):
+        """
+        Args:
+            A: square scipy sparse matrix or dense 2D array (float32 or float64).
+            dtype: factorization precision.
+            tol (float): target backward error.
+            max_iter (int): refinement steps before giving up.
+            fallback (bool): on stagnation, refactor in float64 instead of
+                             raising.
+        """
+        self.A = A.tocsr() if sp.issparse(A) else np.asarray(A)
+        self.shape = A.shape
+        self.tol = tol
+        self.max_iter = max_iter
+        self.fallback = fallback
+        self._fact = Factorization(self.A, dtype=dtype)
+        self._norm = float(abs(self.A).sum(axis=1).max())
+        self.iterations = 0
+        self.residual = np.inf
+
+    def _residual(self, b, x, out):
+        """out = b - A x in float64 (A's stored values, float64 accumulation)."""
+        np.subtract(b, self.A @ x, out=out)
+        return out
+
+    def _backward_error(self, b, x, r):
+        denom = self._norm * np.abs(x).max() + np.abs(b).max()
+        return float(np.abs(r).max() / denom) if denom > 0.0 else 0.0
+
+    def solve(self, b, out=None):
+        """
+        Solve A x = b to the refinement tolerance.
+
+        Args:
+            b (np.ndarray): right-hand side, shape (n,) or (n, k).
+            out (np.ndarray): optional float64 array to receive x.
+
+        Returns:
+            x (np.ndarray), float64
+        """
+        b = np.asarray(b, dtype=np.float64)
+        x = out if out is not None else np.empty_like(b)
+        x[...] = self._fact.solve(b)
+        r = np.empty_like(b)
+        best = np.inf
+
+        for it in range(self.max_iter + 1):
+            self._residual(b, x, r)
+            self.residual = self._backward_error(b, x, r)
+            self.iterations = it
+            if self.residual <= self.tol:
+                return x
+            if self.residual > 0.5 * best:          # stalled or diverging
+                break
+            best = self.residual
+            x += self._fact.solve(r)
+
+        if not self.fallback:
+            raise RuntimeError(f"Iterative refinement stalled at relative residual "
+                               f"{self.residual:.3g}")
+        # Condition number too large for the low-precision factors
+        if self._fact.dtype != np.float64:
+            self._fact = Factorization(self.A, dtype=np.float64)
+        x[...] = self._fact.solve(b)
+        self.residual = self._backward_error(b, x, self._residual(b, x, r))
+        return x
+
+    def to_arrays(self):
+        """None: refinement needs A, so the solver is not persisted on its own."""
+        return None
+
+
+def factorize(A, policy=None):
+    """
+    Factor A once for repeated solves.
+
+    Args:
+        A: square scipy sparse matrix or dense 2D array.
+        policy (PrecisionPolicy): with a narrower-than-float64 factor type,
+            return a RefinedSolver; otherwise (default) a float64
+            Factorization.
+
+    Returns:
+        Factorization or RefinedSolver (both provide solve(b, out=None)).
+    """
+    if policy is not None and policy.refined:
+        return RefinedSolver(A, dtype=policy.factor)
+    return Factorization(A, dtype=np.float64 if policy is None else policy.factor)
+
+
+def content_hash(*parts):
+    """
+    Stable SHA-256 digest of model data.
+
+    Args:
+        parts: any nesting of numpy arrays, scipy sparse matrices, dicts,
+               lists/tuples, strings, numbers and None.
+
+    Returns:
+        str: hex digest; equal inputs give equal digests across runs.
+    """
+    h = hashlib.sha256()
+
+    def feed(x):
+        if sp.issparse(x):
+            x = sp.csr_matrix(x)
+            x.sum_duplicates()
+            h.update(b'csr')
+            for a in (np.asarray(x.shape), x.indptr, x.indices, x.data):
+                feed(a)
+        elif isinstance(x, np.ndarray):
+            x = np.ascontiguousarray(x)
+            h.update(f'nd{x.dtype.str}{x.shape}'.encode())
+            h.update(x.view(np.uint8).reshape(-1) if x.size else b'')
+        elif isinstance(x, dict):
+            h.update(b'dict%d' % len(x))
+            for k in sorted(x, key=repr):
+                feed(repr(k))
+                feed(x[k])
+        elif isinstance(x, (list, tuple)):
+            h.update(b'seq%d' % len(x))
+            for item in x:
+                feed(item)
+        elif isinstance(x, (np.generic, int, float, bool)) or x is None:
+            h.update(repr(np.asarray(x).item() if x is not None else None).encode())
+        else:
+            h.update(f'{type(x).__name__}:{x}'.encode())
+
+    for part in parts:
+        feed(part)
+    return h.hexdigest()
+
+
+def _policy_key(policy):
+    """Storage and factor types of a policy (None meaning DOUBLE), for cache keys."""
+    policy = policy or DOUBLE
+    return ('policy', policy.storage.str, policy.factor.str)
+
+
+def model_key(nodes, blocks, props, fixed_dofs=None, policy=None):
+    """
+    Cache key of a linear model: topology, coordinates, element properties,
+    the BC partition (which DOFs are fixed) and the precision policy.
+
+    Args:
+        nodes: (n_nodes, dim) coordinates.
+        blocks: mapping elem_type -> connectivity (Mesh/MixedMesh.blocks).
+        props: per-type kernel properties, as passed to core.build_kernels.
+        fixed_dofs: constrained DOF indices.
+        policy (PrecisionPolicy): storage and factor types (default DOUBLE).
+    """
+    fixed = None if fixed_dofs is None else np.unique(np.asarray(fixed_dofs, dtype=np.int64))
+    return content_hash('model', np.asarray(nodes, dtype=float),
+                        {t: np.asarray(e, dtype=np.int64) for t, e in blocks.items()},
+                        props, fixed, _policy_key(policy))
+
+
+class SolverCache:
+    """
+    Content-addressed cache of factorizations and solutions in a local
+    directory, bounded to max_bytes with least-recently-used eviction.
+
+    Entries are single files named after their key; a hit refreshes the
+    file's modification time, which is the LRU order.
+    """
+    def __init__(self, path, max_bytes=2 << 30):
+        """
+        Args:
+            path (str): cache directory (created if missing).
+            max_bytes (int): total size cap of the directory's entries.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self, name):
+        """Load an entry and mark it as recently used, or None if absent."""
+        path = self._file(name)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {k: data[k] for k in data.files}
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def _store(self, name, arrays):
+        """Write an entry atomically, then evict down to the size cap."""
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._file(name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until under max_bytes."""
+        entries = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith('.npz') and entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def get_factorization(self, key):
+        """Cached Factorization for key, or None."""
+        arrays = self._load(f'{key}.fact.npz')
+        return None if arrays is None else Factorization.from_arrays(arrays)
+
+    def put_factorization(self, key, fact):
+        """Persist fact under key if its backend supports it; returns True if stored."""
+        arrays = fact.to_arrays()
+        if arrays is None:
+            return False
+        self._store(f'{key}.fact.npz', arrays)
+        return True
+
+    def get_solution(self, key, b):
+        """Cached solution of the model key for right-hand side b, or None."""
+        arrays = self._load(f'{key}.{content_hash(b)}.sol.npz')
+        return None if arrays is None else arrays['x']
+
+    def put_solution(self, key, b, x):
+        """Store the solution x of the model key for right-hand side b."""
+        self._store(f'{key}.{content_hash(b)}.sol.npz', {'x': np.asarray(x)})
+
+    def clear(self):
+        """Remove every entry."""
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith('.npz'):
+                    os.remove(entry.path)
+
+
+class CachedSolver:
+    """
+    Solves A x = b through a SolverCache: cached solutions are returned
+    without touching A, and the matrix is only built and factored (or its
+    factorization loaded) on the first miss.
+
+    Entries are keyed on the model and the precision policy together, so
+    solutions and factors made in one precision are never served to a
+    solver asking for another.
+    """
+    def __init__(self, A, cache, key=None, policy=None):
+        """
+        Args:
+            A: square matrix, or a zero-argument callable returning it, so
+               assembly can be skipped entirely when every solve hits.
+            cache (SolverCache): backing store.
+            key (str): model key (see model_key); defaults to a hash of A
+                       (values and dtype), which requires A itself.
+            policy (PrecisionPolicy): factor type (default DOUBLE, see
+                       factorize).
+        """
+        self._A = A
+        self.cache = cache
+        self.policy = policy
+        if key is None:
+            key = content_hash(self.matrix)
+        self.key = content_hash('solver', key, _policy_key(policy))
+        self._fact = None
+
+    @property
+    def matrix(self):
+        """The system matrix, built on first access if A was a callable."""
+        if callable(self._A):
+            self._A = self._A()
+        return self._A
+
+    @property
+    def factorization(self):
+        """Factorization loaded from the cache or computed (and stored) once."""
+        if self._fact is None:
+            self._fact = self.cache.get_factorization(self.key)
+            if self._fact is None:
+                self._fact = factorize(self.matrix, self.policy)
+                self.cache.put_factorization(self.key, self._fact)
+        return self._fact
+
+    def solve(self, b, out=None):
+        """
+        Solve A x = b, reusing a cached solution for an identical b.
+
+        Args:
+            b (np.ndarray): right-hand side, shape (n,) or (n, k).
+            out (np.ndarray): optional array to receive x.
+
+        Returns:
+            x (np.ndarray)
+        """
+        b = np.asarray(b)
+        x = self.cache.get_solution(self.key, b)
+        if x is None:
+            x = self.factorization.solve(b)
+            self.cache.put_solution(self.key, b, x)
+        if out is None:
+            return x
+        out[...] = x
+        return out
+
+
+def sparsity_key(*mats):
+    """
+    Digest of the shapes and sparsity patterns of matrices (values ignored),
+    used to check that a checkpoint belongs to the same discretization.
+    """
+    parts = []
+    for A in mats:
+        if A is None:
+            parts.append(None)
+        elif sp.issparse(A):
+            A = sp.csr_matrix(A)
+            A.sum_duplicates()
+            parts.append(('csr', np.asarray(A.shape), A.indptr, A.indices))
+        else:
+            parts.append(('dense', np.asarray(np.shape(A))))
+    return content_hash('pattern', parts)
+
+
+class Checkpointer:
+    """
+    Periodic restart files of a time integration, written on a background
+    thread so the solve keeps stepping while the file goes to disk.
+
+    save() copies the state it is given before returning (the solver keeps
+    updating its vectors in place), then hands the copy to a single writer
+    thread. At most one write is in flight: a save issued while the previous
+    one is still writing waits for it. Files are .npz written to a temporary
+    name and renamed, so a run killed mid-write leaves the previous
+    checkpoint intact. Only the newest `keep` checkpoints are retained.
+
+    Append-only records (an in-RAM history) are passed as logs: each save
+    writes only the rows added since the previous one, to a segment file
+    that outlives checkpoint pruning, and latest() joins the segments back
+    up to the checkpoint's row count.
+    """
+    def __init__(self, path, every=100, keep=2):
+        """
+        Args:
+            path (str): checkpoint directory (created if missing).
+            every (int): checkpoint interval in solver steps.
+            keep (int): number of most recent checkpoints kept on disk.
+        """
+        if every < 1 or keep < 1:
+            raise ValueError("every and keep must be positive")
+        self.path = path
+        self.every = int(every)
+        self.keep = int(keep)
+        os.makedirs(path, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending = None
+        self.written = 0
+
+    _NAME = re.compile(r'ckpt_(\d+)\.npz$')
+    _SEGMENT = re.compile(r'(\w+)_log_(\d+)\.npy$')
+
+    def due(self, step):
+        """True if a checkpoint should be written after this step."""
+        return step % self.every == 0
+
+    def _steps(self):
+        """Steps of the checkpoints on disk, oldest first."""
+        steps = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                m = self._NAME.match(entry.name)
+                if m:
+                    steps.append(int(m.group(1)))
+        return sorted(steps)
+
+    def _file(self, step):
+        return os.path.join(self.path, f'ckpt_{step:010d}.npz')
+
+    def _segments(self, name=None):
+        """{log name: [(first row, path), ...] in row order} of the segments on disk."""
+        found = {}
+        with os.scandir(self.path) as it:
+            for entry in it:
+                m = self._SEGMENT.match(entry.name)
+                if m and (name is None or m.group(1) == name):
+                    found.setdefault(m.group(1), []).append((int(m.group(2)), entry.path))
+        return {k: sorted(v) for k, v in found.items()}
+
+    def _atomic(self, path, write):
+        """write(f) into a temporary file, synced, then renamed onto path."""
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _write(self, step, arrays, before, logs):
+        if before is not None:
+            before()
+        for name, (start, rows) in logs.items():
+            # Segments past `start` belong to a run that was killed and resumed
+            for first, path in self._segments(name).get(name, []):
+                if first > start:
+                    os.remove(path)
+            if rows.shape[0]:
+                self._atomic(os.path.join(self.path, f'{name}_log_{start:010d}.npy'),
+                             lambda f: np.save(f, rows))
+        self._atomic(self._file(step), lambda f: np.savez(f, **arrays))
+        for old in self._steps()[:-self.keep]:
+            try:
+                os.remove(self._file(old))
+            except OSError:
+                pass
+        self.written += 1
+
+    def save(self, step, state, before=None, logs=None):
+        """
+        Queue a checkpoint of the state after `step`.
+
+        Args:
+            step (int): completed solver steps.
+            state (dict): name -> array or scalar; copied before returning.
+            before: optional callable run on the writer thread ahead of the
+                    file (e.g. flushing a memory-mapped history it refers to).
+            logs (dict): name -> (start, rows): rows start, start + 1, ... of
+                    an append-only record, those added since the previous
+                    save (copied before returning).
+        """
+        arrays = {k: np.array(v) for k, v in state.items()}
+        arrays['step'] = np.array(step)
+        logs = {name: (int(start), np.array(rows)) for name, (start, rows) in
+                (logs or {}).items()}
+        for name, (start, rows) in logs.items():
+            arrays[f'{name}_rows'] = np.array(start + rows.shape[0])
+        self.wait()
+        self._pending = self._pool.submit(self._write, step, arrays, before, logs)
+
+    def wait(self):
+        """Block until the queued checkpoint is on disk; re-raises its error."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def latest(self):
+        """
+        The newest readable checkpoint as a dict of arrays (with 'step', and
+        every log joined back up to its rows at that step), or None if there
+        is none.
+        """
+        self.wait()
+        for step in reversed(self._steps()):
+            try:
+                with np.load(self._file(step), allow_pickle=False) as data:
+                    state = {k: data[k] for k in data.files}
+                for key in [k for k in state if k.endswith('_rows')]:
+                    name = key[:-len('_rows')]
+                    state[name] = self._join(name, int(state[key]))
+                return state
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def _join(self, name, n_rows):
+        """The first n_rows rows of log `name`, from its segments."""
+        parts, have = [], 0
+        for first, path in self._segments(name).get(name, []):
+            if have >= n_rows:
+                break
+            if first != have:
+                raise ValueError(f"log '{name}' has a gap at row {have}")
+            parts.append(np.load(path, allow_pickle=False))
+            have += parts[-1].shape[0]
+        if have < n_rows:
+            raise ValueError(f"log '{name}' has {have} of {n_rows} rows")
+        return np.concatenate(parts)[:n_rows] if parts else np.empty(0)
+
+    def clear(self):
+        """Remove every checkpoint and log segment."""
+        self.wait()
+        for step in self._steps():
+            os.remove(self._file(step))
+        for segments in self._segments().values():
+            for _, path in segments:
+                os.remove(path)
+
+    def close(self):
+        """Finish the queued write and stop the writer thread."""
+        try:
+            self.wait()
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def restore_checkpoint(checkpoint, pattern, **expected):
+    """
+    Latest checkpoint of a run, checked against the current model.
+
+    Args:
+        checkpoint (Checkpointer): source, or None.
+        pattern (str): sparsity_key of the current model.
+        expected: further scalars the checkpoint must match (e.g. dt).
+
+    Returns:
+        dict of arrays, or None if there is no checkpoint to resume from.
+    """
+    state = None if checkpoint is None else checkpoint.latest()
+    if state is None:
+        return None
+    if str(state['pattern']) != pattern:
+        raise ValueError("checkpoint was written for a different model "
+                         "(sparsity pattern mismatch)")
+    for name, value in expected.items():
+        if not np.allclose(state[name], value, rtol=1e-12, atol=0.0):
+            raise ValueError(f"checkpoint {name}={state[name]} does not match {value}")
+    return state
+
+
+def open_history(out_path, n_records, n, resume=None):
+    """
+    Array receiving the recorded states of a time integration.
+
+    Args:
+        out_path (str): .npy file to memory-map, or None for RAM.
+        n_records (int), n (int): shape of the record.
+        resume (dict): checkpoint being resumed, if any. Its 'history' rows
+            are copied into a new in-RAM array; an existing out_path is
+            reopened rather than truncated.
+
+    Returns:
+        np.ndarray or np.memmap of shape (n_records, n).
+    """
+    if out_path is None:
+        history = np.empty((n_records, n))
+        if resume is not None and 'history' in resume:
+            rows = resume['history'][:n_records]
+            history[:rows.shape[0]] = rows
+        return history
+    if resume is None:
+        return np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64,
+                                         shape=(n_records, n))
+    if not os.path.exists(out_path):
+        raise ValueError(f"cannot resume: history file {out_path} is missing")
+    history = np.lib.format.open_memmap(out_path, mode='r+')
+    if history.shape != (n_records, n):
+        raise ValueError(f"cannot resume: {out_path} has shape {history.shape}, "
+                         f"expected {(n_records, n)}")
+    return history
+
+
+def saved_rows(resume):
+    """History rows already in the checkpoint log of a resumed run (0 if none)."""
+    return 0 if resume is None else int(resume.get('history_rows', 0))
+
+
+def history_state(history, start, stop):
+    """
+    Checkpointer.save arguments for a history array: memory-mapped records
+    are flushed to their file before the checkpoint that relies on them is
+    written; of in-RAM records only rows [start, stop), those recorded since
+    the previous checkpoint, go to the checkpoint's 'history' log.
+
+    Returns:
+        dict of keyword arguments for Checkpointer.save.
+    """
+    if isinstance(history, np.memmap):
+        return {'before': history.flush}
+    return {'logs': {'history': (start, history[start:stop])}}
+
+
+def cg_solve(A, b, x0=None, tol=1e-10, max_iter=None):
+    """
+    Jacobi-preconditioned conjugate gradients for SPD A, warm-started from x0.
+
+    Args:
+        A: square SPD sparse matrix or dense array.
+        b (np.ndarray): right-hand side.
+        x0 (np.ndarray): initial guess (e.g. the previous solution
+                         prolongated onto a refined mesh).
+        tol (float): relative residual tolerance.
+        max_iter (int): iteration cap (default 10 * n).
+
+    Returns:
+        x (np.ndarray), iterations (int)
+    """
+    d = A.diagonal()
+    M = spla.LinearOperator(A.shape, matvec=lambda r: r / np.where(d != 0.0, d, 1.0),
+                            dtype=float)
+    count = [0]
+
+    def step(xk):
+        count[0] += 1
+
+    x, info = spla.cg(A, b, x0=x0, rtol=tol, atol=0.0, maxiter=max_iter or 10 * A.shape[0],
+                      M=M, callback=step)
+    if info > 0:
+        raise RuntimeError(f"CG did not converge in {info} iterations")
+    return x, count[0]
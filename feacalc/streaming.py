@@ -0,0 +1,194 @@
+"""
+streaming.py
+
+Shared-memory state channel for publishing solver progress (displacements and a
+scalar field) from a background process to a viewer without blocking either side.
+"""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class StateChannel:
+    """
+    Single-writer, many-reader shared-memory slot guarded by a sequence counter
+    (a seqlock): the writer bumps the counter to an odd value, writes, then bumps
+    it to the next even value. Readers copy the slot and keep the copy only if
+    the counter was even and unchanged across the copy, so neither side waits.
+
+    Layout: int64 header [seq, step, status, abort, ...], float64 time,
+    float32 displacements (n_nodes, 3), float32 field (n_field,).
+    """
+    SEQ, STEP, STATUS, ABORT = range(4)
+    RUNNING, DONE, ABORTED, FAILED = range(4)
+    STATUS_NAMES = ('running', 'done', 'aborted', 'failed')
+
+    _HEADER_BYTES = 64
+    _TIME_BYTES   = 8
+
+    def __init__(self, n_nodes, n_field=0, name=None, create=True):
+        """
+        Args:
+            n_nodes (int): number of nodes in published displacement arrays.
+            n_field (int): length of the published scalar field (0 for none).
+            name (str): shared memory block name (required when attaching).
+            create (bool): create a new block rather than attach to `name`.
+        """
+        self.n_nodes = n_nodes
+        self.n_field = n_field
+        size = self._HEADER_BYTES + self._TIME_BYTES + 4 * (3 * n_nodes + n_field)
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = self._attach(name)
+
+        buf = self._shm.buf
+        offset = self._HEADER_BYTES + self._TIME_BYTES
+        self._header = np.ndarray((8,), dtype=np.int64, buffer=buf)
+        self._time   = np.ndarray((1,), dtype=np.float64, buffer=buf,
+                                  offset=self._HEADER_BYTES)
+        self._disp   = np.ndarray((n_nodes, 3), dtype=np.float32, buffer=buf,
+                                  offset=offset)
+        self._field  = np.ndarray((n_field,), dtype=np.float32, buffer=buf,
+                                  offset=offset + 12 * n_nodes)
+        if create:
+            self._header[:] = 0
+            self._time[:] = 0.0
+
+    @staticmethod
+    def _attach(name):
+        """Attach to an existing block without making this process its owner."""
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always registers; processes started by launch_solve
+            # share the creator's resource tracker, so that is a no-op there
+            return shared_memory.SharedMemory(name=name)
+
+    @property
+    def spec(self):
+        """Picklable (name, n_nodes, n_field) tuple for attach()."""
+        return (self._shm.name, self.n_nodes, self.n_field)
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to a channel created elsewhere, given its spec."""
+        name, n_nodes, n_field = spec
+        return cls(n_nodes, n_field, name=name, create=False)
+
+    # --- writer side ---
+
+    def publish(self, disp, field=None, step=0, time=0.0):
+        """
+        Publish a new state.
+
+        Args:
+            disp: array-like of shape (n_nodes, 2) or (n_nodes, 3).
+            field: optional array-like of shape (n_field,).
+            step (int): increment, iteration or time-step counter.
+            time (float): load factor or physical time.
+        """
+        disp = np.asarray(disp)
+        h = self._header
+        h[self.SEQ] += 1
+        self._disp[:, :disp.shape[1]] = disp
+        if disp.shape[1] == 2:
+            self._disp[:, 2] = 0.0
+        if field is not None:
+            self._field[:] = field
+        h[self.STEP] = step
+        self._time[0] = time
+        h[self.SEQ] += 1
+
+    @property
+    def abort_requested(self):
+        """True once a reader has asked the writer to stop."""
+        return bool(self._header[self.ABORT])
+
+    # --- reader side ---
+
+    def read(self, disp_out, field_out=None, last_seq=0):
+        """
+        Copy the latest state if it is newer than last_seq and not mid-write.
+
+        Args:
+            disp_out: preallocated float32 array of shape (n_nodes, 3).
+            field_out: optional preallocated float32 array of shape (n_field,).
+            last_seq (int): sequence number of the caller's current copy.
+
+        Returns:
+            (seq, step, time) for a fresh consistent copy, otherwise None.
+        """
+        h = self._header
+        seq = int(h[self.SEQ])
+        if seq == last_seq or seq % 2:
+            return None
+        np.copyto(disp_out, self._disp)
+        if field_out is not None:
+            np.copyto(field_out, self._field)
+        step = int(h[self.STEP])
+        time = float(self._time[0])
+        if int(h[self.SEQ]) != seq:
+            return None
+        return seq, step, time
+
+    def request_abort(self):
+        """Ask the writer to stop at its next check."""
+        self._header[self.ABORT] = 1
+
+    # --- shared ---
+
+    @property
+    def status(self):
+        """One of RUNNING, DONE, ABORTED, FAILED."""
+        return int(self._header[self.STATUS])
+
+    @status.setter
+    def status(self, value):
+        self._header[self.STATUS] = value
+
+    def close(self):
+        """Detach this process from the block."""
+        self._header = self._time = self._disp = self._field = None
+        self._shm.close()
+
+    def unlink(self):
+        """Free the block (call once, from the creating process)."""
+        self._shm.unlink()
+
+
+def _run_publishing(target, spec, args):
+    channel = StateChannel.attach(spec)
+    try:
+        target(channel, *args)
+        channel.status = (StateChannel.ABORTED if channel.abort_requested
+                          else StateChannel.DONE)
+    except BaseException:
+        channel.status = StateChannel.FAILED
+        raise
+    finally:
+        channel.close()
+
+
+def launch_solve(target, channel, *args):
+    """
+    Run target(channel, *args) in a freshly spawned process.
+
+    The target publishes states with channel.publish() and should return
+    early once channel.abort_requested is set. The process is spawned rather
+    than forked so it does not inherit the viewer's GL context.
+
+    Args:
+        target: picklable (module-level) callable.
+        channel: StateChannel created by the calling process.
+        *args: extra picklable arguments for target.
+
+    Returns:
+        The started multiprocessing.Process.
+    """
+    ctx = mp.get_context('spawn')
+    proc = ctx.Process(target=_run_publishing, args=(target, channel.spec, args),
+                       daemon=True)
+    proc.start()
+    return proc
@@ -0,0 +1,233 @@
+"""
+transient.py
+
+Implicit linear transient dynamics: Newmark-beta time integration with optional
+HHT-alpha numerical damping. The effective stiffness is factored once and every
+step reuses it with preallocated work vectors. Runs can checkpoint their state
+periodically and resume from the latest checkpoint.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from .solver import (content_hash, factorize, history_state, open_history,
+                     restore_checkpoint, saved_rows, sparsity_key)
+from .utils import spmv, free_dofs, submatrix
+
+
+class NewmarkSolver:
+    """
+    Integrates M a + C v + K u = f(t) with constant time step dt.
+
+    With alpha = 0 this is the classical Newmark family (beta = 1/4,
+    gamma = 1/2 is the unconditionally stable average-acceleration rule).
+    With alpha in [-1/3, 0) it is Hilber-Hughes-Taylor, and beta/gamma
+    default to the second-order accurate values (1 - alpha)^2 / 4 and
+    1/2 - alpha.
+    """
+    def __init__(self, K, M, dt, C=None, beta=None, gamma=None, alpha=0.0,
+                 fixed_dofs=None):
+        """
+        Args:
+            K: stiffness, scipy sparse matrix or dense array (n, n).
+            M: mass, sparse/dense matrix or 1D array for a lumped (diagonal) mass.
+            dt (float): time step.
+            C: optional damping matrix (same kinds as K).
+            beta, gamma (float): Newmark parameters (see class docstring).
+            alpha (float): HHT parameter in [-1/3, 0].
+            fixed_dofs: optional DOF indices held at zero displacement.
+        """
+        if not -1.0 / 3.0 <= alpha <= 0.0:
+            raise ValueError(f"HHT alpha must lie in [-1/3, 0], got {alpha}")
+        self.alpha = alpha
+        self.beta  = (1.0 - alpha) ** 2 / 4.0 if beta is None else beta
+        self.gamma = 0.5 - alpha if gamma is None else gamma
+        self.dt    = dt
+
+        self.n_dofs = K.shape[0]
+        self.free = free_dofs(self.n_dofs, fixed_dofs)
+        self.K = submatrix(K, self.free)
+        self.M = submatrix(M, self.free)
+        self.C = submatrix(C, self.free)
+
+        # Newmark integration constants
+        b, g = self.beta, self.gamma
+        self.a0 = 1.0 / (b * dt * dt)
+        self.a1 = g / (b * dt)
+        self.a2 = 1.0 / (b * dt)
+        self.a3 = 1.0 / (2.0 * b) - 1.0
+        self.a4 = g / b - 1.0
+        self.a5 = dt * (g / (2.0 * b) - 1.0)
+
+        # Effective stiffness, factored once for the whole run
+        w = 1.0 + alpha
+        M_op = self._as_matrix(self.M)
+        K_eff = w * self.K + self.a0 * M_op
+        if self.C is not None:
+            K_eff = K_eff + w * self.a1 * self._as_matrix(self.C)
+        self._solve = factorize(K_eff).solve
+
+    def _as_matrix(self, A):
+        """Promote a lumped (1D) operator to a matrix of K's kind."""
+        if isinstance(A, np.ndarray) and A.ndim == 1:
+            if isinstance(self.K, np.ndarray):
+                return np.diag(A)
+            return sp.diags(A, format='csr')
+        return A
+
+    def _initial_acceleration(self, u, v, f):
+        """Solve M a0 = f - C v - K u."""
+        r = f - spmv(self.K, u, np.empty_like(u))
+        if self.C is not None:
+            r -= spmv(self.C, v, np.empty_like(v))
+        if isinstance(self.M, np.ndarray) and self.M.ndim == 1:
+            return r / self.M
+        return factorize(self.M).solve(r)
+
+    def run(self, n_steps, force, u0=None, v0=None, stride=1, out_path=None,
+            callback=None, checkpoint=None, restart=False):
+        """
+        Integrate n_steps steps.
+
+        Args:
+            n_steps (int): number of time steps.
+            force: one of
+                - callable force(t, out) writing the full-size load vector into out,
+                - np.ndarray (n_dofs,) constant load,
+                - np.ndarray (n_steps + 1, n_dofs) load history (may be memory-mapped).
+            u0, v0: optional full-size initial displacement/velocity.
+            stride (int): record every stride-th step (step 0 is always recorded).
+            out_path (str): stream recorded displacements to this .npy file
+                (memory-mapped, shape (n_records, n_dofs)) instead of RAM.
+            callback: optional callback(step, t, u) with the full-size u.
+            checkpoint (Checkpointer): write the state every checkpoint.every
+                steps (in the background).
+            restart (bool): resume from checkpoint's latest file, if any, with
+                the same n_steps, load, stride and out_path as the original
+                run; u0/v0 are then ignored.
+
+        Returns:
+            dict with 'u', 'v', 'a' (final full-size states), 'history'
+            (recorded displacements, an array or memmap) and 'times'.
+        """
+        n, free = self.n_dofs, self.free
+        dt, alpha = self.dt, self.alpha
+        w = 1.0 + alpha
+
+        # Full-size and reduced state vectors, allocated once
+        m = free.size
+        full = np.zeros(n)
+        f_full = np.zeros(n)
+        u = np.zeros(m) if u0 is None else np.asarray(u0, dtype=float)[free].copy()
+        v = np.zeros(m) if v0 is None else np.asarray(v0, dtype=float)[free].copy()
+        f_now, f_next = np.empty(m), np.empty(m)
+        u_new, a_old = np.empty(m), np.empty(m)
+        rhs, tmp, work, mv = np.empty(m), np.empty(m), np.empty(m), np.empty(m)
+
+        # Resume from the latest checkpoint of the same model, if asked
+        pattern = content_hash(sparsity_key(self.K, self.M, self.C), free)
+        state = restore_checkpoint(checkpoint, pattern, dt=dt) if restart else None
+        start = 0 if state is None else int(state['step'])
+
+        load = self._load_function(force, n, n_steps)
+        load(start, start * dt, f_full)
+        np.take(f_full, free, out=f_now)
+        if state is None:
+            a = self._initial_acceleration(u, v, f_now)
+        else:
+            u, v, a = state['u'].copy(), state['v'].copy(), state['a'].copy()
+
+        n_records = n_steps // stride + 1
+        history = open_history(out_path, n_records, n, state)
+        saved = saved_rows(state)
+        times = np.arange(n_records) * stride * dt
+        if state is None:
+            full[free] = u
+            history[0] = full
+
+        def axpy(y, coef, x):
+            """y += coef * x through the shared work vector."""
+            np.multiply(x, coef, out=work)
+            y += work
+
+        for step in range(start + 1, n_steps + 1):
+            t = step * dt
+            load(step, t, f_full)
+            np.take(f_full, free, out=f_next)
+
+            # rhs = (1+alpha) f_{n+1} - alpha f_n + M (a0 u + a2 v + a3 a)
+            np.multiply(f_next, w, out=rhs)
+            if alpha:
+                axpy(rhs, -alpha, f_now)
+            np.multiply(u, self.a0, out=tmp)
+            axpy(tmp, self.a2, v)
+            axpy(tmp, self.a3, a)
+            rhs += spmv(self.M, tmp, mv)
+
+            #     + C ((1+alpha)(a1 u + a4 v + a5 a) + alpha v) + alpha K u
+            if self.C is not None:
+                np.multiply(u, w * self.a1, out=tmp)
+                axpy(tmp, w * self.a4 + alpha, v)
+                axpy(tmp, w * self.a5, a)
+                rhs += spmv(self.C, tmp, mv)
+            if alpha:
+                axpy(rhs, alpha, spmv(self.K, u, mv))
+
+            self._solve(rhs, out=u_new)
+
+            # a_{n+1} = a0 (u_{n+1} - u_n) - a2 v_n - a3 a_n
+            a_old[:] = a
+            np.subtract(u_new, u, out=a)
+            a *= self.a0
+            axpy(a, -self.a2, v)
+            axpy(a, -self.a3, a_old)
+            # v_{n+1} = v_n + dt ((1 - gamma) a_n + gamma a_{n+1})
+            axpy(v, dt * (1.0 - self.gamma), a_old)
+            axpy(v, dt * self.gamma, a)
+            u, u_new = u_new, u
+            f_now, f_next = f_next, f_now
+
+            if step % stride == 0 or callback is not None:
+                full[free] = u
+                if step % stride == 0:
+                    history[step // stride] = full
+                if callback is not None:
+                    callback(step, t, full)
+
+            if checkpoint is not None and checkpoint.due(step):
+                rows = step // stride + 1
+                checkpoint.save(step, dict(u=u, v=v, a=a, time=t, dt=dt, pattern=pattern),
+                                **history_state(history, saved, rows))
+                saved = rows
+
+        if out_path is not None:
+            history.flush()
+        if checkpoint is not None:
+            checkpoint.wait()
+
+        result = {'u': np.zeros(n), 'v': np.zeros(n), 'a': np.zeros(n),
+                  'history': history, 'times': times}
+        result['u'][free] = u
+        result['v'][free] = v
+        result['a'][free] = a
+        return result
+
+    @staticmethod
+    def _load_function(force, n, n_steps):
+        """Normalize the supported load specifications to load(step, t, out)."""
+        if callable(force):
+            return lambda step, t, out: force(t, out)
+        force = force if isinstance(force, np.ndarray) else np.asarray(force, dtype=float)
+        if force.ndim == 1:
+            if force.shape[0] != n:
+                raise ValueError(f"Expected load of length {n}, got {force.shape[0]}")
+            def constant(step, t, out):
+                out[:] = force
+            return constant
+        if force.ndim == 2 and force.shape[1] == n:
+            if force.shape[0] <= n_steps:
+                raise ValueError(f"Load history has {force.shape[0]} rows, "
+                                 f"{n_steps} steps need {n_steps + 1}")
+            def history(step, t, out):
+                out[:] = force[step]
+            return history
+        raise ValueError(f"Unsupported load shape {force.shape}")
@@ -0,0 +1,68 @@
+"""
+utils.py
+
+Small numerical helpers shared across feacalc modules.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+try:  # scipy's compiled CSR kernel accumulates into a caller-owned vector
+    from scipy.sparse._sparsetools import csr_matvec as _csr_matvec
+except ImportError:  # pragma: no cover - depends on scipy internals
+    _csr_matvec = None
+
+
+def spmv(A, x, out):
+    """
+    Compute out = A @ x without allocating the result.
+
+    Args:
+        A: scipy sparse matrix, dense 2D array, or 1D array (a diagonal).
+        x (np.ndarray): input vector.
+        out (np.ndarray): preallocated output vector.
+
+    Returns:
+        out
+    """
+    if isinstance(A, np.ndarray):
+        if A.ndim == 1:
+            return np.multiply(A, x, out=out)
+        return np.dot(A, x, out=out)
+    if (_csr_matvec is not None and sp.issparse(A) and A.format == 'csr'
+            and A.dtype == x.dtype == out.dtype):
+        out.fill(0.0)
+        _csr_matvec(A.shape[0], A.shape[1], A.indptr, A.indices, A.data, x, out)
+        return out
+    out[:] = A @ x
+    return out
+
+
+def free_dofs(n_dofs, fixed_dofs=None):
+    """
+    Indices of unconstrained DOFs.
+
+    Args:
+        n_dofs (int): total number of DOFs.
+        fixed_dofs: optional iterable of constrained DOF indices.
+
+    Returns:
+        np.ndarray of sorted free DOF indices.
+    """
+    mask = np.ones(n_dofs, dtype=bool)
+    if fixed_dofs is not None:
+        mask[np.asarray(fixed_dofs, dtype=int)] = False
+    return np.flatnonzero(mask)
+
+
+def submatrix(A, idx):
+    """
+    Restrict a square operator (sparse, dense or diagonal vector) to rows and
+    columns idx.
+    """
+    if A is None:
+        return None
+    if isinstance(A, np.ndarray) and A.ndim == 1:
+        return A[idx]
+    if sp.issparse(A):
+        return sp.csr_matrix(A)[idx][:, idx].tocsr()
+    return np.asarray(A)[np.ix_(idx, idx)]
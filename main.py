@@ -4,17 +4,23 @@ import os
 import sys
 import numpy as np
 from visualiser.mesh_data import MeshData
-from visualiser.scene import Scene
 from visualiser.camera import Camera
 from visualiser.view_manager import ViewManager
 from visualiser.projection_manager import ProjectionManager
 from visualiser.input_controller import InputController
-from visualiser.hud_overlay import HUDOverlay
-from visualiser.renderer import Renderer
-from visualiser.testing.pyramid_example import pyramid_truss
+from visualiser.picker import Picker
+from visualiser.live import LiveFeed
+from visualiser.testing.pyramid_example import pyramid_truss, pyramid_sway
+from feacalc.streaming import StateChannel, launch_solve
 
 
-def main():
+def main(live=False):
+    # GL-backed modules are imported here, not at module level, so processes
+    # spawned by launch_solve (which re-import this file) never load OpenGL
+    from visualiser.scene import Scene
+    from visualiser.hud_overlay import HUDOverlay
+    from visualiser.renderer import Renderer
+
     # Compute paths
     HERE      = os.path.dirname(os.path.abspath(__file__))
     SHADER_DIR = os.path.join(HERE, "visualiser", "shaders")
@@ -73,7 +79,23 @@ def main():
     # 4) Projection manager
     proj_mgr = ProjectionManager()
 
-    # 5) Input controller
+    # 4b) Optional live solve in a background process ('x' aborts it)
+    feed = channel = None
+    if live:
+        channel = StateChannel(n_nodes=nodes.shape[0], n_field=nodes.shape[0])
+        proc = launch_solve(pyramid_sway, channel)
+        feed = LiveFeed(channel, scene, process=proc)
+
+    # 5) HUD overlay (stub FPS callback)
+    hud = HUDOverlay(
+        view_manager=views,
+        shader_manager=None,   # placeholder; Renderer will assign real shader
+        scene=scene,
+        fps_callback=lambda: 60.0,
+        live=feed
+    )
+
+    # 6) Input controller (click to pick nodes/elements, 'p' toggles which)
     input_ctrl = InputController(
         camera=camera,
         view_manager=views,
@@ -81,15 +103,10 @@ def main():
         shader=None,           # placeholder; Renderer will create ShaderManager
         exit_callback=lambda: sys.exit(0),
         fit_center=centroid,
-        fit_radius=radius
-    )
-
-    # 6) HUD overlay (stub FPS callback)
-    hud = HUDOverlay(
-        view_manager=views,
-        shader_manager=None,   # placeholder; Renderer will assign real shader
-        scene=scene,
-        fps_callback=lambda: 60.0
+        fit_radius=radius,
+        picker=Picker(mesh_data, camera, proj_mgr),
+        hud=hud,
+        live=feed
     )
 
     # 7) Create renderer and start loop
@@ -104,10 +121,17 @@ def main():
         input_ctrl=input_ctrl,
         width=800,
         height=600,
-        title="MiniFEA Truss Viewer"
+        title="MiniFEA Truss Viewer",
+        live=feed
     )
-    renderer.start()
+    try:
+        renderer.start()
+    finally:
+        if channel is not None:
+            channel.request_abort()
+            channel.close()
+            channel.unlink()
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
+    main(live="--live" in sys.argv[1:])
@@ -0,0 +1,105 @@
+"""
+test_backend.py
+
+Parity of the optional compiled kernel loops with the NumPy reference path.
+The loop sources are also run uncompiled, so they are checked even where
+Numba is not installed.
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from feacalc import backend, core
+from feacalc import mesh as fea_mesh
+from feacalc.elements import BarKernel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _lattice(seed=0):
+    """Perturbed 3D bar lattice with mixed properties, positions deformed."""
+    rng = np.random.default_rng(seed)
+    g = np.stack(np.meshgrid(*[np.arange(4.0)] * 3, indexing='ij'), -1).reshape(-1, 3)
+    pairs = np.argwhere(np.triu(np.linalg.norm(g[:, None] - g[None], axis=2) < 1.5, 1))
+    coords = g + 0.05 * rng.standard_normal(g.shape)
+    kernel = BarKernel(coords, pairs, rng.uniform(1.0, 2.0, len(pairs)),
+                       rng.uniform(0.5, 1.0, len(pairs)), rng.uniform(0.0, 1.0, len(pairs)))
+    kernel.E[:3] = 0.0                          # exercises the inf/nan branch of stable_dt
+    x = coords + 0.1 * rng.standard_normal(coords.shape)
+    return kernel, x
+
+
+def _reference(kernel, x):
+    with backend.use('numpy'):
+        f = kernel.internal_forces(x, np.empty(kernel.n_dofs))
+        with np.errstate(invalid='ignore'):
+            dt = kernel.stable_dt()
+    return f, dt
+
+
+def test_loop_sources_match_numpy_uncompiled():
+    kernel, x = _lattice()
+    f_ref, dt_ref = _reference(kernel, x)
+    loops = backend.LOOPS
+    f = loops['bar_internal_forces'](x, kernel.conn, kernel.L0, kernel.EA_L0,
+                                     np.full(kernel.n_dofs, np.nan))
+    np.testing.assert_allclose(f, f_ref, rtol=1e-12, atol=1e-12)
+    dt = loops['wave_dt'](kernel.L0, kernel.rho, kernel.E, np.empty(kernel.n_elems))
+    np.testing.assert_array_equal(dt, dt_ref)
+
+    slots = np.array([3, 0, 3, 1, 3])
+    vals = np.arange(5.0)
+    np.testing.assert_array_equal(loops['scatter_add'](np.zeros(4), slots, vals),
+                                  np.bincount(slots, vals, minlength=4))
+
+
+@pytest.mark.parametrize('name', ['numpy', 'numba'])
+def test_pattern_assembly_matches_coo_assembly(name):
+    if name == 'numba':
+        pytest.importorskip('numba')
+    mesh = fea_mesh.rect_grid(6, 4, lx=3.0, ly=2.0)
+    kernels = core.build_kernels(mesh, {'quad4': {'E': 200.0, 'nu': 0.3}})
+    kernels['bar'] = BarKernel(mesh.nodes, [[0, 10], [5, 30], [0, 10]], 50.0, 0.1)
+    ref = core.assemble_stiffness(kernels, mesh.n_nodes)
+    pattern = core.StiffnessPattern(kernels, mesh.n_nodes)
+    with backend.use(name):
+        for dtype in (np.float64, np.float32):
+            K = pattern.assemble(kernels, dtype)
+            assert K.dtype == dtype and K.has_sorted_indices
+            assert abs(K.astype(float) - ref).max() <= 1e-6 * abs(ref).max()
+
+
+def test_numba_kernels_match_numpy():
+    pytest.importorskip('numba')
+    kernel, x = _lattice(1)
+    f_ref, dt_ref = _reference(kernel, x)
+    with backend.use('numba') as name:
+        assert name == 'numba'
+        f = kernel.internal_forces(x, np.full(kernel.n_dofs, np.nan))
+        dt = kernel.stable_dt()
+    np.testing.assert_allclose(f, f_ref, rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(dt, dt_ref)
+
+
+def test_missing_numba_falls_back_to_numpy(monkeypatch):
+    monkeypatch.setattr(backend, '_numba', lambda: None)
+    with pytest.warns(RuntimeWarning):
+        with backend.use('numba') as name:
+            assert name == 'numpy'
+            assert backend.jit('scatter_add') is None
+
+
+@pytest.mark.parametrize('value, ok', [('numpy', True), ('auto', True), ('fortran', False)])
+def test_environment_backend_is_validated(value, ok):
+    proc = subprocess.run([sys.executable, '-c', 'from feacalc import backend; '
+                           'print(backend.active())'],
+                          cwd=ROOT, capture_output=True, text=True,
+                          env=dict(os.environ, MINIFEA_BACKEND=value))
+    assert (proc.returncode == 0) == ok
+    if ok:
+        assert proc.stdout.strip() in (('numpy',) if value == 'numpy' else ('numpy', 'numba'))
+    else:
+        assert "Unknown backend 'fortran'" in proc.stderr
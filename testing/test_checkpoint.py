@@ -0,0 +1,87 @@
+"""
+test_checkpoint.py
+
+Restart checks: a transient run killed part way and resumed from its latest
+checkpoint must reproduce the uninterrupted run exactly.
+"""
+import numpy as np
+import pytest
+
+from feacalc import core
+from feacalc.elements import BarKernel
+from feacalc.explicit import CentralDifferenceSolver
+from feacalc.solver import Checkpointer
+from feacalc.transient import NewmarkSolver
+
+
+class Preempted(Exception):
+    pass
+
+
+def _chain(n=12):
+    """Bar chain along x, clamped at node 0 and pulled at the free end."""
+    coords = np.stack([np.linspace(0.0, 1.0, n + 1), np.zeros(n + 1)], axis=1)
+    conn = np.stack([np.arange(n), np.arange(1, n + 1)], axis=1)
+    rho = np.linspace(1.0, 8.0, n)                 # uneven steps exercise subcycling
+    kernel = BarKernel(coords, conn, 1e3, 1e-2, rho)
+    force = np.zeros(2 * (n + 1))
+    force[-2] = 1.0
+    return kernel, [0, 1] + list(range(3, 2 * (n + 1), 2)), force
+
+
+def _resume_matches(make, run_kwargs, tmp_path, kill_at=37):
+    full = make().run(**run_kwargs)
+
+    def preempt(step, t, u):
+        if step == kill_at:
+            raise Preempted
+
+    with Checkpointer(tmp_path / 'ckpt', every=10, keep=2) as ck:
+        with pytest.raises(Preempted):
+            make().run(callback=preempt, checkpoint=ck, **run_kwargs)
+        assert int(ck.latest()['step']) == 30
+        resumed = make().run(checkpoint=ck, restart=True, **run_kwargs)
+        assert len(list((tmp_path / 'ckpt').glob('*.npz'))) <= 2
+    np.testing.assert_array_equal(resumed['u'], full['u'])
+    np.testing.assert_array_equal(np.asarray(resumed['history']), np.asarray(full['history']))
+
+
+def test_newmark_resumes_bitwise(tmp_path):
+    kernel, fixed, force = _chain()
+    K = core.assemble_stiffness({'bar': kernel}, kernel.n_nodes, 2)
+    M = kernel.lumped_mass()
+    _resume_matches(lambda: NewmarkSolver(K, M, 1e-3, alpha=-0.1, fixed_dofs=fixed),
+                    dict(n_steps=60, force=force, stride=4), tmp_path)
+
+
+def test_explicit_resumes_bitwise_with_memmapped_history(tmp_path):
+    kernel, fixed, force = _chain()
+    run = dict(n_steps=80, force=force, stride=3, out_path=str(tmp_path / 'u.npy'))
+    _resume_matches(lambda: CentralDifferenceSolver(kernel, fixed, max_level=2), run,
+                    tmp_path)
+
+
+def test_restart_rejects_other_model(tmp_path):
+    kernel, fixed, force = _chain()
+    with Checkpointer(tmp_path, every=5) as ck:
+        CentralDifferenceSolver(kernel, fixed).run(10, force, checkpoint=ck)
+        with pytest.raises(ValueError):
+            CentralDifferenceSolver(kernel, fixed[:-1]).run(10, force, checkpoint=ck,
+                                                            restart=True)
+
+
+def test_in_ram_history_rows_are_written_once(tmp_path):
+    kernel, fixed, force = _chain()
+    with Checkpointer(tmp_path, every=10, keep=2) as ck:
+        full = CentralDifferenceSolver(kernel, fixed).run(60, force, stride=4, checkpoint=ck)
+    segments = sorted(tmp_path.glob('history_log_*.npy'))
+    rows = [np.load(path) for path in segments]
+    assert sum(r.shape[0] for r in rows) == 60 // 4 + 1
+    np.testing.assert_array_equal(np.concatenate(rows), full['history'])
+    for path in tmp_path.glob('ckpt_*.npz'):
+        with np.load(path) as data:
+            assert 'history' not in data.files and 'history_rows' in data.files
+    ck = Checkpointer(tmp_path)
+    ck.clear()
+    ck.close()
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,112 @@
+"""
+test_elements.py
+
+Element kernel registry and batched kernel behaviour.
+"""
+import numpy as np
+import pytest
+
+from feacalc import core
+from feacalc import mesh as fea_mesh
+from feacalc.elements import (ELEMENT_KERNELS, BarKernel, FrameKernel, kernel_for,
+                              register_kernel)
+
+
+def test_registry_lookup_and_errors():
+    assert kernel_for('bar') is BarKernel and BarKernel.elem_type == 'bar'
+    with pytest.raises(ValueError, match="'hex27'"):
+        kernel_for('hex27')
+
+    @register_kernel('spring')
+    class Spring(BarKernel):
+        pass
+
+    try:
+        assert kernel_for('spring') is Spring and Spring.elem_type == 'spring'
+    finally:
+        del ELEMENT_KERNELS['spring']
+    with pytest.raises(ValueError):
+        kernel_for('spring')
+
+    mixed = fea_mesh.MixedMesh.from_meshes(fea_mesh.rect_grid(1, 1))
+    mixed.add_block('hex27', np.zeros((1, 27), dtype=int))
+    with pytest.raises(ValueError):
+        core.build_kernels(mixed, {'quad4': {'E': 1.0, 'nu': 0.3}, 'hex27': {}})
+
+
+def _frame_line(direction, n=4, length=2.0, **kw):
+    """n frame elements from the origin along direction, total length `length`."""
+    d = np.asarray(direction, dtype=float)
+    coords = np.linspace(0.0, length, n + 1)[:, None] * (d / np.linalg.norm(d))
+    conn = np.column_stack([np.arange(n), np.arange(1, n + 1)])
+    props = dict(E=200.0, G=80.0, A=0.01, Iy=2e-4, Iz=5e-4, J=3e-4)
+    props.update(kw)
+    return FrameKernel(coords, conn, **props)
+
+
+def _solve(kernel, fixed, f):
+    K = core.assemble_stiffness({'frame': kernel}, kernel.n_nodes).toarray()
+    free = np.setdiff1d(np.arange(kernel.n_dofs), fixed)
+    u = np.zeros(kernel.n_dofs)
+    u[free] = np.linalg.solve(K[np.ix_(free, free)], f[free])
+    return u
+
+
+@pytest.mark.parametrize('direction', [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 2, -2)])
+def test_cantilever_tip_deflection(direction):
+    P, L = 3.0, 2.0
+    kernel = _frame_line(direction, length=L)
+    tip = 6 * (kernel.n_nodes - 1)
+    # Load along local y bends about z (Iz), along local z about y (Iy)
+    for axis, I in ((1, kernel.Iz[0]), (2, kernel.Iy[0])):
+        load = kernel.R[0, axis]
+        f = np.zeros(kernel.n_dofs)
+        f[tip:tip + 3] = P * load
+        u = _solve(kernel, np.arange(6), f)
+        delta = P * L ** 3 / (3 * 200.0 * I)
+        np.testing.assert_allclose(u[tip:tip + 3], delta * load, rtol=0.0, atol=1e-10 * delta)
+        moments = kernel.recover(u)['end_forces']
+        assert np.isclose(abs(moments[0, 6 - axis]), P * L)     # clamp moment
+
+
+def test_moment_release_turns_fixed_end_into_pin():
+    # Two spans clamped at node 0, pinned at node 2, load P at midspan node 1
+    P, L, EI = 2.0, 2.0, 200.0 * 5e-4
+    releases = np.zeros((2, 12), dtype=bool)
+    releases[1, 11] = True                              # rz at end j of the second span
+    kernel = _frame_line((1, 0, 0), n=2, length=L, releases=releases)
+    f = np.zeros(kernel.n_dofs)
+    f[7] = -P
+    # Node 2 keeps its translations fixed; its rz only touches the released DOF
+    fixed = np.concatenate([np.arange(6), [12, 13, 14, 17], [2, 3, 4, 8, 9, 10, 15, 16]])
+    u = _solve(kernel, fixed, f)
+    np.testing.assert_allclose(u[7], -7 * P * L ** 3 / (768 * EI), rtol=1e-10)
+    end = kernel.recover(u)['end_forces']
+    assert abs(end[1, 11]) < 1e-12 * P * L
+    np.testing.assert_allclose(abs(end[0, 5]), 3 * P * L / 16, rtol=1e-10)
+
+    # Without the release the same spans act fixed-fixed
+    clamped = _frame_line((1, 0, 0), n=2, length=L)
+    fixed = np.concatenate([np.arange(6), np.arange(12, 18), [2, 3, 4, 8, 9, 10]])
+    np.testing.assert_allclose(_solve(clamped, fixed, f)[7], -P * L ** 3 / (192 * EI),
+                               rtol=1e-10)
+
+
+def test_frame_null_space_is_rigid_body_motion():
+    rng = np.random.default_rng(2)
+    coords = rng.standard_normal((5, 3))
+    conn = [[0, 1], [1, 2], [2, 3], [3, 4], [4, 0], [0, 2], [1, 3]]
+    kernel = FrameKernel(coords, conn, 200.0, 80.0, 0.01, 2e-4, 5e-4, 3e-4)
+    K = core.assemble_stiffness({'frame': kernel}, kernel.n_nodes).toarray()
+
+    # Translations and small rotations about the origin: u = t + theta x X
+    modes = np.zeros((6, kernel.n_nodes, 6))
+    for a in range(3):
+        e = np.eye(3)[a]
+        modes[a, :, a] = 1.0
+        modes[3 + a, :, :3] = np.cross(e, coords)
+        modes[3 + a, :, 3 + a] = 1.0
+    modes = modes.reshape(6, -1)
+    assert np.abs(K @ modes.T).max() < 1e-10 * np.abs(K).max()
+    eig = np.linalg.eigvalsh(K)
+    assert np.sum(eig < 1e-10 * eig.max()) == 6
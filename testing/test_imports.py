@@ -0,0 +1,71 @@
+"""
+test_imports.py
+
+Guards that solver-side modules and the visualiser data adapters import without
+OpenGL, GLUT or PIL, and within an import-time budget.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS_MODULES = [
+    'feacalc.backend',
+    'feacalc.core',
+    'feacalc.domain',
+    'feacalc.elements',
+    'feacalc.explicit',
+    'feacalc.mesh',
+    'feacalc.plotting',
+    'feacalc.postprocessing',
+    'feacalc.sensitivity',
+    'feacalc.solver',
+    'feacalc.streaming',
+    'feacalc.transient',
+    'feacalc.utils',
+    'visualiser.adapters',
+    'visualiser.camera',
+    'visualiser.input_controller',
+    'visualiser.live',
+    'visualiser.mesh_data',
+    'visualiser.picker',
+    'visualiser.playback',
+    'visualiser.projection_manager',
+    'visualiser.spatial',
+    'visualiser.text_atlas',
+    'visualiser.view_manager',
+    'visualiser.viewport',
+]
+
+# Seconds allowed for importing every headless module in a fresh interpreter
+IMPORT_BUDGET = float(os.environ.get('MINIFEA_IMPORT_BUDGET', '3.0'))
+
+
+def _run(code):
+    proc = subprocess.run([sys.executable, '-c', textwrap.dedent(code)],
+                          cwd=ROOT, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip()
+
+
+def test_headless_modules_do_not_load_gl_or_pil():
+    out = _run(f"""
+        import importlib, sys
+        for name in {HEADLESS_MODULES!r}:
+            importlib.import_module(name)
+        print(sorted(m for m in sys.modules if m.split('.')[0] in ('OpenGL', 'PIL')))
+    """)
+    assert out == '[]'
+
+
+def test_headless_import_time_budget():
+    out = _run(f"""
+        import importlib, time
+        start = time.perf_counter()
+        for name in {HEADLESS_MODULES!r}:
+            importlib.import_module(name)
+        print(time.perf_counter() - start)
+    """)
+    assert float(out) < IMPORT_BUDGET
@@ -0,0 +1,132 @@
+"""
+test_mesh.py
+
+Mesh generators, adjacency, node merging, mesh cleanup and space-filling-curve
+reordering.
+"""
+import numpy as np
+import pytest
+
+from feacalc import mesh as fea_mesh
+
+
+def test_clean_mesh_restores_exported_truss():
+    ref = fea_mesh.lattice_truss(4, 3, 2)
+    rng = np.random.default_rng(0)
+    # Exported with one node copy per element end, jittered, plus junk elements
+    nodes = ref.nodes[ref.elems.ravel()] + rng.normal(0.0, 1e-12, (ref.elems.size, 3))
+    elems = np.arange(ref.elems.size).reshape(-1, 2)
+    junk = np.concatenate([np.column_stack([elems[:3, 0], elems[:3, 0]]),   # zero length
+                           elems[:4, ::-1]])                               # reversed copies
+    dirty = fea_mesh.Mesh(nodes, np.concatenate([elems, junk]), 'bar')
+
+    clean, report = fea_mesh.clean_mesh(dirty, tol=1e-9)
+    assert clean.n_nodes == ref.n_nodes and clean.n_elems == ref.n_elems
+    assert report['degenerate'] == {'bar': 3} and report['duplicate'] == {'bar': 4}
+    assert report['merged'] == dirty.n_nodes - ref.n_nodes
+    assert np.array_equal(report['kept']['bar'], np.arange(ref.n_elems))
+    assert np.allclose(clean.nodes[clean.elems], ref.nodes[ref.elems], atol=1e-9)
+    assert np.all(report['node_map'][dirty.elems[:ref.n_elems]] == clean.elems)
+
+
+def test_clean_mesh_merges_mixed_blocks():
+    mixed = fea_mesh.MixedMesh.from_meshes(fea_mesh.rect_grid(2, 2), fea_mesh.rect_grid(2, 2))
+    mixed.add_block('bar', [[0, 0], [9, 10]])
+    clean, report = fea_mesh.clean_mesh(mixed)
+    assert clean.n_nodes == 9
+    assert clean.blocks['quad4'].shape == (4, 4) and clean.blocks['bar'].shape == (1, 2)
+    assert report['duplicate'] == {'quad4': 4, 'bar': 0}
+    assert report['degenerate'] == {'quad4': 0, 'bar': 1}
+
+
+def test_hilbert_codes_visit_grid_neighbours_in_turn():
+    for dim, bits in ((2, 4), (3, 3)):
+        axes = [np.arange(1 << bits, dtype=float)] * dim
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, dim)
+        path = grid[np.argsort(fea_mesh.curve_codes(grid, 'hilbert', bits))]
+        assert np.all(np.abs(np.diff(path, axis=0)).sum(axis=1) == 1.0)
+
+
+def test_reorder_mesh_round_trip():
+    mesh = fea_mesh.rect_grid(12, 7)
+    rng = np.random.default_rng(1)
+    shuffle = rng.permutation(mesh.n_nodes)
+    scrambled = fea_mesh.Mesh(mesh.nodes[shuffle], np.argsort(shuffle)[mesh.elems], 'quad4')
+
+    ordered, perm = fea_mesh.reorder_mesh(scrambled)
+    nodes, elems = perm['node_order'], perm['elem_order']['quad4']
+    assert np.array_equal(nodes[ordered.elems], scrambled.elems[elems])
+    u = rng.random(2 * ordered.n_nodes)
+    back = fea_mesh.restore_order(u, nodes, stride=2).reshape(-1, 2)
+    assert np.array_equal(back[nodes], u.reshape(-1, 2))
+    assert np.array_equal(fea_mesh.restore_order(np.arange(mesh.n_elems), elems)[elems],
+                          np.arange(mesh.n_elems))
+
+
+def test_pyramid_square_base_is_exact():
+    mesh = fea_mesh.pyramid_truss(base=1.0, height=1.0)
+    assert np.array_equal(mesh.nodes, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 0.0, 1.0],
+                                       [0.0, 0.0, 1.0], [0.5, 1.0, 0.5]])
+    assert np.array_equal(mesh.elems, [[0, 1], [1, 2], [2, 3], [3, 0],
+                                       [0, 4], [1, 4], [2, 4], [3, 4]])
+    ring = fea_mesh.tower_truss(2, width=3.0).nodes[:4]
+    assert np.array_equal(np.abs(ring[:, [0, 2]]), np.full((4, 2), 1.5))
+
+
+def test_generator_counts():
+    nx, ny, nz = 3, 2, 4
+    grid = fea_mesh.rect_grid(nx, ny)
+    assert grid.n_nodes == (nx + 1) * (ny + 1) and grid.elems.shape == (nx * ny, 4)
+
+    lines = nx * (ny + 1) * (nz + 1) + (nx + 1) * ny * (nz + 1) + (nx + 1) * (ny + 1) * nz
+    faces = nx * ny * (nz + 1) + (nx + 1) * ny * nz + nx * (ny + 1) * nz
+    assert fea_mesh.lattice_truss(nx, ny, nz).n_nodes == (nx + 1) * (ny + 1) * (nz + 1)
+    assert fea_mesh.lattice_truss(nx, ny, nz, diagonals=False).n_elems == lines
+    assert fea_mesh.lattice_truss(nx, ny, nz).n_elems == lines + faces
+
+    n_levels, n_sides = 3, 5
+    per_bracing = {None: 0, 'single': 1, 'x': 2}
+    for bracing, k in per_bracing.items():
+        tower = fea_mesh.tower_truss(n_levels, n_sides=n_sides, bracing=bracing)
+        assert tower.n_nodes == (n_levels + 1) * n_sides
+        assert tower.n_elems == (n_levels + 1) * n_sides + (1 + k) * n_levels * n_sides
+    assert fea_mesh.pyramid_truss(n_sides=6).n_elems == 12
+    for bad in (dict(n_levels=0), dict(n_levels=2, n_sides=2)):
+        with pytest.raises(ValueError):
+            fea_mesh.tower_truss(**bad)
+
+
+def _brute_adjacency(elems, n_nodes):
+    elems_of = [set() for _ in range(n_nodes)]
+    nbrs = [set() for _ in range(n_nodes)]
+    for e, row in enumerate(elems.tolist()):
+        for a in row:
+            elems_of[a].add(e)
+            nbrs[a].update(b for b in row if b != a)
+    return elems_of, nbrs
+
+
+def test_adjacency_matches_brute_force():
+    for mesh in (fea_mesh.rect_grid(3, 2), fea_mesh.lattice_truss(2, 2, 1),
+                 fea_mesh.tower_truss(2, n_sides=3, bracing='single')):
+        elems_of, nbrs = _brute_adjacency(mesh.elems, mesh.n_nodes)
+        ne, nn = mesh.node_elements, mesh.node_neighbors
+        assert len(ne) == len(nn) == mesh.n_nodes
+        for i in range(mesh.n_nodes):
+            assert sorted(ne[i].tolist()) == sorted(elems_of[i])
+            assert nn[i].tolist() == sorted(nbrs[i])
+        assert np.array_equal(ne.degree, [len(s) for s in elems_of])
+
+        vals = np.arange(mesh.n_elems, dtype=float)
+        expect = [np.mean(vals[sorted(s)]) for s in elems_of]
+        np.testing.assert_allclose(mesh.nodal_average(vals), expect)
+
+
+def test_mixed_node_elements_use_global_ids():
+    mixed = fea_mesh.MixedMesh.from_meshes(fea_mesh.rect_grid(2, 1))
+    mixed.add_block('bar', [[0, 5], [2, 3]])
+    # Quads are elements 0-1, the bars follow as 2-3
+    elems_of = [{0, 2}, {0, 1}, {1, 3}, {0, 3}, {0, 1}, {1, 2}]
+    adj = mixed.node_elements
+    for i in range(mixed.n_nodes):
+        assert sorted(adj[i].tolist()) == sorted(elems_of[i])
@@ -0,0 +1,86 @@
+"""
+test_mesh_data.py
+
+Buffer layout of MeshData: compact storage shares memory with the GPU
+buffers, and updates write in place.
+"""
+import numpy as np
+
+from visualiser.mesh_data import MeshData
+
+
+def _grid(nx=4, ny=3):
+    x, y = np.meshgrid(np.arange(nx + 1.0), np.arange(ny + 1.0), indexing='ij')
+    nodes = np.stack([x.ravel(), y.ravel()], axis=1)
+    idx = np.arange(nodes.shape[0]).reshape(nx + 1, ny + 1)
+    quads = np.stack([idx[:-1, :-1], idx[1:, :-1], idx[1:, 1:], idx[:-1, 1:]], -1).reshape(-1, 4)
+    return nodes, quads
+
+
+def test_compact_buffers_are_views():
+    nodes, quads = _grid()
+    disp = 0.1 * nodes
+    md = MeshData(nodes, quads, disp=disp, compact=True)
+    assert md._nodes3d.dtype == np.float32 and md.elems.dtype == np.int32
+    assert np.shares_memory(md.node_buffer, md._nodes3d)
+    assert np.shares_memory(md.nodes, md._nodes3d)
+    assert np.shares_memory(md.disp_buffer, md.disp)
+    np.testing.assert_array_equal(md.node_buffer.reshape(-1, 3)[:, :2], nodes)
+    np.testing.assert_array_equal(md.node_buffer.reshape(-1, 3)[:, 2], 0.0)
+
+    # The non-compact layout keeps separate float32 copies
+    loose = MeshData(nodes, quads, disp=disp)
+    assert not np.shares_memory(loose.node_buffer, loose._nodes3d)
+
+
+def test_updates_keep_buffer_identity_and_values():
+    nodes, quads = _grid()
+    for compact in (True, False):
+        md = MeshData(nodes, quads, disp=np.zeros_like(nodes), field=np.zeros(len(nodes)),
+                      compact=compact)
+        buffer, field = md.disp_buffer, md.field
+        new = np.random.default_rng(0).standard_normal(nodes.shape)
+        md.update_displacements(new)
+        if compact:                           # a fresh view of the same storage
+            assert np.shares_memory(md.disp_buffer, buffer)
+        else:
+            assert md.disp_buffer is buffer
+        np.testing.assert_allclose(md.disp_buffer.reshape(-1, 3)[:, :2], new, rtol=1e-6)
+        np.testing.assert_array_equal(md.disp_buffer.reshape(-1, 3)[:, 2], 0.0)
+        assert np.isclose(md.disp_extent, np.linalg.norm(new, axis=1).max(), rtol=1e-6)
+
+        md.update_field(np.arange(len(nodes)))
+        np.testing.assert_array_equal(md.field, np.arange(len(nodes)))
+        if compact:
+            assert md.field is field
+
+
+def test_mixed_blocks_share_one_line_buffer():
+    nodes, quads = _grid(2, 1)                  # quads [0, 2, 3, 1] and [2, 4, 5, 3]
+    bars = [[0, 5], [0, 2]]                     # the second retraces a quad edge
+    md = MeshData(nodes, {'quad4': quads, 'bar': bars}, chunk_size=None)
+    quad_block, bar_block = md.blocks
+    assert (quad_block.elem_offset, bar_block.elem_offset) == (0, 2) and md.n_elems == 4
+
+    # Shared quad edges are drawn once; bars keep their own lines after them
+    assert quad_block.lines.shape == (7, 2)
+    assert {frozenset(e) for e in quad_block.lines.tolist()} == {
+        frozenset(e) for q in quads.tolist() for e in zip(q, q[1:] + q[:1])}
+    np.testing.assert_array_equal(bar_block.lines, bars)
+    assert bar_block.line_offset == quad_block.line_count == 14
+    np.testing.assert_array_equal(md.lines, np.concatenate([quad_block.lines, bars]))
+    np.testing.assert_array_equal(md.index_buffer, md.lines.ravel())
+    assert quad_block.tri_buffer.size == 12 and bar_block.tri_buffer is None
+
+    # Every line maps to the global element that owns it
+    np.testing.assert_array_equal(md.line_elem, [0, 0, 0, 0, 1, 1, 1, 2, 3])
+    for line, eid in zip(md.lines.tolist(), md.line_elem):
+        assert set(line) <= set(md.element_nodes(eid).tolist())
+    np.testing.assert_array_equal(md.element_nodes(3), [0, 2])
+
+
+def test_bar_only_mesh_has_no_line_map():
+    nodes, _ = _grid(1, 1)
+    md = MeshData(nodes, [[0, 1], [1, 3], [3, 2]])
+    assert md.line_elem is None
+    np.testing.assert_array_equal(md.blocks[0].line_elem, [0, 1, 2])
@@ -0,0 +1,72 @@
+"""
+test_playback.py
+
+Frame staging of the playback and live feeds against a recording stand-in
+for the GL Scene: streamed positions and the culling padding of each frame.
+"""
+import numpy as np
+
+from feacalc.streaming import StateChannel
+from visualiser.live import LiveFeed
+from visualiser.mesh_data import MeshData
+from visualiser.playback import PlaybackController
+
+
+class RecordingScene:
+    """The part of Scene the feeds drive, without GL."""
+    def __init__(self, mesh_data):
+        self.mesh_data = mesh_data
+        self.frames = []
+
+    def create_disp_ring(self, n_slots=3):
+        pass
+
+    def stream_displacements(self, frame_buffer):
+        self.frames.append(frame_buffer.copy())
+
+
+def _mesh(n=20):
+    nodes = np.stack([np.linspace(0.0, 1.0, n), np.zeros(n)], axis=1)
+    return MeshData(nodes, np.stack([np.arange(n - 1), np.arange(1, n)], 1),
+                    disp=np.full((n, 2), 0.01), reorder='hilbert'), nodes
+
+
+def test_playback_updates_padding_per_frame():
+    md, nodes = _mesh()
+    steps = np.arange(6.0)[:, None, None]
+    history = steps * np.stack([np.zeros(len(nodes)), nodes[:, 0] ** 2], axis=1)[None]
+    scene = RecordingScene(md)
+    pb = PlaybackController(history, scene, prefetch=3, scale=5.0, loop=False)
+    pb.initialize_gl()
+    try:
+        for step in (0, 1, 4, 2, 5):
+            pb.seek(step)
+            pb.update()
+            u = history[step]
+            assert np.isclose(md.disp_extent, 5.0 * np.linalg.norm(u, axis=1).max(),
+                              rtol=1e-6)
+            pos = md.to_render_order(
+                np.column_stack([nodes + 5.0 * u, np.zeros(len(nodes))]), 'node')
+            np.testing.assert_allclose(scene.frames[-1].reshape(-1, 3), pos, rtol=1e-6)
+    finally:
+        pb.close()
+
+
+def test_live_feed_updates_padding_per_state():
+    md, nodes = _mesh()
+    channel = StateChannel(len(nodes))
+    try:
+        scene = RecordingScene(md)
+        feed = LiveFeed(channel, scene, scale=3.0)
+        for amp in (0.5, 2.0, 0.1):
+            u = np.stack([np.zeros(len(nodes)), amp * nodes[:, 0]], axis=1)
+            channel.publish(u, step=1)
+            assert feed.update()
+            assert np.isclose(md.disp_extent, 3.0 * amp, rtol=1e-6)
+            pos = md.to_render_order(
+                np.column_stack([nodes + 3.0 * u, np.zeros(len(nodes))]), 'node')
+            np.testing.assert_allclose(scene.frames[-1].reshape(-1, 3), pos, rtol=1e-6)
+        assert not feed.update()
+    finally:
+        channel.close()
+        channel.unlink()
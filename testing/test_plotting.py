@@ -0,0 +1,73 @@
+"""
+test_plotting.py
+
+Pixel-level thinning of large meshes and headless rendering to PNG/PDF.
+"""
+import numpy as np
+import pytest
+
+from feacalc import mesh as fea_mesh
+from feacalc.plotting import thin_to_pixels
+
+
+def test_thinning_keeps_one_primitive_per_pixel_cell_pair_and_the_peak():
+    rng = np.random.default_rng(0)
+    a = rng.random((5000, 2)) * 0.01                 # all inside one 0.1 pixel
+    b = a + 1e-3
+    values = rng.random(5000)
+    keep = thin_to_pixels(a, b, 0.1, values)
+    assert keep.size <= 4 and np.argmax(values) in keep
+
+    # Long segments survive unless they coincide at pixel resolution
+    starts = np.array([[0.0, 0.0], [0.0, 1.0], [0.01, 0.0]])
+    keep = thin_to_pixels(starts, starts + 5.0, 0.1)
+    assert list(keep) == [0, 1]
+    assert thin_to_pixels(a, b, 0.0).size == 5000
+
+
+@pytest.mark.parametrize('ext', ['png', 'pdf'])
+def test_save_plot_writes_file(tmp_path, ext):
+    pytest.importorskip('matplotlib')
+    from feacalc.plotting import save_plot
+    mesh = fea_mesh.tower_truss(40, n_sides=4)
+    u = np.zeros((mesh.n_nodes, 3))
+    u[:, 0] = 1e-2 * mesh.nodes[:, 1] ** 2
+    path = save_plot(tmp_path / f'tower.{ext}', mesh, u=u, field=np.arange(mesh.n_elems),
+                     axes=(0, 1), figsize=(3, 4), dpi=80)
+    assert (tmp_path / f'tower.{ext}').stat().st_size > 0 and path.endswith(ext)
+
+
+def _drawn(ax):
+    """(main, backdrop) collections of a plot_mesh Axes, colours resolved."""
+    ax.figure.canvas.draw()
+    colls = sorted(ax.collections, key=lambda c: c.get_zorder())
+    return colls[-1], colls[:-1]
+
+
+def test_field_colours_faces_and_lines():
+    pytest.importorskip('matplotlib')
+    from matplotlib import colormaps
+    from feacalc.plotting import plot_mesh
+    cmap = colormaps['viridis']
+
+    grid = fea_mesh.rect_grid(4, 3)
+    field = np.arange(grid.n_elems, dtype=float)
+    expect = cmap(field / field.max())
+    for u in (None, 0.01 * grid.nodes):
+        main, backdrop = _drawn(plot_mesh(grid, u=u, field=field, decimate=False,
+                                          undeformed=True, figsize=(3, 3), dpi=50))
+        np.testing.assert_allclose(main.get_facecolors(), expect)
+        assert len(backdrop) == (u is not None)
+        for coll in backdrop:                  # the undeformed shape stays grey
+            assert coll.get_array() is None and len(coll.get_facecolors()) == 0
+
+    tower = fea_mesh.tower_truss(3)
+    field = np.linspace(-1.0, 1.0, tower.n_elems)
+    main, backdrop = _drawn(plot_mesh(tower, u=0.01 * tower.nodes, field=field,
+                                      axes=(0, 1), decimate=False, figsize=(3, 3), dpi=50))
+    np.testing.assert_allclose(main.get_colors(), cmap((field + 1.0) / 2.0))
+    np.testing.assert_allclose(backdrop[0].get_colors(), [[0.65, 0.65, 0.65, 1.0]])
+
+    # Without a field polygons keep the fixed fill
+    main, _ = _drawn(plot_mesh(grid, figsize=(3, 3), dpi=50))
+    np.testing.assert_allclose(main.get_facecolors(), [[0.85, 0.85, 0.85, 1.0]])
@@ -0,0 +1,86 @@
+"""
+test_postprocessing.py
+
+Error estimation and adaptive refinement of quad4 meshes.
+"""
+import numpy as np
+import scipy.sparse.linalg as spla
+
+from feacalc import core
+from feacalc import mesh as fea_mesh
+from feacalc.postprocessing import mark_elements, zz_error
+from feacalc.utils import free_dofs, submatrix
+
+PROPS = {'E': 1.0, 'nu': 0.3}
+
+
+def _fixed(mesh):
+    return np.flatnonzero(np.repeat(mesh.nodes[:, 0] == 0.0, 2))
+
+
+def _tip_load(mesh):
+    f = np.zeros(2 * mesh.n_nodes)
+    tip = np.flatnonzero(mesh.nodes[:, 0] == mesh.nodes[:, 0].max())
+    f[2 * tip + 1] = -1.0 / tip.size
+    return f
+
+
+def test_zz_error_vanishes_for_uniform_stress():
+    mesh = fea_mesh.rect_grid(4, 3, lx=2.0, ly=1.0)
+    kernel = core.build_kernels(mesh, {'quad4': PROPS})['quad4']
+    u = np.zeros((mesh.n_nodes, 2))
+    u[:, 0] = 1e-3 * mesh.nodes[:, 0]
+    est = zz_error(kernel, u.ravel(), 2)
+    assert est['relative'] < 1e-12
+    assert mark_elements(np.ones(4), 0.5).size == 2
+
+
+def test_refinement_keeps_mesh_conforming():
+    mesh = fea_mesh.rect_grid(4, 2, lx=2.0, ly=1.0)
+    rng = np.random.default_rng(0)
+    for _ in range(4):
+        mesh, split, _ = fea_mesh.refine_quads(mesh, rng.choice(mesh.n_elems, 3,
+                                                                 replace=False))
+    # An edge used once is on the boundary, is the coarse side of a hanging
+    # node, or is half of such a side (one end hangs off the other)
+    elems = mesh.elems
+    a, b = elems.ravel(), np.roll(elems, -1, axis=1).ravel()
+    edges, count = np.unique(np.sort(np.column_stack([a, b]), axis=1), axis=0,
+                             return_counts=True)
+    assert count.max() <= 2
+    masters = {int(h): {int(p), int(q)} for h, p, q in mesh.hanging}
+    coarse = {frozenset(map(int, row[1:])) for row in mesh.hanging}
+    x, y = mesh.nodes.T
+    for i, j in edges[count == 1]:
+        on_boundary = ((x[i] == x[j] and x[i] in (0.0, 2.0))
+                       or (y[i] == y[j] and y[i] in (0.0, 1.0)))
+        half = j in masters.get(i, ()) or i in masters.get(j, ())
+        assert on_boundary or half or frozenset((i, j)) in coarse
+
+
+def _compliance(mesh):
+    """f . u of a direct solve on a conforming mesh."""
+    K = core.assemble_stiffness(core.build_kernels(mesh, {'quad4': PROPS}), mesh.n_nodes)
+    f = _tip_load(mesh)
+    free = free_dofs(K.shape[0], _fixed(mesh))
+    return f[free] @ spla.spsolve(submatrix(K, free).tocsc(), f[free])
+
+
+def test_incremental_assembly_matches_fresh_and_error_drops():
+    mesh = fea_mesh.rect_grid(4, 2, lx=2.0, ly=1.0)
+    asm = core.IncrementalAssembler(mesh, PROPS)
+    refined, split, _ = fea_mesh.refine_quads(mesh, [3, 7])
+    asm.update(refined, split, 4 * split.size)
+    fresh = core.assemble_stiffness(core.build_kernels(refined, {'quad4': PROPS}),
+                                    refined.n_nodes)
+    assert abs(asm.K - fresh).max() < 1e-12
+
+    out = core.adaptive_solve(mesh, PROPS, _fixed, _tip_load, target=0.0, max_cycles=3)
+    errors = [rel for _, rel, _ in out['history']]
+    assert len(errors) == 4 and errors[-1] < errors[0]
+
+    # Displacement FE compliance converges from below: the adaptive mesh
+    # gains on the coarse one and stays under a uniform mesh 8x finer per side
+    adaptive = _tip_load(out['mesh']) @ out['u']
+    fine = fea_mesh.rect_grid(32, 16, lx=2.0, ly=1.0)
+    assert _compliance(mesh) < adaptive <= _compliance(fine)
@@ -0,0 +1,61 @@
+"""
+test_sensitivity.py
+
+Adjoint gradients against central finite differences, and the truss sizing
+loop.
+"""
+import numpy as np
+import pytest
+
+from feacalc import mesh as fea_mesh
+from feacalc.elements import BarKernel
+from feacalc.sensitivity import StaticSensitivity, size_truss
+
+
+def _tower():
+    mesh = fea_mesh.tower_truss(4, n_sides=4)
+    rng = np.random.default_rng(0)
+    A = rng.uniform(1e-3, 2e-3, mesh.n_elems)
+    E = rng.uniform(1e11, 2e11, mesh.n_elems)
+    fixed = np.flatnonzero(np.repeat(mesh.nodes[:, 1] == 0.0, 3))
+    top = np.flatnonzero(mesh.nodes[:, 1] == mesh.nodes[:, 1].max())
+    f = np.zeros(3 * mesh.n_nodes)
+    f[3 * top] = 1e4
+    f[3 * top + 1] = -2e4
+    return mesh, {'A': A, 'E': E}, fixed, f, 3 * top[0]
+
+
+@pytest.mark.parametrize('param', ['A', 'E'])
+def test_adjoint_gradients_match_finite_differences(param):
+    mesh, props, fixed, f, dof = _tower()
+    stressed = [5, 7]
+
+    def responses(x):
+        kw = dict(props, **{param: x})
+        sens = StaticSensitivity(BarKernel(mesh.nodes, mesh.elems, kw['E'], kw['A']),
+                                 fixed, f, param)
+        return sens, sens.compliance(), sens.displacement(dof), sens.stress(stressed)
+
+    x0 = props[param]
+    sens, (_, dc), (_, dq), (_, ds) = responses(x0)
+    assert sens.solves == 1 + 1 + len(stressed)
+    for j in (11, 20):
+        h = 1e-4 * x0[j]                          # smaller steps are round-off bound
+        plus, minus = x0.copy(), x0.copy()
+        plus[j] += h
+        minus[j] -= h
+        _, cp, qp, sp_ = responses(plus)
+        _, cm, qm, sm = responses(minus)
+        assert np.isclose(dc[j], (cp[0] - cm[0]) / (2 * h), rtol=1e-5)
+        assert np.isclose(dq[j], (qp[0] - qm[0]) / (2 * h), rtol=1e-5)
+        assert np.allclose(ds[:, j], (sp_[0] - sm[0]) / (2 * h), rtol=1e-5, atol=1e-9 * abs(ds).max())
+
+
+def test_sizing_lowers_compliance_at_fixed_volume():
+    mesh, props, fixed, f, _ = _tower()
+    L = BarKernel(mesh.nodes, mesh.elems, 1.0, 1.0).L0
+    volume = float(props['A'] @ L)
+    out = size_truss(mesh.nodes, mesh.elems, 2e11, fixed, f, volume)
+    assert out['converged']
+    assert out['A'] @ L <= volume * (1 + 1e-9)
+    assert out['compliance'] < 0.5 * out['history'][0]
@@ -0,0 +1,182 @@
+"""
+test_solver.py
+
+Accuracy checks of the mixed-precision and domain-decomposition solve paths
+against a pure float64 direct solve, and the on-disk solver cache.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from feacalc import core, domain
+from feacalc import mesh as fea_mesh
+from feacalc.solver import (DOUBLE, MIXED, SINGLE, CachedSolver, Factorization,
+                            RefinedSolver, SolverCache, content_hash, factorize,
+                            model_key)
+from feacalc.utils import free_dofs, submatrix
+
+
+def _cantilever(dtype, nx=40, ny=8):
+    """Plane-stress cantilever clamped at x = 0 with a tip shear load."""
+    mesh = fea_mesh.rect_grid(nx, ny, lx=10.0, ly=2.0)
+    kernels = core.build_kernels(mesh, {'quad4': {'E': 210e9, 'nu': 0.3, 't': 0.01}})
+    K = core.assemble_stiffness(kernels, mesh.n_nodes, dtype=dtype)
+    x = mesh.nodes[:, 0]
+    fixed = np.flatnonzero(np.repeat(x == 0.0, 2))
+    free = free_dofs(K.shape[0], fixed)
+    f = np.zeros(K.shape[0])
+    f[2 * np.flatnonzero(x == x.max()) + 1] = -1e3
+    return submatrix(K, free), f[free]
+
+
+def _rel_err(x, ref):
+    return np.linalg.norm(x - ref) / np.linalg.norm(ref)
+
+
+def test_float32_storage_halves_matrix_values():
+    K64, _ = _cantilever(DOUBLE.storage)
+    K32, _ = _cantilever(SINGLE.storage)
+    assert K32.dtype == np.float32
+    assert K32.data.nbytes * 2 == K64.data.nbytes
+    assert abs(K32.astype(np.float64) - K64).max() <= 1e-6 * abs(K64).max()
+
+
+def test_mixed_policy_matches_float64():
+    K, f = _cantilever(MIXED.storage)
+    ref = Factorization(K).solve(f)
+    solver = factorize(K, MIXED)
+    assert isinstance(solver, RefinedSolver)
+    x = solver.solve(f)
+    assert x.dtype == np.float64
+    assert solver.residual <= 1e-14
+    assert solver._fact.dtype == np.float32
+    assert _rel_err(x, ref) < 1e-9
+
+
+def test_single_policy_matches_float64_to_storage_rounding():
+    K64, f = _cantilever(DOUBLE.storage)
+    K32, _ = _cantilever(SINGLE.storage)
+    ref = Factorization(K64).solve(f)
+    x = factorize(K32, SINGLE).solve(f)
+    # Exact for the float32-rounded matrix, so off by ~cond * eps32 at most
+    assert _rel_err(x, ref) < 1e-2
+    assert _rel_err(x, Factorization(K32, dtype=np.float64).solve(f)) < 1e-9
+
+
+def test_unrefined_float32_factor_is_less_accurate():
+    K, f = _cantilever(DOUBLE.storage)
+    ref = Factorization(K).solve(f)
+    plain = Factorization(K, dtype=np.float32).solve(f)
+    refined = RefinedSolver(K).solve(f)
+    assert _rel_err(refined, ref) < _rel_err(plain, ref)
+
+
+def test_dense_and_multiple_rhs():
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((60, 60)) + 60.0 * np.eye(60)
+    B = rng.standard_normal((60, 3))
+    ref = np.linalg.solve(A, B)
+    assert _rel_err(RefinedSolver(A).solve(B), ref) < 1e-12
+
+
+def test_ill_conditioned_falls_back_to_float64():
+    rng = np.random.default_rng(1)
+    Q, _ = np.linalg.qr(rng.standard_normal((80, 80)))
+    A = (Q * np.logspace(0, -10, 80)) @ Q.T            # cond = 1e10 > 1 / eps32
+    b = rng.standard_normal(80)
+    solver = RefinedSolver(A)
+    x = solver.solve(b)
+    assert solver._fact.dtype == np.float64
+    assert _rel_err(x, Factorization(A).solve(b)) < 1e-12
+
+
+@pytest.mark.parametrize('n_workers', [0, 2])
+def test_domain_decomposition_matches_direct(n_workers):
+    nx, ny = 20, 4
+    mesh = fea_mesh.rect_grid(nx, ny, lx=10.0, ly=2.0)
+    K, f = _cantilever(DOUBLE.storage, nx, ny)
+    free = free_dofs(2 * mesh.n_nodes, np.flatnonzero(np.repeat(mesh.nodes[:, 0] == 0.0, 2)))
+    ref = Factorization(K).solve(f)
+    for labels in (domain.coordinate_bisection(mesh.nodes, 2),
+                   domain.graph_bisection(mesh.node_neighbors, 2)):
+        with domain.DomainDecompositionSolver(K, domain.dof_parts(labels, 2, free),
+                                              n_workers=n_workers, tol=1e-12) as solver:
+            assert _rel_err(solver.solve(f), ref) < 1e-9
+
+
+def _never():
+    raise AssertionError("matrix built on a cache hit")
+
+
+def test_cache_round_trip_hits(tmp_path):
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((40, 40)) + 40.0 * np.eye(40)
+    b, c = rng.standard_normal((2, 40))
+    cache = SolverCache(tmp_path)
+    first = CachedSolver(A, cache, key='model')
+    x = first.solve(b)
+
+    # A fresh solver on the same key answers b without building A ...
+    again = CachedSolver(_never, cache, key='model')
+    assert np.array_equal(again.solve(b), x)
+    # ... and loads the stored factors instead of refactoring for a new rhs
+    loaded = again.factorization
+    for name, value in first.factorization.to_arrays().items():
+        assert np.array_equal(loaded.to_arrays()[name], value)
+    assert np.array_equal(again.solve(c), first.factorization.solve(c))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    x = np.zeros(1000)
+    cache = SolverCache(tmp_path, max_bytes=int(2.5 * (x.nbytes + 300)))
+    rhs = [np.full(3, float(i)) for i in range(3)]
+    for i in (0, 1):
+        cache.put_solution('m', rhs[i], x)
+        stamp = float(i + 1)                               # 0 older than 1
+        os.utime(tmp_path / f'm.{content_hash(rhs[i])}.sol.npz', (stamp, stamp))
+    assert cache.get_solution('m', rhs[0]) is not None     # 0 becomes the newest
+    cache.put_solution('m', rhs[2], x)
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.get_solution('m', rhs[1]) is None
+    assert cache.get_solution('m', rhs[0]) is not None
+    assert cache.get_solution('m', rhs[2]) is not None
+
+
+def test_cache_misses_on_model_or_precision_change(tmp_path):
+    mesh = fea_mesh.rect_grid(2, 2)
+    props = {'quad4': {'E': 200.0, 'nu': 0.3}}
+    key = model_key(mesh.nodes, mesh.blocks, props, [0, 1])
+    assert key == model_key(mesh.nodes.copy(), mesh.blocks, props, [1, 0])
+    for changed in (model_key(mesh.nodes, mesh.blocks, {'quad4': {'E': 210.0, 'nu': 0.3}},
+                              [0, 1]),
+                    model_key(mesh.nodes, mesh.blocks, props, [0, 1, 2]),
+                    model_key(mesh.nodes, mesh.blocks, props, [0, 1], policy=MIXED),
+                    model_key(mesh.nodes, mesh.blocks, props, [0, 1], policy=SINGLE)):
+        assert changed != key
+    assert model_key(mesh.nodes, mesh.blocks, props, [0, 1], policy=DOUBLE) == key
+
+    rng = np.random.default_rng(3)
+    A = rng.standard_normal((30, 30)) + 30.0 * np.eye(30)
+    b = rng.standard_normal(30)
+    cache = SolverCache(tmp_path)
+    CachedSolver(A, cache, key=key).solve(b)
+    mixed = CachedSolver(lambda: A, cache, key=key, policy=MIXED)
+    assert mixed.key != CachedSolver(_never, cache, key=key).key
+    assert isinstance(mixed.factorization, RefinedSolver)
+    assert mixed.solve(b).dtype == np.float64
+    # Matrices of another dtype hash apart when no key is given
+    assert (CachedSolver(A, cache).key
+            != CachedSolver(A.astype(np.float32), cache).key)
+    with pytest.raises(AssertionError):
+        CachedSolver(_never, cache, key=model_key(mesh.nodes, mesh.blocks, props,
+                                                    [0, 1, 2])).solve(b)
+
+
+def test_float32_matrix_factors_in_float64_by_default():
+    K32, f = _cantilever(SINGLE.storage)
+    for solver in (Factorization(K32), factorize(K32)):
+        assert solver.dtype == np.float64
+        assert solver.solve(f).dtype == np.float64
+    assert Factorization(K32, dtype=np.float32).dtype == np.float32
+    assert factorize(K32, SINGLE)._fact.dtype == np.float32
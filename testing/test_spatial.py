@@ -0,0 +1,110 @@
+"""
+test_spatial.py
+
+Headless checks of the renderer's spatial chunking, frustum culling, LOD
+proxies and ray picking.
+"""
+import numpy as np
+
+from visualiser import spatial
+from visualiser.camera import Camera
+from visualiser.mesh_data import MeshData
+from visualiser.picker import Picker
+from visualiser.projection_manager import ProjectionManager
+
+
+def _lattice(n=12, spacing=0.1):
+    """Cubic bar lattice of n^3 nodes centred on the origin."""
+    g = np.stack(np.meshgrid(*[np.arange(n)] * 3, indexing='ij'), -1).reshape(-1, 3)
+    idx = np.arange(n ** 3).reshape(n, n, n)
+    bars = np.concatenate([
+        np.stack([idx[:-1].ravel(), idx[1:].ravel()], 1),
+        np.stack([idx[:, :-1].ravel(), idx[:, 1:].ravel()], 1),
+        np.stack([idx[:, :, :-1].ravel(), idx[:, :, 1:].ravel()], 1)])
+    return (g - 0.5 * (n - 1)) * spacing, bars
+
+
+def _planes(camera):
+    P = ProjectionManager().get_proj_matrix(camera, 1.0)
+    return spatial.frustum_planes(P @ camera.get_view_matrix())
+
+
+def test_chunks_partition_all_elements():
+    nodes, bars = _lattice()
+    md = MeshData(nodes, bars, chunk_size=256)
+    assert md.n_chunks == -(-bars.shape[0] // 256)
+    assert np.array_equal(np.sort(md.chunk_order), np.arange(bars.shape[0]))
+    assert md.chunk_offsets[0] == 0
+    assert np.array_equal(md.chunk_offsets[1:], np.cumsum(md.chunk_counts)[:-1])
+    assert md.chunk_counts.sum() == md.index_buffer.size == bars.size
+
+    # Every chunk box encloses the edges drawn from its index range
+    for k in range(md.n_chunks):
+        ids = md.index_buffer[md.chunk_offsets[k]:md.chunk_offsets[k] + md.chunk_counts[k]]
+        pts = md._nodes3d[ids]
+        assert np.all(pts >= md.chunk_min[k] - 1e-6) and np.all(pts <= md.chunk_max[k] + 1e-6)
+
+
+def test_lod_proxies_stay_inside_their_chunks():
+    nodes, bars = _lattice()
+    md = MeshData(nodes, bars, chunk_size=256)
+    assert np.all(md.lod_counts <= md.chunk_counts) and md.lod_counts.sum() > 0
+    for k in range(md.n_chunks):
+        lod = md.lod_index_buffer[md.lod_offsets[k]:md.lod_offsets[k] + md.lod_counts[k]]
+        full = md.index_buffer[md.chunk_offsets[k]:md.chunk_offsets[k] + md.chunk_counts[k]]
+        assert np.isin(lod, full).all()
+        assert np.all(lod.reshape(-1, 2)[:, 0] != lod.reshape(-1, 2)[:, 1])
+
+
+def test_frustum_keeps_everything_inside_and_culls_everything_outside():
+    nodes, bars = _lattice()
+    md = MeshData(nodes, bars, chunk_size=256)
+    camera = Camera(position=(0.0, 0.0, 5.0))
+    planes = _planes(camera)
+    assert spatial.boxes_in_frustum(planes, md.chunk_min, md.chunk_max).all()
+
+    behind = spatial.boxes_in_frustum(planes, md.chunk_min + [0.0, 0.0, 20.0],
+                                      md.chunk_max + [0.0, 0.0, 20.0])
+    aside = spatial.boxes_in_frustum(planes, md.chunk_min + [50.0, 0.0, 0.0],
+                                     md.chunk_max + [50.0, 0.0, 0.0])
+    assert not behind.any() and not aside.any()
+
+
+def _picker(md, camera):
+    return Picker(md, camera, ProjectionManager(), pixel_tol=4.0)
+
+
+def test_pick_ray_through_node_returns_front_most_node():
+    # A column of nodes on the view axis plus off-axis ones
+    nodes = np.array([[0.0, 0.0, -1.0], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0],
+                      [0.5, 0.5, 2.0], [-0.5, 0.2, 1.5]])
+    md = MeshData(nodes, [[0, 1], [1, 2], [3, 4]], field=np.arange(5.0))
+    picker = _picker(md, Camera(position=(0.0, 0.0, 5.0)))
+    hit = picker.pick(400, 300, 800, 600, kind='node')
+    assert hit['id'] == 1 and hit['field'] == 1.0
+    np.testing.assert_allclose(hit['coords'], nodes[1])
+    assert picker.pick(0, 0, 800, 600, kind='node') is None
+
+    # Picking goes through the LeafIndex with many leaves as well
+    lat, bars = _lattice(n=8, spacing=0.25)
+    md = MeshData(lat, bars, chunk_size=64)
+    target = int(np.argmin(np.linalg.norm(lat - [0.125, 0.125, 0.875], axis=1)))
+    camera = Camera(position=lat[target] + [0.0, 0.0, 4.0], target=lat[target])
+    assert _picker(md, camera).pick(400, 300, 800, 600, kind='node')['id'] == target
+
+
+def test_pick_element_prefers_front_most_edge():
+    # Two bars crossing the view axis at different depths, listed back first
+    nodes = np.array([[-1.0, 0.0, -1.0], [1.0, 0.0, -1.0], [0.0, -1.0, 1.0], [0.0, 1.0, 1.0]])
+    md = MeshData(nodes, [[0, 1], [2, 3]], field=[10.0, 20.0])
+    hit = _picker(md, Camera(position=(0.0, 0.0, 5.0))).pick(400, 300, 800, 600,
+                                                              kind='element')
+    assert hit['id'] == 1 and hit['field'] == 20.0
+    np.testing.assert_allclose(hit['coords'], [0.0, 0.0, 1.0])
+
+    # Quads report the element that owns the hit edge
+    quads = MeshData(np.array([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0],
+                               [-1, -1, 2], [1, -1, 2], [1, 1, 2], [-1, 1, 2]], float),
+                     [[0, 1, 2, 3], [4, 5, 6, 7]])
+    camera = Camera(position=(1.0, 0.0, 5.0), target=(1.0, 0.0, 0.0))
+    assert _picker(quads, camera).pick(400, 300, 800, 600, kind='element')['id'] == 1
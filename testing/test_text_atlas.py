@@ -0,0 +1,43 @@
+"""
+test_text_atlas.py
+
+String layout of the HUD glyph atlas, on a synthetic atlas (no PIL needed).
+"""
+import numpy as np
+
+from visualiser.text_atlas import FIRST_CHAR, LAST_CHAR, GlyphAtlas
+
+
+def _atlas(cell=(6, 10), columns=16, baseline=8):
+    rows = -(-(LAST_CHAR - FIRST_CHAR + 1) // columns)
+    bitmap = np.zeros((rows * cell[1], columns * cell[0]), dtype=np.uint8)
+    advance = np.zeros(256)
+    advance[FIRST_CHAR:LAST_CHAR + 1] = 4 + np.arange(FIRST_CHAR, LAST_CHAR + 1) % 3
+    return GlyphAtlas(bitmap, cell, columns, baseline, advance)
+
+
+def test_layout_quads_follow_the_pen():
+    atlas = _atlas()
+    text = 'AbC d'
+    quads = atlas.layout(text, 10.0, 20.0).reshape(len(text), 4, 4)
+    assert quads.dtype == np.float32 and quads.shape == (5, 4, 4)
+
+    adv = atlas.advance[[ord(c) for c in text]]
+    pen = 10.0 + np.concatenate([[0.0], np.cumsum(adv[:-1])])
+    np.testing.assert_array_equal(quads[:, 0, 0], pen)
+    np.testing.assert_array_equal(quads[:, 1, 0], pen + 6)
+    np.testing.assert_array_equal(quads[:, :, 1], [[18.0, 18.0, 28.0, 28.0]] * 5)
+    assert atlas.text_width(text) == adv.sum()
+
+    # 'A' is slot 33: column 1, row 2 of the 96 x 60 bitmap; t0 is the cell top
+    s0, t1 = quads[0, 0, 2:]
+    s1, t0 = quads[0, 2, 2:]
+    np.testing.assert_allclose([s0, t0, s1, t1], [6 / 96, 20 / 60, 12 / 96, 30 / 60])
+    assert atlas.layout('', 0.0, 0.0).shape == (0, 4)
+
+
+def test_non_ascii_and_control_characters_draw_as_question_marks():
+    atlas = _atlas()
+    expect = atlas.layout('a??b', 3.0, 4.0)
+    np.testing.assert_array_equal(atlas.layout('aé\tb', 3.0, 4.0), expect)
+    assert atlas.text_width('é') == atlas.advance[ord('?')]
@@ -0,0 +1,60 @@
+"""
+test_transient.py
+
+Accuracy of the implicit Newmark / HHT-alpha integrator on a single-DOF
+oscillator with a closed-form response.
+"""
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from feacalc.transient import NewmarkSolver
+
+OMEGA = 2.0 * np.pi
+
+
+def _free_vibration(alpha, dt, n_steps, sparse=False):
+    """Undamped m = 1, k = omega^2 oscillator released from u = 1."""
+    K = np.array([[OMEGA ** 2]])
+    solver = NewmarkSolver(sp.csr_matrix(K) if sparse else K, np.array([1.0]), dt,
+                           alpha=alpha)
+    return solver.run(n_steps, np.zeros(1), u0=[1.0])
+
+
+def test_average_acceleration_matches_cosine():
+    # Phase error of the trapezoidal rule is (omega dt)^2 / 12 per radian:
+    # about 4e-7 over half a period at this step
+    dt = 2.5e-4
+    for sparse in (False, True):
+        out = _free_vibration(0.0, dt, 2000, sparse)
+        t = out['times']
+        np.testing.assert_allclose(out['history'][:, 0], np.cos(OMEGA * t), atol=1e-6)
+        assert abs(out['v'][0] + OMEGA * np.sin(OMEGA * t[-1])) < 1e-5
+
+
+def test_average_acceleration_conserves_energy():
+    out = _free_vibration(0.0, 0.05, 400)
+    energy = 0.5 * out['v'][0] ** 2 + 0.5 * OMEGA ** 2 * out['u'][0] ** 2
+    assert np.isclose(energy, 0.5 * OMEGA ** 2, rtol=1e-10)
+
+
+def test_hht_alpha_damps_amplitude():
+    # Coarse step (omega dt ~ 1.3): high-frequency content HHT is meant to damp
+    dt, n = 0.2, 100
+    peaks = []
+    for alpha in (0.0, -0.1, -0.3):
+        out = _free_vibration(alpha, dt, n)
+        peaks.append(np.abs(out['history'][-10:, 0]).max())
+    assert np.isclose(peaks[0], 1.0, atol=1e-2)
+    assert peaks[0] > peaks[1] > peaks[2]
+    assert peaks[2] < 0.5
+
+
+def test_load_history_rows_are_checked_up_front(tmp_path):
+    solver = NewmarkSolver(np.array([[OMEGA ** 2]]), np.array([1.0]), 0.01)
+    out_path = tmp_path / 'u.npy'
+    with pytest.raises(ValueError, match='rows'):
+        solver.run(10, np.zeros((10, 1)), out_path=str(out_path))
+    assert not out_path.exists()
+    forced = solver.run(10, np.ones((11, 1)))
+    np.testing.assert_allclose(forced['history'][-1], solver.run(10, np.ones(1))['history'][-1])
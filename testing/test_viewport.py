@@ -0,0 +1,135 @@
+"""
+test_viewport.py
+
+Headless checks of the split-window layout, pane hit-testing and per-pane
+pick results.
+"""
+import numpy as np
+import pytest
+
+from visualiser.camera import Camera
+from visualiser.mesh_data import MeshData
+from visualiser.picker import Picker
+from visualiser.projection_manager import ProjectionManager
+from visualiser.viewport import Viewport, grid_layout, pane_at
+
+
+def test_grid_layout_fills_rows_from_the_top_left():
+    assert grid_layout(1, 800, 600) == [(0, 0, 800, 600)]
+    # GL origin is bottom left, so the first row has the larger y
+    assert grid_layout(4, 800, 600) == [(0, 300, 400, 300), (400, 300, 400, 300),
+                                        (0, 0, 400, 300), (400, 0, 400, 300)]
+    assert grid_layout(3, 800, 600) == [(0, 300, 400, 300), (400, 300, 400, 300),
+                                        (0, 0, 400, 300)]
+    assert grid_layout(3, 900, 600, cols=3) == [(0, 0, 300, 600), (300, 0, 300, 600),
+                                                (600, 0, 300, 600)]
+    assert grid_layout(5, 801, 601, cols=2)[-1] == (0, 1, 400, 200)
+
+
+def test_pane_at_flips_window_y():
+    rects = grid_layout(4, 800, 600)
+    # GLUT positions: origin top left
+    assert pane_at(rects, 0, 0, 600) == 0
+    assert pane_at(rects, 799, 0, 600) == 1
+    assert pane_at(rects, 0, 599, 600) == 2
+    assert pane_at(rects, 400, 300, 600) == 3           # pixel rows 0-299 are the top row
+    assert pane_at(rects, 399, 299, 600) == 0
+    assert pane_at(rects, 800, 10, 600) is None
+    assert pane_at(rects, 10, 600, 600) is None
+    assert pane_at(grid_layout(3, 800, 600), 600, 500, 600) is None   # empty grid cell
+
+
+def test_picks_report_the_active_panes_case():
+    g = np.stack(np.meshgrid(np.arange(6.0), np.arange(6.0), indexing='ij'), -1).reshape(-1, 2)
+    nodes = np.column_stack([g - 2.5, np.zeros(len(g))])
+    bars = [[i, i + 1] for i in range(len(g) - 1)]
+    md = MeshData(nodes, bars, disp=np.zeros((len(g), 3)), reorder='hilbert')
+    target = int(np.argmin(np.linalg.norm(nodes - [0.5, 0.5, 0.0], axis=1)))
+
+    camera = Camera(position=nodes[target] + [0.0, 0.0, 5.0], target=nodes[target])
+    picker = Picker(md, camera, ProjectionManager(), pixel_tol=4.0)
+    assert np.array_equal(picker.pick(400, 300, 800, 600)['disp'], [0.0, 0.0, 0.0])
+
+    rng = np.random.default_rng(0)
+    panes = [Viewport(camera, disp=rng.random((len(g), 3)), field=rng.random(len(g))),
+             Viewport(camera, disp=rng.random((len(g), 3)), field=rng.random(len(bars))),
+             Viewport(camera)]
+    for vp in panes:
+        picker.set_case(*vp.render_case(md))
+        hit = picker.pick(400, 300, 800, 600)
+        assert hit['id'] == target
+        if vp.disp is None:
+            assert hit['disp'] is None and hit['field'] is None
+            continue
+        np.testing.assert_array_equal(hit['disp'], vp.disp[target])
+        assert hit['field'] == (vp.field[target] if vp.field.size == len(g) else None)
+
+    # Element picks average the pane's displacements over the element's nodes
+    picker.set_case(*panes[1].render_case(md))
+    hit = picker.pick(400, 300, 800, 600, kind='element')
+    assert hit['field'] == panes[1].field[hit['id']]
+    np.testing.assert_allclose(hit['disp'], panes[1].disp[bars[hit['id']]].mean(axis=0))
+
+
+def test_ring_fields_follow_their_own_entity():
+    # A closed ring has as many bars as nodes, so length cannot tell them apart
+    n = 12
+    theta = 2.0 * np.pi * np.arange(n) / n
+    nodes = np.column_stack([np.cos(theta), np.sin(theta), np.zeros(n)])
+    bars = np.column_stack([np.arange(n), (np.arange(n) + 1) % n])
+    efield = np.arange(n, dtype=float) * 10.0
+    md = MeshData(nodes, bars, field=efield, field_kind='element', reorder='hilbert')
+    assert not np.array_equal(md.node_order, md.elem_order)
+    np.testing.assert_array_equal(md.field, efield[md.elem_order])
+    np.testing.assert_array_equal(md.to_render_order(efield, 'node'), efield[md.node_order])
+    with pytest.raises(ValueError):
+        md.to_render_order(efield)
+    with pytest.raises(ValueError):
+        MeshData(nodes, bars, field=efield, reorder='hilbert')
+    with pytest.raises(ValueError):
+        md.to_render_order(efield[:5], 'element')
+
+    # Element picks report the picked bar's own value, node picks none
+    camera = Camera(position=(0.0, 1.0, 5.0), target=(0.0, 1.0, 0.0))
+    picker = Picker(md, camera, ProjectionManager(), pixel_tol=4.0)
+    hit = picker.pick(400, 300, 800, 600, kind='element')
+    assert hit['field'] == efield[hit['id']]
+    assert picker.pick(400, 300, 800, 600, kind='node')['field'] is None
+
+    md.update_field(efield[::-1], 'element')
+    assert picker.pick(400, 300, 800, 600, kind='element')['field'] == efield[::-1][hit['id']]
+    vp = Viewport(camera, field=efield + 1.0, field_kind='element')
+    picker.set_case(*vp.render_case(md))
+    assert picker.pick(400, 300, 800, 600, kind='element')['field'] == efield[hit['id']] + 1.0
+
+
+class UploadScene:
+    """Scene stand-in recording position uploads into a pane's buffer."""
+    def __init__(self, mesh_data):
+        self.mesh_data = mesh_data
+        self.uploads = []
+
+    def upload_positions(self, buffer, vbo=None):
+        self.uploads.append(buffer.copy())
+        return vbo if vbo is not None else len(self.uploads)
+
+
+def test_set_case_resets_extent_and_refreshes_picks():
+    nodes = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    md = MeshData(nodes, [[0, 1], [1, 2]])
+    scene = UploadScene(md)
+    camera = Camera(position=(0.0, 0.0, 5.0), target=(0.0, 0.0, 0.0))
+    vp = Viewport(camera, disp=np.full((3, 3), 0.5), field=[1.0, 2.0, 3.0], scale=2.0)
+    vp.initialize_gl(scene)
+    assert np.isclose(vp.disp_extent, 2.0 * np.sqrt(0.75))
+
+    picker = Picker(md, camera, ProjectionManager(), pixel_tol=4.0)
+    picker.set_case(*vp.render_case(md))
+    assert picker.pick(400, 300, 800, 600)['field'] == 1.0
+
+    vp.set_case(scene, disp=None, field=[7.0, 8.0], field_kind='element', picker=picker)
+    assert vp.disp_extent == 0.0 and len(scene.uploads) == 2
+    np.testing.assert_array_equal(scene.uploads[-1], md.node_buffer)
+    hit = picker.pick(400, 300, 800, 600)
+    assert hit['disp'] is None and hit['field'] is None
+    assert picker.pick(400, 300, 800, 600, kind='element')['field'] == 7.0
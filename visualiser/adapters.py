@@ -8,7 +8,6 @@ and optionally a Scene.
 """
 import numpy as np
 from .mesh_data import MeshData
-from .scene import Scene
 
 class VisualData:
     """
@@ -21,32 +20,52 @@ class VisualData:
                  elements,
                  displacements=None,
                  scalar_field=None,
-                 bc_flags=None):
+                 bc_flags=None,
+                 field_kind=None):
         self.nodes = np.asarray(nodes, dtype=float)
-        self.elements = np.asarray(elements, dtype=int)
+        if isinstance(elements, dict):
+            # Mixed mesh: one connectivity array per element type
+            self.elements = {t: np.asarray(e, dtype=int) for t, e in elements.items()}
+        else:
+            self.elements = np.asarray(elements, dtype=int)
         self.displacements = (np.asarray(displacements, dtype=float)
                               if displacements is not None else None)
         self.scalar_field = (np.asarray(scalar_field, dtype=float)
                               if scalar_field is not None else None)
         self.bc_flags = bc_flags or {}
+        self.field_kind = field_kind    # 'node' / 'element', see MeshData.value_kind
 
-    def to_mesh_data(self):
+    def to_mesh_data(self, compact=False, reorder=None):
         """
         Construct and return a MeshData instance from stored arrays.
+
+        Args:
+            compact: build a compact MeshData that converts the stored arrays
+                     once into float32/int32 storage shared with its GPU buffers.
+            reorder: space-filling curve ('hilbert' or 'morton') to renumber
+                     the mesh along for locality, or None.
         """
         return MeshData(
             nodes=self.nodes,
             elems=self.elements,
             disp=self.displacements,
-            field=self.scalar_field
+            field=self.scalar_field,
+            field_kind=self.field_kind,
+            compact=compact,
+            reorder=reorder
         )
 
-    def to_scene(self):
+    def to_scene(self, compact=False, reorder=None):
         """
         Build a Scene from this VisualData, including GL buffer initialization.
         Must be called after an OpenGL context is active.
+
+        Args:
+            compact, reorder: forwarded to to_mesh_data().
         """
-        mesh_data = self.to_mesh_data()
+        # Imported here so the adapter itself stays usable without OpenGL
+        from .scene import Scene
+        mesh_data = self.to_mesh_data(compact=compact, reorder=reorder)
         scene = Scene(mesh_data)
         scene.initialize_gl()
         return scene
@@ -3,28 +3,145 @@ hud_overlay.py
 
 Renders on-screen HUD elements: current view, FPS, deformation state, colormap legend,
 —and now also a fixed-size 3-axis gizmo in the lower-left corner.
+
+Text is drawn from a glyph texture atlas: each HUD line keeps a quad VBO that
+is rebuilt only when its text changes. The gizmo lives in a static VBO.
 """
+import ctypes
+
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLUT import glutBitmapCharacter, GLUT_BITMAP_HELVETICA_18
 
+from .text_atlas import GlyphAtlas
+
+# Gizmo axes as interleaved (x, y, z, r, g, b): three lines, then their tips
+_GIZMO_SIZE = 0.1
+_GIZMO_VERTS = np.array([
+    [0, 0, 0, 1, 0, 0], [_GIZMO_SIZE, 0, 0, 1, 0, 0],
+    [0, 0, 0, 0, 1, 0], [0, _GIZMO_SIZE, 0, 0, 1, 0],
+    [0, 0, 0, 0, 0, 1], [0, 0, _GIZMO_SIZE, 0, 0, 1],
+    [_GIZMO_SIZE, 0, 0, 1, 0, 0],
+    [0, _GIZMO_SIZE, 0, 0, 1, 0],
+    [0, 0, _GIZMO_SIZE, 0, 0, 1],
+], dtype=np.float32)
+
+
+class _TextLine:
+    """One HUD text slot: its quad VBO and what it currently holds."""
+    def __init__(self):
+        self.vbo = glGenBuffers(1)
+        self.key = None          # (text, x, y) the buffer was built for
+        self.n_verts = 0
+
+
 class HUDOverlay:
     """
     Draws 2D HUD elements in an orthographic overlay,
-    plus a 3-axis orientation gizmo via immediate-mode GL.
+    plus a 3-axis orientation gizmo from a static VBO.
     """
-    def __init__(self, view_manager, shader_manager, scene, fps_callback=None):
+    def __init__(self, view_manager, shader_manager, scene, fps_callback=None,
+                 playback=None, live=None):
         self.views        = view_manager
         self.shader       = shader_manager
         self.scene        = scene
         self.fps_callback = fps_callback or (lambda: 0)
         self.camera       = self.views.camera  # assume has get_view_matrix()
+        self.picked       = None  # last pick result from InputController
+        self.labels       = []    # extra (x, y, text) captions, e.g. viewport names
+        self.playback     = playback
+        self.live         = live
+        self.atlas        = None  # GlyphAtlas; None falls back on GLUT bitmap text
+        self.atlas_tex    = None
+        self.gizmo_vbo    = None
+        self._lines       = []    # _TextLine per HUD line slot
+
+    def initialize_gl(self, font_size=18, font_path=None):
+        """
+        Build the glyph atlas texture and the static gizmo VBO. Call once a
+        GL context exists. Without PIL, text keeps using GLUT bitmap fonts.
+        """
+        self.gizmo_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.gizmo_vbo)
+        glBufferData(GL_ARRAY_BUFFER, _GIZMO_VERTS.nbytes, _GIZMO_VERTS, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        try:
+            self.atlas = GlyphAtlas.from_font(font_size, font_path)
+        except ImportError:
+            return
+        h, w = self.atlas.bitmap.shape
+        self.atlas_tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.atlas_tex)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, w, h, 0, GL_ALPHA, GL_UNSIGNED_BYTE,
+                     self.atlas.bitmap)
+        glBindTexture(GL_TEXTURE_2D, 0)
 
     def _draw_text(self, x, y, text):
         glRasterPos2f(x, y)
         for ch in text:
             glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(ch))
 
+    def _draw_lines(self, items):
+        """
+        Draw text lines from the atlas. items are (x, y, text) per slot; a
+        slot's quad buffer is re-uploaded only when its content changed.
+        """
+        if self.atlas is None:
+            for x, y, text in items:
+                self._draw_text(x, y, text)
+            return
+        while len(self._lines) < len(items):
+            self._lines.append(_TextLine())
+
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.atlas_tex)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glColor3f(1.0, 1.0, 1.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        stride = 4 * 4                                   # (x, y, s, t) float32
+        for line, (x, y, text) in zip(self._lines, items):
+            glBindBuffer(GL_ARRAY_BUFFER, line.vbo)
+            if line.key != (text, x, y):
+                quads = self.atlas.layout(text, x, y)
+                glBufferData(GL_ARRAY_BUFFER, max(quads.nbytes, stride), quads,
+                             GL_DYNAMIC_DRAW)
+                line.key, line.n_verts = (text, x, y), quads.shape[0]
+            if line.n_verts:
+                glVertexPointer(2, GL_FLOAT, stride, ctypes.c_void_p(0))
+                glTexCoordPointer(2, GL_FLOAT, stride, ctypes.c_void_p(8))
+                glDrawArrays(GL_QUADS, 0, line.n_verts)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_BLEND)
+        glDisable(GL_TEXTURE_2D)
+
+    @staticmethod
+    def _pick_lines(picked):
+        """
+        Format a pick result (see Picker.pick) as HUD text lines.
+        """
+        def vec(v):
+            return '(' + ', '.join(f"{c:.4g}" for c in v) + ')'
+
+        label = 'Node' if picked['kind'] == 'node' else 'Element'
+        lines = [f"{label} {picked['id']}  at {vec(picked['coords'])}"]
+        if picked['disp'] is not None:
+            lines.append(f"  Disp: {vec(picked['disp'])}")
+        if picked['field'] is not None:
+            lines.append(f"  Field: {picked['field']:.4g}")
+        return lines
+
     def _draw_gizmo(self):
         # 1) Setup identity NDC projection/modelview
         glMatrixMode(GL_PROJECTION)
@@ -48,28 +165,22 @@ class HUDOverlay:
         # OpenGL expects column-major; numpy is row-major, so transpose
         glMultMatrixf(M.T.flatten())
 
-        # 5) Draw axes lines
-        size = 0.1
+        # 5) Axes lines, then their tips, from the static VBO
+        glBindBuffer(GL_ARRAY_BUFFER, self.gizmo_vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        stride = 6 * 4                                   # (x, y, z, r, g, b) float32
+        glVertexPointer(3, GL_FLOAT, stride, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, stride, ctypes.c_void_p(12))
         glLineWidth(2.0)
-        glBegin(GL_LINES)
-        # X (red)
-        glColor3f(1, 0, 0)
-        glVertex3f(0, 0, 0); glVertex3f(size, 0, 0)
-        # Y (green)
-        glColor3f(0, 1, 0)
-        glVertex3f(0, 0, 0); glVertex3f(0, size, 0)
-        # Z (blue)
-        glColor3f(0, 0, 1)
-        glVertex3f(0, 0, 0); glVertex3f(0, 0, size)
-        glEnd()
+        glDrawArrays(GL_LINES, 0, 6)
 
         # 6) Draw endpoints
         glPointSize(6.0)
-        glBegin(GL_POINTS)
-        glColor3f(1, 0, 0); glVertex3f(size, 0, 0)
-        glColor3f(0, 1, 0); glVertex3f(0, size, 0)
-        glColor3f(0, 0, 1); glVertex3f(0, 0, size)
-        glEnd()
+        glDrawArrays(GL_POINTS, 6, 3)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
         # 7) Restore state
         glDepthMask(GL_TRUE)
@@ -80,7 +191,8 @@ class HUDOverlay:
         glMatrixMode(GL_MODELVIEW)
 
     def draw(self, width, height):
-        # --- 2D HUD setup ---
+        # --- 2D HUD setup (fixed function) ---
+        glUseProgram(0)
         glMatrixMode(GL_PROJECTION)
         glPushMatrix(); glLoadIdentity()
         glOrtho(0, width, 0, height, -1, 1)
@@ -97,19 +209,34 @@ class HUDOverlay:
         deform       = 'On' if getattr(self.scene, 'deformed_visible', False) else 'Off'
 
         margin = 10
-        line_h = 20
+        line_h = 20 if self.atlas is None else self.atlas.line_height
+        top    = height - margin - (0 if self.atlas is None else self.atlas.baseline)
         lines = [
             f"View: {current_view}",
             f"FPS: {fps:.1f}",
             f"Deformation: {deform}",
             f"Colormap: {cmap_idx}"
         ]
-        for i, text in enumerate(lines):
-            self._draw_text(margin, height - margin - line_h * i, text)
+        if self.playback is not None:
+            pb = self.playback
+            state = 'Playing' if pb.playing else 'Paused'
+            lines.append(f"Step: {pb.step + 1}/{pb.n_steps} ({state})")
+        if self.live is not None:
+            lv = self.live
+            if lv.step is None:
+                lines.append(f"Live: waiting ({lv.status})")
+            else:
+                lines.append(f"Live: step {lv.step}, t={lv.time:.4g} ({lv.status})")
+        if self.picked is not None:
+            lines.extend(self._pick_lines(self.picked))
+        self._draw_lines([(margin, top - line_h * i, text)
+                          for i, text in enumerate(lines)] + list(self.labels))
 
         # Colormap swatch
         if getattr(self.shader, 'tex_ids', None):
             sw = 20
+            glEnable(GL_TEXTURE_1D)
+            glColor3f(1.0, 1.0, 1.0)
             glBindTexture(GL_TEXTURE_1D, self.shader.tex_ids[cmap_idx])
             glBegin(GL_QUADS)
             glTexCoord1f(0.0); glVertex2f(width - margin - sw, height - margin - sw)
@@ -118,6 +245,7 @@ class HUDOverlay:
             glTexCoord1f(0.0); glVertex2f(width - margin - sw, height - margin)
             glEnd()
             glBindTexture(GL_TEXTURE_1D, 0)
+            glDisable(GL_TEXTURE_1D)
 
         # --- Draw the gizmo ---
         self._draw_gizmo()
@@ -4,7 +4,6 @@ input_controller.py
 Maps keyboard and mouse events to camera, view manager, scene, and shader actions.
 """
 import numpy as np
-from OpenGL.GLUT import glutLeaveMainLoop
 import sys
 class InputController:
     """
@@ -18,7 +17,11 @@ class InputController:
                  exit_callback=None,
                  key_map=None,
                  fit_center=None,
-                 fit_radius=None):
+                 fit_radius=None,
+                 picker=None,
+                 hud=None,
+                 playback=None,
+                 live=None):
         self.camera      = camera
         self.views       = view_manager
         self.scene       = scene
@@ -27,6 +30,12 @@ class InputController:
         self.key_map     = key_map or {'1': 'Top', '2': 'Front', '3': 'Side', '4': 'Iso'}
         self.fit_center  = fit_center
         self.fit_radius  = fit_radius
+        self.picker      = picker
+        self.hud         = hud
+        self.pick_kind   = 'node'
+        self.playback    = playback
+        self.scrub_keys  = {',': -1, '.': 1, '<': -10, '>': 10}
+        self.live        = live
 
     def on_key(self, key, x=None, y=None):
         # Normalize key to str
@@ -34,7 +43,8 @@ class InputController:
 
         # Exit on Escape
         if k == '\x1b':
-            # tell GLUT to exit its main loop
+            # tell GLUT to exit its main loop (a GLUT context exists by now)
+            from OpenGL.GLUT import glutLeaveMainLoop
             glutLeaveMainLoop()
             return
 
@@ -64,6 +74,40 @@ class InputController:
             if self.shader:
                 self.shader.cycle_colormap()
             return
+
+        # Toggle node/element picking
+        if k.lower() == 'p':
+            self.pick_kind = 'element' if self.pick_kind == 'node' else 'node'
+            return
+
+        # Transient playback: space plays/pauses, , . < > scrub
+        if self.playback is not None:
+            if k == ' ':
+                self.playback.toggle()
+                return
+            if k in self.scrub_keys:
+                self.playback.step_by(self.scrub_keys[k])
+                return
+
+        # Abort a live background solve
+        if k.lower() == 'x' and self.live is not None:
+            self.live.abort()
+            return
+
+    def on_click(self, x, y, width, height):
+        """
+        Call on a left click without drag: query the entity under the cursor
+        and hand the result to the HUD.
+
+        Args:
+            x, y (int): window coordinates of the click.
+            width, height (int): viewport size in pixels.
+        """
+        if self.picker is None:
+            return
+        picked = self.picker.pick(x, y, width, height, kind=self.pick_kind)
+        if self.hud is not None:
+            self.hud.picked = picked
     def on_mouse_drag(self, dx, dy, button):
         """
         Call on mouse drag.
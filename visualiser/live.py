@@ -0,0 +1,84 @@
+"""
+live.py
+
+LiveFeed for MiniFEA renderer: polls a StateChannel once per frame and streams
+any newly published solver state into the Scene without blocking the GL loop.
+"""
+import numpy as np
+
+from feacalc.streaming import StateChannel
+
+
+class LiveFeed:
+    """
+    Bridges a background solve (see feacalc.streaming.launch_solve) and a Scene.
+    """
+    def __init__(self, channel, scene, process=None, scale=1.0, field_kind=None):
+        """
+        Args:
+            channel: StateChannel the solver publishes into.
+            scene: Scene whose deformed overlay (and MeshData field) is updated.
+            process: optional multiprocessing.Process running the solve.
+            scale (float): displacement magnification.
+            field_kind: 'node' or 'element' for the channel's field (see
+                MeshData.value_kind).
+        """
+        n_nodes = scene.mesh_data._nodes3d.shape[0]
+        if channel.n_nodes != n_nodes:
+            raise ValueError(f"Channel has {channel.n_nodes} nodes, mesh has {n_nodes}")
+        self.channel = channel
+        self.scene   = scene
+        self.process = process
+        self.scale   = scale
+        self.field_kind = field_kind
+
+        self.seq   = 0
+        self.step  = None
+        self.time  = None
+        self.disp  = np.zeros((n_nodes, 3), dtype=np.float32)
+        self.field = np.zeros(channel.n_field, dtype=np.float32) if channel.n_field else None
+        self._frame = np.empty(n_nodes * 3, dtype=np.float32)
+
+    def initialize_gl(self):
+        """
+        Create the Scene buffer ring used for streamed states.
+        Must be called after an OpenGL context is active.
+        """
+        self.scene.create_disp_ring(2)
+
+    def update(self):
+        """
+        Pick up the latest published state, if any. Never waits on the writer:
+        a state that is mid-write is simply taken on a later frame.
+
+        Returns:
+            True if a new state was streamed to the Scene.
+        """
+        got = self.channel.read(self.disp, self.field, self.seq)
+        if got is None:
+            return False
+        self.seq, self.step, self.time = got
+
+        # Deformed overlay draws positions, so stage node + scale * u
+        frame = self._frame.reshape(-1, 3)
+        np.multiply(self.scene.mesh_data.to_render_order(self.disp, 'node'), self.scale, out=frame)
+        self.scene.mesh_data.disp_extent = float(
+            np.sqrt(np.einsum('ij,ij->i', frame, frame).max(initial=0.0)))
+        frame += self.scene.mesh_data._nodes3d
+        self.scene.stream_displacements(self._frame)
+        if self.field is not None:
+            self.scene.mesh_data.update_field(self.field, self.field_kind)
+        return True
+
+    def abort(self):
+        """Ask the solver to stop."""
+        self.channel.request_abort()
+
+    @property
+    def status(self):
+        """Human-readable solver status for the HUD."""
+        status = self.channel.status
+        if (status == StateChannel.RUNNING and self.process is not None
+                and not self.process.is_alive()):
+            return 'exited'
+        return StateChannel.STATUS_NAMES[status]
@@ -6,47 +6,318 @@ performs normalization to 3D, and prepares flat buffers for GPU upload.
 """
 import numpy as np
 
+from . import spatial
+
+# Local edges and triangles of the element types the renderer knows by name.
+# Other types fall back on their node count: 2 nodes draw as one line,
+# k > 2 nodes as a closed polygon with a triangle fan.
+ELEMENT_TOPOLOGY = {
+    'bar':   (((0, 1),), ()),
+    'frame': (((0, 1),), ()),
+    'tri3':  (((0, 1), (1, 2), (2, 0)), ((0, 1, 2),)),
+    'quad4': (((0, 1), (1, 2), (2, 3), (3, 0)), ((0, 1, 2), (0, 2, 3))),
+}
+
+
+def _topology(elem_type, npe):
+    """Local (edges, triangles) node pairs/triples for an element type."""
+    if elem_type in ELEMENT_TOPOLOGY:
+        return ELEMENT_TOPOLOGY[elem_type]
+    if npe == 2:
+        return ((0, 1),), ()
+    edges = tuple((a, (a + 1) % npe) for a in range(npe))
+    tris = tuple((0, a, a + 1) for a in range(1, npe - 1))
+    return edges, tris
+
+
+class MeshBlock:
+    """
+    One homogeneous element block and the index buffers derived from it.
+
+    Attributes:
+        elem_type (str): element type name, or None for unnamed blocks.
+        elems (np.ndarray): connectivity, shape (n_elems, nodes_per_elem).
+        elem_offset (int): global id of the block's first element.
+        lines (np.ndarray): distinct edges, shape (n_lines, 2), int32.
+        line_elem (np.ndarray): global element id owning each edge.
+        tri_buffer (np.ndarray): flattened int32 triangle indices, or None
+            for line elements.
+        line_offset, line_count (int): the block's range in MeshData.index_buffer
+            before chunking (in indices).
+    """
+    def __init__(self, elem_type, elems, elem_offset=0, n_nodes=None):
+        self.elem_type = elem_type
+        self.elems = elems
+        self.elem_offset = elem_offset
+        n_elems, npe = elems.shape
+        edges, tris = _topology(elem_type, npe)
+
+        if npe == 2 and len(edges) == 1:
+            # Line elements: the connectivity is the line list
+            self.lines = np.ascontiguousarray(elems, dtype=np.int32)
+            self.line_elem = np.arange(n_elems) + elem_offset
+            self.tri_buffer = None
+            self.line_offset = 0
+            self.line_count = elems.size
+            return
+
+        # Edges of every element, shared edges kept once
+        a, b = np.array(edges).T
+        lines = np.stack([elems[:, a], elems[:, b]], axis=-1).reshape(-1, 2)
+        owner = np.repeat(np.arange(n_elems), len(edges)) + elem_offset
+        lo, hi = lines.min(axis=1).astype(np.int64), lines.max(axis=1)
+        n = int(n_nodes if n_nodes is not None else hi.max() + 1)
+        _, first = np.unique(lo * n + hi, return_index=True)
+        first.sort()
+        lines, owner = lines[first], owner[first]
+        self.lines = np.ascontiguousarray(lines, dtype=np.int32)
+        self.line_elem = owner
+        self.tri_buffer = (elems[:, np.array(tris)].astype(np.int32).reshape(-1)
+                           if tris else None)
+        self.line_offset = 0
+        self.line_count = 2 * self.lines.shape[0]
+
+    @property
+    def n_elems(self):
+        return self.elems.shape[0]
+
+
 class MeshData:
     """
     Stores raw mesh and field data and provides normalized buffers for rendering.
 
     Attributes:
         nodes (np.ndarray): Original node coordinates, shape (n_nodes, dim).
-        elems (np.ndarray): Element connectivity, shape (n_elems, nodes_per_elem).
+        elems (np.ndarray): Element connectivity, shape (n_elems, nodes_per_elem),
+            or None for a mixed mesh.
+        blocks (list[MeshBlock]): homogeneous element blocks (one for a
+            rectangular elems array); global element ids run block by block.
+        lines (np.ndarray): wireframe edges of all blocks, shape (n_lines, 2).
+        line_elem (np.ndarray): global element id of every edge, or None when
+            the elements are themselves the lines.
         disp (np.ndarray): Displacements per node, shape (n_nodes, dim) or None.
         field (np.ndarray): Scalar field per node or element, shape (n_nodes,) or (n_elems,) or None.
+        field_kind (str): 'node' or 'element', what field is defined on (None without a field).
         _nodes3d (np.ndarray): Internal 3D node positions, shape (n_nodes, 3).
         node_buffer (np.ndarray): Flattened float32 buffer of node positions.
         disp_buffer (np.ndarray): Flattened float32 buffer of displacements (if provided).
-        index_buffer (np.ndarray): Flattened int32 buffer of element connectivity.
+        index_buffer (np.ndarray): Flattened int32 GL_LINES buffer of the edges.
+        chunk_order (np.ndarray): Edge permutation used by index_buffer once
+            chunked, or None.
+        chunk_offsets, chunk_counts (np.ndarray): Per-chunk index ranges into
+            index_buffer (in indices, not bytes).
+        chunk_min, chunk_max (np.ndarray): Per-chunk bounding boxes, shape (k, 3).
+        lod_index_buffer (np.ndarray): Decimated line indices for all chunks.
+        lod_offsets, lod_counts (np.ndarray): Per-chunk ranges into lod_index_buffer.
+        disp_extent (float): Largest displacement magnitude, used to pad
+            chunk bounds when culling the deformed overlay.
+        compact (bool): True when positions, displacements and connectivity
+            are stored once (float32 / int32) and the buffers are views.
+        node_order, elem_order (np.ndarray): with reorder, the input id of
+            every stored node / element (global over blocks), else None.
+            Per-node and per-element inputs (disp, field and their updates)
+            are always given in input order.
     """
 
-    def __init__(self, nodes, elems, disp=None, field=None):
+    def __init__(self, nodes, elems, disp=None, field=None, chunk_size=4096,
+                 compact=False, reorder=None, field_kind=None):
         """
         Initialize MeshData.
 
         Args:
             nodes: array-like of shape (n_nodes, 2) or (n_nodes, 3).
-            elems: array-like of ints, shape (n_elems, nodes_per_elem).
+            elems: array-like of ints, shape (n_elems, nodes_per_elem), or a
+                mapping elem_type -> such an array for a mesh mixing element
+                types (e.g. feacalc MixedMesh.blocks).
             disp: optional displacements, same shape as nodes.
             field: optional scalar field per node or per element.
+            chunk_size: edges per spatial chunk; meshes with more edges
+                are partitioned for culling (None disables chunking).
+            compact: store a single float32 (n_nodes, 3) position array and a
+                single int32 connectivity array; `nodes`, `elems` and the GPU
+                buffers are then views of that storage rather than copies
+                (chunking still keeps one reordered index_buffer).
+            reorder: 'hilbert' or 'morton' to renumber nodes along that
+                space-filling curve, with elements following, so the GPU
+                vertex cache and CPU-side gathers see local indices.
+                node_order / elem_order map the stored ids back.
+            field_kind: 'node' or 'element'; inferred from the field's length
+                when omitted, which fails if the mesh has as many nodes as
+                elements.
+        """
+        self.compact = compact
+        self.node_order = None
+        self.elem_order = None
+        self._n_input = (np.shape(nodes)[0],
+                         sum(np.shape(e)[0] for e in elems.values()) if isinstance(elems, dict)
+                         else np.shape(elems)[0])
+        self.field_kind = None if field is None else self.value_kind(field, field_kind)
+        if reorder is not None:
+            nodes, elems = self._reorder(nodes, elems, reorder)
+            disp = self.to_render_order(disp, 'node')
+            field = self.to_render_order(field, self.field_kind)
+        block_input = elems if isinstance(elems, dict) else None
+        if block_input is not None:
+            elems = None
+        if compact:
+            self._nodes3d = self._to_3d(nodes, np.float32)
+            self.nodes = self._nodes3d[:, :np.shape(nodes)[1]]
+            self.elems = np.ascontiguousarray(elems, dtype=np.int32) if elems is not None else None
+            self.disp = self._to_3d(disp, np.float32) if disp is not None else None
+            self.field = np.array(field, dtype=np.float32) if field is not None else None
+            disp3 = self.disp
+
+            # GPU buffers are flat views of the same memory
+            self.node_buffer = self._nodes3d.reshape(-1)
+            self.disp_buffer = disp3.reshape(-1) if disp3 is not None else None
+        else:
+            self.nodes = np.asarray(nodes, dtype=float)
+            self.elems = np.asarray(elems, dtype=int) if elems is not None else None
+            self.disp = np.asarray(disp, dtype=float) if disp is not None else None
+            self.field = np.asarray(field, dtype=float) if field is not None else None
+
+            # Normalize all coordinate arrays to 3D
+            self._nodes3d = self._normalize_to_3d(self.nodes)
+            if self.disp is not None:
+                disp3 = self._normalize_to_3d(self.disp)
+            else:
+                disp3 = None
+
+            # Prepare GPU-friendly buffers
+            self.node_buffer = self._nodes3d.astype(np.float32).reshape(-1)
+            self.disp_buffer = disp3.astype(np.float32).reshape(-1) if disp3 is not None else None
+
+        # Element blocks and the wireframe they draw as
+        self._build_blocks(block_input)
+
+        # Spatial chunks (built on demand for large meshes)
+        self.chunk_order   = None
+        self.chunk_offsets = None
+        self.chunk_counts  = None
+        self.chunk_min     = None
+        self.chunk_max     = None
+        self.lod_index_buffer = None
+        self.lod_offsets   = None
+        self.lod_counts    = None
+        self.disp_extent   = self._max_norm(disp3)
+        if chunk_size is not None and self.lines.shape[0] > chunk_size:
+            self.build_chunks(chunk_size)
+
+        # Picking indices (built lazily on first query)
+        self._node_index = None
+        self._elem_index = None
+
+    def _build_blocks(self, block_input):
+        """
+        Split the connectivity into MeshBlocks and build the combined line
+        index buffer, block after block.
+
+        Args:
+            block_input: mapping elem_type -> connectivity, or None to use
+                self.elems as a single block.
         """
-        self.nodes = np.asarray(nodes, dtype=float)
-        self.elems = np.asarray(elems, dtype=int)
-        self.disp = np.asarray(disp, dtype=float) if disp is not None else None
-        self.field = np.asarray(field, dtype=float) if field is not None else None
+        if block_input is None:
+            block_input = {None: self.elems}
+        n_nodes = self._nodes3d.shape[0]
+        self.blocks = []
+        offset = start = 0
+        for elem_type, elems in block_input.items():
+            elems = np.asarray(elems, dtype=np.int32 if self.compact else int)
+            block = MeshBlock(elem_type, elems, offset, n_nodes)
+            block.line_offset = start
+            self.blocks.append(block)
+            offset += block.n_elems
+            start += block.line_count
 
-        # Normalize all coordinate arrays to 3D
-        self._nodes3d = self._normalize_to_3d(self.nodes)
-        if self.disp is not None:
-            disp3 = self._normalize_to_3d(self.disp)
+        if len(self.blocks) == 1:
+            self.lines = self.blocks[0].lines
+        else:
+            self.lines = np.concatenate([b.lines for b in self.blocks])
+        # Two-node elements are their own lines, one per element in order
+        if self.elems is not None and self.elems.shape[1] == 2:
+            self.line_elem = None
         else:
-            disp3 = None
+            self.line_elem = np.concatenate([b.line_elem for b in self.blocks])
+        self.index_buffer = self.lines.reshape(-1)
+
+    def _reorder(self, nodes, elems, curve):
+        """
+        Renumber nodes along a space-filling curve and sort each block's
+        elements to follow (see feacalc.mesh.locality_order).
+
+        Returns:
+            (nodes, elems) in the new order, elems in the form given.
+        """
+        from feacalc.mesh import locality_order
+        nodes = np.asarray(nodes)
+        blocks = ({t: np.asarray(e) for t, e in elems.items()} if isinstance(elems, dict)
+                  else {None: np.asarray(elems)})
+        node_order, elem_order, rank = locality_order(nodes, blocks, curve)
+        starts = np.cumsum([0] + [e.shape[0] for e in blocks.values()])
+        self.node_order = node_order
+        self.elem_order = np.concatenate([np.empty(0, dtype=np.int64)]
+                                         + [elem_order[t] + o for t, o in zip(blocks, starts)])
+        blocks = {t: rank[e[elem_order[t]]] for t, e in blocks.items()}
+        return nodes[node_order], blocks if isinstance(elems, dict) else blocks[None]
+
+    def value_kind(self, values, kind=None):
+        """
+        'node' or 'element': kind checked against the length of values, or
+        told apart by that length when kind is None.
+
+        Raises:
+            ValueError: the length does not fit kind, fits neither entity,
+                or fits both (as many nodes as elements) and kind is None.
+        """
+        n_nodes, n_elems = self._n_input
+        n = np.shape(values)[0]
+        if kind is not None:
+            expected = {'node': n_nodes, 'element': n_elems}.get(kind)
+            if expected is None:
+                raise ValueError(f"Unknown kind '{kind}'; use 'node' or 'element'")
+            if n != expected:
+                raise ValueError(f"Expected {expected} {kind} values, got {n}")
+            return kind
+        if n == n_nodes == n_elems:
+            raise ValueError(f"{n} values fit both nodes and elements; pass kind")
+        if n == n_nodes:
+            return 'node'
+        if n == n_elems:
+            return 'element'
+        raise ValueError(f"Expected {n_nodes} node or {n_elems} element values, got {n}")
+
+    def to_render_order(self, values, kind=None):
+        """
+        Permute per-node or per-element values from input order into the
+        stored order (identity without reorder).
 
-        # Prepare GPU-friendly buffers
-        self.node_buffer = self._nodes3d.flatten().astype(np.float32)
-        self.disp_buffer = disp3.flatten().astype(np.float32) if disp3 is not None else None
-        self.index_buffer = self.elems.flatten().astype(np.int32)
+        Args:
+            values: (n_nodes, ...) or (n_elems, ...) array, or None.
+            kind: 'node' or 'element' (see value_kind).
+        """
+        if values is None:
+            return values
+        kind = self.value_kind(values, kind)
+        if self.node_order is None:
+            return values
+        return np.asarray(values)[self.node_order if kind == 'node' else self.elem_order]
+
+    def input_id(self, kind, idx):
+        """Input-order id of stored node ('node') or element ('element') idx."""
+        order = self.node_order if kind == 'node' else self.elem_order
+        return int(idx) if order is None else int(order[idx])
+
+    @property
+    def n_elems(self):
+        """Number of elements over all blocks."""
+        return sum(b.n_elems for b in self.blocks)
+
+    def element_nodes(self, eid):
+        """Connectivity row of global element eid."""
+        for block in self.blocks:
+            if eid < block.elem_offset + block.n_elems:
+                return block.elems[eid - block.elem_offset]
+        raise IndexError(f"Element {eid} out of range")
 
     def _normalize_to_3d(self, arr):
         """
@@ -66,22 +337,158 @@ class MeshData:
             return np.hstack([arr, zeros])
         return arr
 
+    @staticmethod
+    def _to_3d(arr, dtype, out=None):
+        """
+        Write 2D or 3D coordinates into an (n_nodes, 3) array, zero-padding z,
+        without intermediate copies.
+
+        Args:
+            arr: array-like of shape (n_nodes, 2) or (n_nodes, 3).
+            dtype: dtype of a newly allocated result.
+            out: optional preallocated (n_nodes, 3) array to write into.
+
+        Returns:
+            np.ndarray of shape (n_nodes, 3)
+        """
+        arr = np.asarray(arr)
+        if arr.ndim != 2 or arr.shape[1] not in (2, 3):
+            raise ValueError(f"Expected array of shape (n,2) or (n,3), got {arr.shape}")
+        if out is None:
+            out = np.empty((arr.shape[0], 3), dtype=dtype)
+        elif out.shape[0] != arr.shape[0]:
+            raise ValueError(f"Expected {out.shape[0]} rows, got {arr.shape[0]}")
+        out[:, :arr.shape[1]] = arr
+        if arr.shape[1] == 2:
+            out[:, 2] = 0.0
+        return out
+
+    @staticmethod
+    def _max_norm(arr):
+        """Largest row norm of an (n, 3) array, or 0.0 for None/empty input."""
+        if arr is None or arr.size == 0:
+            return 0.0
+        return float(np.sqrt(np.einsum('ij,ij->i', arr, arr).max()))
+
+    @property
+    def n_chunks(self):
+        """Number of spatial chunks (0 when the mesh is not chunked)."""
+        return 0 if self.chunk_offsets is None else self.chunk_offsets.size
+
+    @property
+    def node_index(self):
+        """LeafIndex over node positions for picking, built once on first use."""
+        if self._node_index is None:
+            self._node_index = spatial.LeafIndex(self._nodes3d, self._nodes3d)
+        return self._node_index
+
+    @property
+    def elem_index(self):
+        """LeafIndex over edge bounding boxes for picking, built once on first use."""
+        if self._elem_index is None:
+            coords = self._nodes3d[self.lines]
+            self._elem_index = spatial.LeafIndex(coords.min(axis=1), coords.max(axis=1))
+        return self._elem_index
+
+    def build_chunks(self, chunk_size=4096, lod_cells=4):
+        """
+        Partition the wireframe edges into spatially coherent chunks for
+        culling and LOD.
+
+        Edges are sorted along a Morton curve of their box centers and cut
+        into runs of chunk_size, so every chunk owns one contiguous range of
+        index_buffer. Each chunk also gets a decimated proxy built by vertex
+        clustering on a lod_cells^3 grid inside its bounding box.
+
+        Args:
+            chunk_size: maximum number of edges per chunk.
+            lod_cells: clustering grid resolution per axis for LOD proxies.
+        """
+        coords = self._nodes3d[self.lines]            # (n_lines, 2, 3)
+        mins = coords.min(axis=1)
+        maxs = coords.max(axis=1)
+        order, starts, counts, cmin, cmax = spatial.build_chunks(mins, maxs, chunk_size)
+
+        self.chunk_order   = order
+        self.index_buffer  = self.lines[order].flatten().astype(np.int32)
+        self.chunk_offsets = starts * 2
+        self.chunk_counts  = counts * 2
+        self.chunk_min     = cmin
+        self.chunk_max     = cmax
+        self._build_lod(lod_cells)
+
+    def _build_lod(self, lod_cells):
+        """
+        Build decimated line proxies for every chunk via vertex clustering.
+
+        Args:
+            lod_cells: clustering grid resolution per axis.
+        """
+        n_pairs = self.index_buffer.size // 2
+        segs = self.index_buffer[:2 * n_pairs].reshape(-1, 2)
+        seg_chunk = np.searchsorted(self.chunk_offsets, 2 * np.arange(n_pairs),
+                                    side='right') - 1
+
+        # Cluster cell of every segment endpoint inside its chunk's box
+        lo = self.chunk_min[seg_chunk]
+        span = self.chunk_max[seg_chunk] - lo
+        span[span == 0.0] = 1.0
+        cells = np.empty_like(segs, dtype=np.int64)
+        for end in range(2):
+            q = ((self._nodes3d[segs[:, end]] - lo) / span * lod_cells).astype(np.int64)
+            q = np.clip(q, 0, lod_cells - 1)
+            local = (q[:, 0] * lod_cells + q[:, 1]) * lod_cells + q[:, 2]
+            cells[:, end] = seg_chunk * lod_cells ** 3 + local
+
+        # One representative node per occupied cell: the first one seen
+        keys, first, inverse = np.unique(cells.ravel(), return_index=True,
+                                         return_inverse=True)
+        reps = segs.ravel()[first][inverse].reshape(-1, 2)
+
+        # Drop collapsed segments, then duplicates within each chunk
+        keep = reps[:, 0] != reps[:, 1]
+        reps = np.sort(reps[keep], axis=1)
+        owner = seg_chunk[keep]
+        rows = np.unique(np.column_stack([owner, reps]), axis=0)
+
+        self.lod_index_buffer = rows[:, 1:].flatten().astype(np.int32)
+        bounds = np.searchsorted(rows[:, 0], np.arange(self.n_chunks + 1))
+        self.lod_offsets = 2 * bounds[:-1]
+        self.lod_counts  = 2 * np.diff(bounds)
+
     def update_displacements(self, disp):
         """
-        Update the displacement buffer with new values.
+        Update the displacement buffer with new values, writing into the
+        existing float32 buffer (and, in compact mode, the only displacement
+        array) instead of reallocating.
 
         Args:
-            disp: array-like of shape (n_nodes, 2) or (n_nodes, 3)
+            disp: array-like of shape (n_nodes, 2) or (n_nodes, 3), input order
         """
-        disp3 = self._normalize_to_3d(disp)
-        self.disp = disp3
-        self.disp_buffer = disp3.flatten().astype(np.float32)
+        disp = self.to_render_order(disp, 'node')
+        if self.compact:
+            self.disp = self._to_3d(disp, np.float32, out=self.disp)
+            self.disp_buffer = self.disp.reshape(-1)
+        else:
+            self.disp = self._normalize_to_3d(disp)
+            if self.disp_buffer is None or self.disp_buffer.size != self.disp.size:
+                self.disp_buffer = np.empty(self.disp.size, dtype=np.float32)
+            self.disp_buffer[:] = self.disp.reshape(-1)
+        self.disp_extent = self._max_norm(self.disp)
 
-    def update_field(self, field):
+    def update_field(self, field, kind=None):
         """
         Update the scalar field buffer with new values.
 
         Args:
-            field: array-like of shape (n_nodes,) or (n_elems,)
+            field: array-like of shape (n_nodes,) or (n_elems,), input order
+            kind: 'node' or 'element' (see value_kind)
         """
-        self.field = np.asarray(field, dtype=float)
+        self.field_kind = self.value_kind(field, kind)
+        field = self.to_render_order(field, self.field_kind)
+        if self.compact and self.field is not None and self.field.shape == np.shape(field):
+            self.field[...] = field
+        elif self.compact:
+            self.field = np.array(field, dtype=np.float32)
+        else:
+            self.field = np.asarray(field, dtype=float)
@@ -0,0 +1,190 @@
+"""
+picker.py
+
+Ray picking for MiniFEA renderer: turns a cursor position into a world-space
+ray and queries the MeshData leaf indices for the nearest node or element.
+"""
+import numpy as np
+
+
+class Picker:
+    """
+    Resolves screen clicks to nodes or elements of a MeshData. Hits report
+    the MeshData's displacements and field unless set_case() selected
+    another load case (the active pane of a split window).
+    """
+    def __init__(self, mesh_data, camera, proj_mgr, pixel_tol=6.0):
+        """
+        Args:
+            mesh_data: MeshData to query (its node/element indices are built
+                       on the first pick and reused afterwards).
+            camera: Camera providing the view matrix and projection settings.
+            proj_mgr: ProjectionManager used to build the projection matrix.
+            pixel_tol: pick radius around the cursor, in pixels.
+        """
+        self.mesh_data = mesh_data
+        self.camera    = camera
+        self.proj_mgr  = proj_mgr
+        self.pixel_tol = pixel_tol
+        self._case     = None   # (disp, field, field_kind) overriding the MeshData's
+
+    def set_case(self, disp, field, field_kind=None):
+        """
+        Report this load case in hits instead of the MeshData's own.
+
+        Args:
+            disp: (n_nodes, dim) displacements in the MeshData's stored
+                  order (see MeshData.to_render_order), or None.
+            field: per-node or per-element values in stored order, or None.
+            field_kind: 'node' or 'element' (see MeshData.value_kind).
+        """
+        if field is not None:
+            field_kind = self.mesh_data.value_kind(field, field_kind)
+        self._case = (disp, field, field_kind)
+
+    def _disp(self):
+        return self.mesh_data.disp if self._case is None else self._case[0]
+
+    def screen_ray(self, x, y, width, height):
+        """
+        Unproject a window position (GLUT convention, origin top-left).
+
+        Returns:
+            origin (np.ndarray): point on the near plane.
+            direction (np.ndarray): unit ray direction.
+        """
+        P = self.proj_mgr.get_proj_matrix(self.camera, width / height)
+        V = self.camera.get_view_matrix()
+        inv = np.linalg.inv((P @ V).astype(float))
+        ndc_x = 2.0 * x / width - 1.0
+        ndc_y = 1.0 - 2.0 * y / height
+        near = inv @ np.array([ndc_x, ndc_y, -1.0, 1.0])
+        far  = inv @ np.array([ndc_x, ndc_y,  1.0, 1.0])
+        near = near[:3] / near[3]
+        far  = far[:3] / far[3]
+        direction = far - near
+        return near, direction / np.linalg.norm(direction)
+
+    def _tolerance(self, height):
+        """
+        World-space pick radius as base + slope * t along the ray.
+        """
+        cam = self.camera
+        if cam.mode == 'persp':
+            per_unit = 2.0 * np.tan(cam.fov / 2.0) / height * self.pixel_tol
+            return per_unit * cam.near, per_unit
+        return 2.0 * cam.ortho_size / height * self.pixel_tol, 0.0
+
+    def pick(self, x, y, width, height, kind='node'):
+        """
+        Find the front-most node or element within the pick radius of the cursor.
+
+        Args:
+            x, y: window coordinates of the click.
+            width, height: viewport size in pixels.
+            kind: 'node' or 'element'.
+
+        Returns:
+            dict with keys 'kind', 'id', 'coords', 'disp', 'field', or None
+            when nothing lies within the pick radius. 'id' is in the mesh's
+            input numbering (see MeshData.input_id).
+        """
+        origin, direction = self.screen_ray(x, y, width, height)
+        base, slope = self._tolerance(height)
+        if kind == 'node':
+            return self.pick_node(origin, direction, base, slope)
+        if kind == 'element':
+            return self.pick_element(origin, direction, base, slope)
+        raise ValueError(f"Unknown pick kind '{kind}'")
+
+    def pick_node(self, origin, direction, tol_base, tol_slope):
+        """
+        Front-most node within a ray cone of radius tol_base + tol_slope * t.
+        """
+        md = self.mesh_data
+        index = md.node_index
+        ids = index.order[index.ray_candidates(origin, direction, tol_base, tol_slope)]
+        if ids.size == 0:
+            return None
+
+        w = md._nodes3d[ids] - origin
+        t = w @ direction
+        perp = np.linalg.norm(w - t[:, None] * direction, axis=1)
+        depth = self._front_most(perp, t, tol_base, tol_slope)
+        best = int(np.argmin(depth))
+        if not np.isfinite(depth[best]):
+            return None
+
+        nid = int(ids[best])
+        disp = self._disp()
+        return self._result('node', md.input_id('node', nid), md.nodes[nid],
+                            disp[nid] if disp is not None else None,
+                            self._field_value(nid, 'node'))
+
+    def pick_element(self, origin, direction, tol_base, tol_slope):
+        """
+        Front-most element within the ray cone, measuring distance to the
+        wireframe edges the renderer draws and reporting the edge's element.
+        """
+        md = self.mesh_data
+        index = md.elem_index
+        ids = index.order[index.ray_candidates(origin, direction, tol_base, tol_slope)]
+        if ids.size == 0:
+            return None
+
+        seg = md.lines[ids]
+        p = md._nodes3d[seg[:, 0]]                     # segment starts
+        e = md._nodes3d[seg[:, 1]] - p                 # segment vectors
+        w = p - origin
+        b = e @ direction
+        c = np.einsum('...j,...j->...', e, e)
+        dw = w @ direction
+        ew = np.einsum('...j,...j->...', e, w)
+        denom = c - b * b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(denom > 1e-12, (b * dw - ew) / denom, 0.0)
+        s = np.clip(s, 0.0, 1.0)
+        closest = p + s[..., None] * e
+        t = (closest - origin) @ direction
+        perp = np.linalg.norm(closest - origin - t[..., None] * direction, axis=-1)
+        depth = self._front_most(perp, t, tol_base, tol_slope)
+        best = int(np.argmin(depth))
+        if not np.isfinite(depth[best]):
+            return None
+
+        eid = int(ids[best])
+        if md.line_elem is not None:
+            eid = int(md.line_elem[eid])
+        nodes = md.element_nodes(eid)
+        disp = self._disp()
+        disp = disp[nodes].mean(axis=0) if disp is not None else None
+        return self._result('element', md.input_id('element', eid),
+                            md.nodes[nodes].mean(axis=0), disp,
+                            self._field_value(eid, 'element'))
+
+    @staticmethod
+    def _front_most(perp, t, tol_base, tol_slope):
+        """
+        Depth along the ray of each candidate inside the pick cone, inf for
+        the rest, so argmin selects the hit closest to the viewer.
+        """
+        inside = (t >= 0.0) & (perp <= tol_base + tol_slope * np.maximum(t, 0.0))
+        return np.where(inside, t, np.inf)
+
+    def _field_value(self, idx, kind):
+        """Field value at idx if the field is defined on that entity type."""
+        md = self.mesh_data
+        field, field_kind = (md.field, md.field_kind) if self._case is None else self._case[1:]
+        if field is None or field_kind != kind:
+            return None
+        return float(field[idx])
+
+    @staticmethod
+    def _result(kind, idx, coords, disp, field):
+        return {
+            'kind':   kind,
+            'id':     idx,
+            'coords': np.asarray(coords, dtype=float),
+            'disp':   None if disp is None else np.asarray(disp, dtype=float),
+            'field':  field,
+        }
@@ -0,0 +1,214 @@
+"""
+playback.py
+
+PlaybackController for MiniFEA renderer: steps through a (possibly memory-mapped)
+displacement history, staging upcoming frames on a background thread and
+streaming them into the Scene's ring of deformed-geometry buffers.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class PlaybackController:
+    """
+    Plays a displacement history of shape (n_steps, n_nodes, 2|3).
+
+    Frames are staged as flat float32 deformed positions (node position +
+    scale * displacement), matching what Scene draws as the deformed overlay.
+    A daemon thread keeps the next `prefetch` steps staged in a fixed pool of
+    buffers, so reading from disk never happens on the render thread unless
+    the user scrubs past the prefetched window.
+    """
+    def __init__(self, history, scene, fps=30.0, prefetch=8, ring_size=3,
+                 scale=1.0, loop=True):
+        """
+        Args:
+            history: path to a .npy file (memory-mapped, never fully loaded)
+                     or an array-like of shape (n_steps, n_nodes, 2|3).
+            scene: Scene whose deformed overlay is driven.
+            fps (float): playback rate in steps per second.
+            prefetch (int): number of upcoming steps kept staged.
+            ring_size (int): number of GPU buffers in the Scene ring.
+            scale (float): displacement magnification.
+            loop (bool): wrap around at either end while playing.
+        """
+        if isinstance(history, (str, os.PathLike)):
+            history = np.load(history, mmap_mode='r')
+        n_nodes = scene.mesh_data._nodes3d.shape[0]
+        if history.ndim != 3 or history.shape[1] != n_nodes or history.shape[2] not in (2, 3):
+            raise ValueError(f"Expected history of shape (n_steps, {n_nodes}, 2|3), "
+                             f"got {history.shape}")
+        self.history   = history
+        self.scene     = scene
+        self.fps       = fps
+        self.prefetch  = prefetch
+        self.ring_size = ring_size
+        self.scale     = scale
+        self.loop      = loop
+
+        self.step      = 0
+        self.playing   = False
+        self._shown    = None
+        self._clock    = None
+        self._carry    = 0.0
+
+        # Staged frames: step -> flat float32 buffer drawn from a fixed pool
+        frame_size = n_nodes * 3
+        self._frames  = {}
+        self._extents = {}    # step -> largest scaled displacement of its frame
+        self._pool    = [np.empty(frame_size, dtype=np.float32) for _ in range(prefetch)]
+        self._scratch = np.empty(frame_size, dtype=np.float32)
+        self._loading = None
+        self._stop    = False
+        self._cond    = threading.Condition()
+        self._thread  = threading.Thread(target=self._prefetch_loop, daemon=True)
+
+    @property
+    def n_steps(self):
+        """Number of steps in the history."""
+        return self.history.shape[0]
+
+    def initialize_gl(self):
+        """
+        Create the Scene buffer ring, show the first step and start prefetching.
+        Must be called after an OpenGL context is active.
+        """
+        self.scene.create_disp_ring(self.ring_size)
+        self._show(self.step)
+        self._thread.start()
+
+    def close(self):
+        """Stop the prefetch thread."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    # --- transport controls ---
+
+    def toggle(self):
+        """Play or pause."""
+        self.playing = not self.playing
+        self._clock = None
+        self._carry = 0.0
+
+    def seek(self, step):
+        """Jump to a step (clamped, or wrapped when looping)."""
+        if self.loop:
+            step %= self.n_steps
+        else:
+            step = int(np.clip(step, 0, self.n_steps - 1))
+        with self._cond:
+            self.step = step
+            self._evict()
+            self._cond.notify_all()
+
+    def step_by(self, delta):
+        """Scrub by delta steps."""
+        self.seek(self.step + delta)
+
+    def update(self, now=None):
+        """
+        Advance the playhead by elapsed time and stream the current step to
+        the Scene if it changed. Call once per frame from the render loop.
+
+        Args:
+            now (float): timestamp in seconds (defaults to time.perf_counter()).
+        """
+        now = time.perf_counter() if now is None else now
+        if self.playing:
+            if self._clock is not None:
+                self._carry += max(now - self._clock, 0.0) * self.fps
+                advance = int(self._carry)
+                if advance:
+                    self._carry -= advance
+                    if not self.loop and self.step + advance >= self.n_steps:
+                        self.playing = False
+                    self.step_by(advance)
+            self._clock = now
+        if self.step != self._shown:
+            self._show(self.step)
+
+    # --- staging ---
+
+    def _stage(self, step, out):
+        """
+        Write deformed positions of `step` into the flat buffer `out`.
+
+        Returns:
+            float: largest scaled displacement, the culling padding of the frame.
+        """
+        pos = out.reshape(-1, 3)
+        disp = self.scene.mesh_data.to_render_order(self.history[step], 'node')
+        dim = disp.shape[1]
+        np.multiply(disp, self.scale, out=pos[:, :dim], casting='unsafe')
+        if dim == 2:
+            pos[:, 2] = 0.0
+        extent = float(np.sqrt(np.einsum('ij,ij->i', pos, pos).max(initial=0.0)))
+        pos += self.scene.mesh_data._nodes3d
+        return extent
+
+    def _window(self):
+        """Steps that should be staged ahead of the playhead."""
+        ahead = self.step + 1 + np.arange(self.prefetch)
+        if self.loop:
+            return (ahead % self.n_steps).tolist()
+        return ahead[ahead < self.n_steps].tolist()
+
+    def _evict(self):
+        """Return buffers of steps outside the window to the pool (lock held)."""
+        keep = set(self._window()) | {self.step}
+        for k in [k for k in self._frames if k not in keep]:
+            self._pool.append(self._frames.pop(k))
+            self._extents.pop(k, None)
+
+    def _show(self, step):
+        """Stream `step` to the Scene, staging it synchronously on a miss."""
+        with self._cond:
+            frame = self._frames.pop(step, None)
+            extent = self._extents.pop(step, None)
+        # The overlay is culled with the padding of the frame it shows
+        if frame is None:
+            extent = self._stage(step, self._scratch)
+            self.scene.stream_displacements(self._scratch)
+        else:
+            self.scene.stream_displacements(frame)
+            with self._cond:
+                self._pool.append(frame)
+        self.scene.mesh_data.disp_extent = extent
+        self._shown = step
+        with self._cond:
+            self._cond.notify_all()
+
+    def _next_missing(self):
+        """First window step that is neither staged nor loading (lock held)."""
+        for k in self._window():
+            if k not in self._frames and k != self._loading:
+                return k
+        return None
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                while not self._stop and (not self._pool or self._next_missing() is None):
+                    self._cond.wait()
+                if self._stop:
+                    return
+                step = self._next_missing()
+                buf = self._pool.pop()
+                self._loading = step
+
+            # Disk reads and arithmetic happen outside the lock
+            extent = self._stage(step, buf)
+
+            with self._cond:
+                self._loading = None
+                if step in self._window():
+                    self._frames[step] = buf
+                    self._extents[step] = extent
+                else:
+                    self._pool.append(buf)
@@ -7,10 +7,17 @@ from OpenGL.GL import *
 from OpenGL.GLUT import *
 import numpy as np
 
+from .viewport import grid_layout, pane_at
+
 class Renderer:
     """
     Ties together Scene, Camera, ProjectionManager, InputController, HUDOverlay,
     and defers ShaderManager creation until after the GL context exists.
+
+    With a list of Viewports the window is split into comparison panes, each
+    drawn with its own camera and load case from the shared scene buffers.
+    Mouse input goes to the pane under the cursor, which also drives the
+    HUD's view name and gizmo.
     """
     def __init__(self,
                  scene,
@@ -23,7 +30,11 @@ class Renderer:
                  input_ctrl,
                  width=800,
                  height=600,
-                 title="MiniFEA Viewer"):
+                 title="MiniFEA Viewer",
+                 playback=None,
+                 live=None,
+                 viewports=None,
+                 columns=None):
         self.scene       = scene
         # Shader parameters (deferred)
         self.vert_path   = vert_path
@@ -37,23 +48,83 @@ class Renderer:
         self.width       = width
         self.height      = height
         self.title       = title.encode('utf-8')
+        self.playback    = playback
+        self.live        = live
         self._mouse_btn  = None
         self._last_x     = 0
         self._last_y     = 0
+        self._press_x    = 0
+        self._press_y    = 0
+        self.click_slop  = 3   # max pixels moved for a press/release to count as a click
+        self.viewports   = list(viewports or [])
+        self.columns     = columns
+        self.active      = 0   # index of the pane receiving input
 
     def _reshape(self, w, h):
         self.width  = w
         self.height = max(1, h)
         glViewport(0, 0, self.width, self.height)
 
+    def _panes(self):
+        """GL rectangles of the viewports for the current window size."""
+        return grid_layout(len(self.viewports), self.width, self.height, self.columns)
+
+    def _activate(self, index):
+        """Route camera input, picking and the HUD to viewport `index`."""
+        vp = self.viewports[index]
+        self.active = index
+        self.camera = vp.camera
+        self.input.camera = vp.camera
+        self.input.views = vp.views
+        self.hud.camera = vp.camera
+        self.hud.views = vp.views
+        if getattr(self.input, 'picker', None) is not None:
+            self.input.picker.camera = vp.camera
+            self.input.picker.set_case(*vp.render_case(self.scene.mesh_data))
+
+    def set_case(self, index, disp=None, field=None, field_kind=None):
+        """Replace the load case of viewport `index`; picks in it follow at once."""
+        picker = getattr(self.input, 'picker', None) if index == self.active else None
+        self.viewports[index].set_case(self.scene, disp, field, field_kind, picker)
+
     def _display(self):
-        # 0) Clear
+        # 0) Advance transient playback / pick up live solver state, then clear
+        if self.playback is not None:
+            self.playback.update()
+        if self.live is not None:
+            self.live.update()
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        aspect = self.width / self.height
 
+        # 1-3) Draw the scene once per pane; the node and index buffers are shared
+        if self.viewports:
+            rects = self._panes()
+            labels = []
+            glEnable(GL_SCISSOR_TEST)
+            for vp, (x, y, w, h) in zip(self.viewports, rects):
+                glViewport(x, y, w, h)
+                glScissor(x, y, w, h)
+                glClear(GL_DEPTH_BUFFER_BIT)
+                MVP = self._draw_view(vp.camera, w / max(1, h), vp.vbo_disp, vp.disp_extent)
+                if vp.label:
+                    labels.append((x + 10, y + 10, vp.label))
+            glDisable(GL_SCISSOR_TEST)
+            glViewport(0, 0, self.width, self.height)
+            self.hud.labels = labels
+        else:
+            MVP = self._draw_view(self.camera, self.width / self.height)
+
+        # 4) Re-bind shader & draw HUD (which now also draws the 3-axis gizmo)
+        self.shader.use(MVP.astype(np.float32))
+        self.hud.draw(self.width, self.height)
+
+        # 5) Swap
+        glutSwapBuffers()
+
+    def _draw_view(self, camera, aspect, disp_vbo=None, disp_extent=None):
+        """Draw the scene into the current GL viewport; returns its MVP."""
         # 1) Compute matrices
-        P   = self.proj_mgr.get_proj_matrix(self.camera, aspect)
-        V   = self.camera.get_view_matrix()
+        P   = self.proj_mgr.get_proj_matrix(camera, aspect)
+        V   = camera.get_view_matrix()
         MVP = P @ V
 
         # 2) Draw wireframe via shader
@@ -63,7 +134,8 @@ class Renderer:
         glLoadIdentity()
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
-        self.scene.draw(self.shader)
+        self.scene.draw(self.shader, mvp=MVP, eye=camera.position,
+                        disp_vbo=disp_vbo, disp_extent=disp_extent)
 
         # 3) Draw debug spheres at nodes under the same P & V
         glUseProgram(0)
@@ -92,13 +164,7 @@ class Renderer:
         glMatrixMode(GL_PROJECTION)
         glPopMatrix()                     # PROJECTION
         glMatrixMode(GL_MODELVIEW)
-
-        # 4) Re-bind shader & draw HUD (which now also draws the 3-axis gizmo)
-        self.shader.use(MVP.astype(np.float32))
-        self.hud.draw(self.width, self.height)
-
-        # 5) Swap
-        glutSwapBuffers()
+        return MVP
 
     def _on_keyboard(self, key, x, y):
         k = key.decode('utf-8')
@@ -107,7 +173,20 @@ class Renderer:
     def _on_mouse(self, button, state, x, y):
         if state == GLUT_DOWN:
             self._mouse_btn = button
+            self._press_x, self._press_y = x, y
+            if self.viewports:
+                index = pane_at(self._panes(), x, y, self.height)
+                if index is not None:
+                    self._activate(index)
         else:
+            moved = max(abs(x - self._press_x), abs(y - self._press_y))
+            if button == GLUT_LEFT_BUTTON and moved <= self.click_slop:
+                if self.viewports:
+                    # Pick in the active pane's own pixel frame
+                    px, py, pw, ph = self._panes()[self.active]
+                    self.input.on_click(x - px, y - (self.height - py - ph), pw, ph)
+                else:
+                    self.input.on_click(x, y, self.width, self.height)
             self._mouse_btn = None
         self._last_x, self._last_y = x, y
 
@@ -119,6 +198,10 @@ class Renderer:
         self._last_x, self._last_y = x, y
 
     def _on_wheel(self, wheel, direction, x, y):
+        if self.viewports:
+            index = pane_at(self._panes(), x, y, self.height)
+            if index is not None:
+                self._activate(index)
         self.input.on_scroll(direction)
 
     def start(self):
@@ -140,8 +223,18 @@ class Renderer:
         self.hud.shader = self.shader
         self.input.shader = self.shader
 
-        # 3) Upload scene buffers
+        # 3) Upload scene buffers (and the streaming buffer ring, if any),
+        #    then the HUD glyph atlas and gizmo buffer
         self.scene.initialize_gl()
+        self.hud.initialize_gl()
+        if self.playback is not None:
+            self.playback.initialize_gl()
+        if self.live is not None:
+            self.live.initialize_gl()
+        for vp in self.viewports:
+            vp.initialize_gl(self.scene)
+        if self.viewports:
+            self._activate(self.active)
 
         # 4) Set GL state
         glEnable(GL_DEPTH_TEST)
@@ -4,29 +4,64 @@
 scene.py
 
 Uploads MeshData into GPU buffers and issues draw calls for undeformed
-and deformed meshes.
+and deformed meshes, one line range and one triangle buffer per element block.
 """
+import ctypes
 from OpenGL.GL import *
 import numpy as np
 from OpenGL.GLUT import glutSolidSphere
 
+from .spatial import frustum_planes, boxes_in_frustum
+
+
+def _merge_runs(offsets, counts):
+    """
+    Coalesce index ranges that are back-to-back in the buffer so adjacent
+    visible chunks are issued as a single draw call.
+
+    Args:
+        offsets, counts: np.ndarray of range starts and lengths, ascending.
+
+    Returns:
+        (starts, lengths) of the merged runs.
+    """
+    if offsets.size == 0:
+        return offsets, counts
+    ends = offsets + counts
+    breaks = np.flatnonzero(offsets[1:] != ends[:-1]) + 1
+    first = np.concatenate([[0], breaks])
+    last = np.concatenate([breaks - 1, [offsets.size - 1]])
+    return offsets[first], ends[last] - offsets[first]
+
 class Scene:
     """
     Wraps MeshData for rendering: creates VBO/EBOs, updates buffers, and draws.
     """
-    def __init__(self, mesh_data):
+    def __init__(self, mesh_data, lod_threshold=0.05):
         """
         Args:
             mesh_data: instance of MeshData containing node_buffer,
                        disp_buffer (optional), index_buffer.
+            lod_threshold: chunks whose bounding radius is smaller than this
+                           fraction of their distance to the eye are drawn
+                           with their decimated proxy.
         """
         self.mesh_data = mesh_data
         self.deformed_visible = False
+        self.lod_threshold = lod_threshold
+        # Surface blocks fill the depth buffer first so hidden edges drop out
+        self.hidden_lines = True
 
         # Buffer handles (will be created in initialize_gl)
         self.vbo_nodes = None
         self.vbo_disp  = None
         self.ebo       = None
+        self.ebo_lod   = None
+        self.ebo_tris  = []     # (ebo, n_indices) per block with triangles
+
+        # Ring of deformed-geometry VBOs for streamed playback (see create_disp_ring)
+        self.disp_ring = []
+        self._ring_slot = -1
 
     def initialize_gl(self):
         """
@@ -61,6 +96,28 @@ class Scene:
                      self.mesh_data.index_buffer,
                      GL_STATIC_DRAW)
 
+        # Upload triangle indices of surface blocks
+        self.ebo_tris = []
+        for block in self.mesh_data.blocks:
+            if block.tri_buffer is None:
+                continue
+            ebo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER,
+                         block.tri_buffer.nbytes,
+                         block.tri_buffer,
+                         GL_STATIC_DRAW)
+            self.ebo_tris.append((ebo, block.tri_buffer.size))
+
+        # Upload decimated chunk proxies (if the mesh is chunked)
+        if self.mesh_data.lod_index_buffer is not None:
+            self.ebo_lod = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo_lod)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER,
+                         self.mesh_data.lod_index_buffer.nbytes,
+                         self.mesh_data.lod_index_buffer,
+                         GL_STATIC_DRAW)
+
         # Unbind for cleanliness
         glBindBuffer(GL_ARRAY_BUFFER, 0)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
@@ -87,17 +144,144 @@ class Scene:
                         new_disp_buffer)
         glBindBuffer(GL_ARRAY_BUFFER, 0)
 
+    def upload_positions(self, buffer, vbo=None):
+        """
+        Upload a deformed-position buffer (node_buffer layout) into vbo, or
+        into a new buffer, e.g. one per comparison viewport. The static node
+        and index buffers are left alone.
+
+        Returns:
+            the buffer id.
+        """
+        if vbo is None:
+            vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, buffer.nbytes, buffer, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return vbo
+
+    def create_disp_ring(self, n_slots=3):
+        """
+        Allocate a ring of same-sized dynamic VBOs for streamed deformed
+        geometry. Frames are written into the slot after the one being drawn,
+        so the GPU never has to orphan or wait on the buffer in use.
+        Must be called after an OpenGL context is active.
+
+        Args:
+            n_slots (int): number of buffers in the ring (>= 2).
+        """
+        nbytes = self.mesh_data.node_buffer.nbytes
+        ids = np.atleast_1d(glGenBuffers(n_slots)).tolist()
+        for vbo in ids:
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(GL_ARRAY_BUFFER, nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.disp_ring = ids
+        self._ring_slot = -1
+        return ids
+
+    def stream_displacements(self, frame_buffer):
+        """
+        Upload a frame into the next ring slot and make it the buffer drawn
+        as the deformed overlay.
+
+        Args:
+            frame_buffer (np.ndarray): flattened float32 array, same size as
+                                       node_buffer.
+        """
+        if not self.disp_ring:
+            raise RuntimeError("Displacement ring not initialized")
+        self._ring_slot = (self._ring_slot + 1) % len(self.disp_ring)
+        vbo = self.disp_ring[self._ring_slot]
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, frame_buffer.nbytes, frame_buffer)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.vbo_disp = vbo
+
     def toggle_deformed_visibility(self):
         """Flip visibility state for deformed mesh overlay."""
         self.deformed_visible = not self.deformed_visible
 
-    def draw(self, shader):
+    def visible_ranges(self, mvp, eye=None, padding=0.0):
+        """
+        Select the chunks intersecting the view frustum and split them into
+        full-detail and proxy draws.
+
+        Args:
+            mvp (np.ndarray): 4x4 row-major model-view-projection matrix.
+            eye (np.ndarray): camera position; without it no LOD is applied.
+            padding (float): grow chunk boxes by this amount (e.g. to cover
+                             displaced geometry).
+
+        Returns:
+            full (tuple): (offsets, counts) runs into index_buffer.
+            proxy (tuple): (offsets, counts) runs into lod_index_buffer.
+        """
+        md = self.mesh_data
+        lo = md.chunk_min - padding
+        hi = md.chunk_max + padding
+        visible = boxes_in_frustum(frustum_planes(mvp), lo, hi)
+
+        far = np.zeros_like(visible)
+        if eye is not None and self.ebo_lod is not None:
+            radius = 0.5 * np.linalg.norm(hi - lo, axis=1)
+            dist = np.linalg.norm(0.5 * (lo + hi) - eye, axis=1)
+            far = radius < self.lod_threshold * dist
+
+        full = visible & ~far
+        proxy = visible & far
+        return (_merge_runs(md.chunk_offsets[full], md.chunk_counts[full]),
+                _merge_runs(md.lod_offsets[proxy], md.lod_counts[proxy]))
+
+    def _draw_lines(self, mvp, eye, padding):
+        """
+        Issue GL_LINES draws for the bound vertex buffer, culled per chunk
+        when the mesh is chunked and an MVP is known.
+        """
+        md = self.mesh_data
+        if mvp is None or md.n_chunks == 0:
+            # One draw per element block, in index_buffer order
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            for block in md.blocks:
+                glDrawElements(GL_LINES, block.line_count, GL_UNSIGNED_INT,
+                               ctypes.c_void_p(block.line_offset * 4))
+            return
+
+        full, proxy = self.visible_ranges(mvp, eye, padding)
+        for ebo, (offsets, counts) in ((self.ebo, full), (self.ebo_lod, proxy)):
+            if offsets.size == 0:
+                continue
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+            for offset, count in zip(offsets.tolist(), counts.tolist()):
+                glDrawElements(GL_LINES, count, GL_UNSIGNED_INT,
+                               ctypes.c_void_p(offset * 4))
+
+    def _draw_surfaces(self):
+        """
+        Draw the triangles of surface blocks into the depth buffer only,
+        pushed slightly back so their own edges stay visible.
+        """
+        glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+        glEnable(GL_POLYGON_OFFSET_FILL)
+        glPolygonOffset(1.0, 1.0)
+        for ebo, count in self.ebo_tris:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+            glDrawElements(GL_TRIANGLES, count, GL_UNSIGNED_INT, None)
+        glDisable(GL_POLYGON_OFFSET_FILL)
+        glColorMask(GL_TRUE, GL_TRUE, GL_TRUE, GL_TRUE)
+
+    def draw(self, shader, mvp=None, eye=None, disp_vbo=None, disp_extent=None):
         """
         Draw undeformed mesh lines and, if enabled, deformed overlay.
 
         Args:
             shader: active line shader with known attribute locations.
                     Must have `attrib_pos` for vertex position.
+            mvp: optional 4x4 MVP matrix; enables frustum culling of chunks.
+            eye: optional camera position; enables LOD proxies for far chunks.
+            disp_vbo: deformed-position buffer to draw instead of vbo_disp
+                      (e.g. a viewport's load case).
+            disp_extent: culling padding for disp_vbo (default the MeshData's).
         """
         # Bind shader and any uniforms outside
         # Draw undeformed
@@ -106,26 +290,22 @@ class Scene:
         glEnableVertexAttribArray(shader.attrib_pos)
         glVertexAttribPointer(shader.attrib_pos, 3, GL_FLOAT, GL_FALSE, 0, None)
 
-        # Draw base wireframe
-        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
-        glDrawElements(GL_LINES,
-                       self.mesh_data.index_buffer.size,
-                       GL_UNSIGNED_INT,
-                       None)
+        # Draw base wireframe (behind surface blocks when hidden_lines is on)
+        if self.hidden_lines and self.ebo_tris:
+            self._draw_surfaces()
+        self._draw_lines(mvp, eye, 0.0)
+
         # Draw deformed overlay if toggled
-        if self.deformed_visible and self.vbo_disp is not None:
-            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_disp)
+        if disp_vbo is None:
+            disp_vbo, disp_extent = self.vbo_disp, self.mesh_data.disp_extent
+        if self.deformed_visible and disp_vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, disp_vbo)
             glEnableVertexAttribArray(shader.attrib_pos)
             glVertexAttribPointer(shader.attrib_pos, 3, GL_FLOAT, GL_FALSE, 0, None)
 
-            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
-            glDrawElements(GL_LINES,
-                           self.mesh_data.index_buffer.size,
-                           GL_UNSIGNED_INT,
-                           None)
+            self._draw_lines(mvp, eye, disp_extent or 0.0)
 
         # Clean up
         glDisableVertexAttribArray(shader.attrib_pos)
         glBindBuffer(GL_ARRAY_BUFFER, 0)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
-
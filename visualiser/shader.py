@@ -6,7 +6,6 @@ manages 1D colormap textures, and handles shader use with uniform updates.
 """
 from OpenGL.GL import *
 import numpy as np
-from PIL import Image
 
 class ShaderManager:
     """
@@ -73,6 +72,7 @@ class ShaderManager:
         """
         Load a colormap PNG as a 1D texture.
         """
+        from PIL import Image  # only needed when colormap images are used
         img = Image.open(image_path).convert('RGB')
         data = np.array(img, dtype=np.uint8)
         h, w, _ = data.shape
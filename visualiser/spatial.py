@@ -0,0 +1,209 @@
+"""
+spatial.py
+
+Spatial indexing helpers for MiniFEA renderer: Morton (Z-order) codes, linear
+bounding-volume chunks over primitive boxes, frustum plane extraction and
+vectorized box/plane and sphere/ray tests.
+"""
+import numpy as np
+
+
+def _spread_bits(v):
+    """
+    Spread the low 10 bits of each integer so that two zero bits separate
+    consecutive bits (the standard 3D Morton interleave step).
+
+    Args:
+        v: np.ndarray of non-negative ints < 1024.
+
+    Returns:
+        np.ndarray of uint64 with bits at positions 0, 3, 6, ...
+    """
+    v = v.astype(np.uint64) & np.uint64(0x3FF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x030000FF)
+    v = (v | (v << np.uint64(8)))  & np.uint64(0x0300F00F)
+    v = (v | (v << np.uint64(4)))  & np.uint64(0x030C30C3)
+    v = (v | (v << np.uint64(2)))  & np.uint64(0x09249249)
+    return v
+
+
+def morton_codes(points, bits=10):
+    """
+    Compute 3D Morton codes for a point cloud quantized to its bounding box.
+
+    Args:
+        points: array-like of shape (n, 3).
+        bits: bits per axis (max 10).
+
+    Returns:
+        np.ndarray of uint64 codes, shape (n,).
+    """
+    points = np.asarray(points, dtype=float)
+    lo = points.min(axis=0)
+    span = points.max(axis=0) - lo
+    span[span == 0.0] = 1.0
+    scale = (1 << bits) - 1
+    q = ((points - lo) / span * scale).astype(np.int64)
+    return (_spread_bits(q[:, 0])
+            | (_spread_bits(q[:, 1]) << np.uint64(1))
+            | (_spread_bits(q[:, 2]) << np.uint64(2)))
+
+
+def build_chunks(mins, maxs, chunk_size):
+    """
+    Group primitives into spatially coherent chunks of at most chunk_size
+    members by sorting their box centers along a Morton curve.
+
+    Args:
+        mins, maxs: np.ndarray of shape (n, 3), per-primitive bounding boxes.
+        chunk_size: maximum number of primitives per chunk.
+
+    Returns:
+        order (np.ndarray): primitive permutation, chunk members contiguous.
+        starts (np.ndarray): first position of each chunk within `order`.
+        counts (np.ndarray): number of primitives in each chunk.
+        chunk_min, chunk_max (np.ndarray): chunk bounding boxes, shape (k, 3).
+    """
+    n = mins.shape[0]
+    centers = 0.5 * (mins + maxs)
+    order = np.argsort(morton_codes(centers), kind='stable')
+    starts = np.arange(0, n, chunk_size)
+    counts = np.diff(np.append(starts, n))
+    chunk_min = np.minimum.reduceat(mins[order], starts, axis=0)
+    chunk_max = np.maximum.reduceat(maxs[order], starts, axis=0)
+    return order, starts, counts, chunk_min, chunk_max
+
+
+def frustum_planes(mvp):
+    """
+    Extract the six clip planes from a row-major MVP matrix (clip = M @ v).
+
+    Args:
+        mvp: 4x4 np.ndarray.
+
+    Returns:
+        np.ndarray of shape (6, 4): normalized (a, b, c, d) with the inside
+        half-space satisfying a*x + b*y + c*z + d >= 0.
+    """
+    m = np.asarray(mvp, dtype=float)
+    planes = np.array([
+        m[3] + m[0],   # left
+        m[3] - m[0],   # right
+        m[3] + m[1],   # bottom
+        m[3] - m[1],   # top
+        m[3] + m[2],   # near
+        m[3] - m[2],   # far
+    ])
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return planes
+
+
+def boxes_in_frustum(planes, mins, maxs):
+    """
+    Conservative box/frustum test for many boxes at once.
+
+    Args:
+        planes: np.ndarray of shape (6, 4) from frustum_planes().
+        mins, maxs: np.ndarray of shape (k, 3).
+
+    Returns:
+        Boolean np.ndarray of shape (k,), True where a box may be visible.
+    """
+    normals = planes[:, :3]
+    # For each plane pick the box corner furthest along its normal
+    positive = np.where(normals[:, None, :] >= 0.0, maxs[None], mins[None])
+    dist = np.einsum('pkj,pj->pk', positive, normals) + planes[:, 3:4]
+    return np.all(dist >= 0.0, axis=0)
+
+
+def ray_sphere_hits(origin, direction, centers, radii, tol_base=0.0, tol_slope=0.0):
+    """
+    Test a thick ray against many bounding spheres at once. The ray radius
+    grows with distance as tol_base + tol_slope * t (a pick cone).
+
+    Args:
+        origin, direction: ray origin and unit direction, shape (3,).
+        centers: np.ndarray of shape (k, 3).
+        radii: np.ndarray of shape (k,).
+        tol_base, tol_slope: ray radius coefficients.
+
+    Returns:
+        Boolean np.ndarray of shape (k,).
+    """
+    w = centers - origin
+    t = w @ direction
+    perp2 = np.einsum('ij,ij->i', w, w) - t * t
+    reach = radii + tol_base + tol_slope * np.maximum(t + radii, 0.0)
+    return (t + radii >= 0.0) & (perp2 <= reach * reach)
+
+
+def gather_ranges(starts, counts):
+    """
+    Concatenate the integer ranges [starts[i], starts[i] + counts[i]) without
+    a Python loop.
+
+    Args:
+        starts, counts: np.ndarray of ints with equal length.
+
+    Returns:
+        np.ndarray of ints, length counts.sum().
+    """
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return np.arange(total) + shift
+
+
+class LeafIndex:
+    """
+    Two-level bounding-volume index: primitives sorted along a Morton curve,
+    grouped into small leaves, and runs of leaves grouped into blocks. A ray
+    query tests every block sphere, then only the leaves of hit blocks, then
+    only the members of hit leaves.
+
+    Attributes:
+        order (np.ndarray): primitive ids in leaf order.
+        starts, counts (np.ndarray): per-leaf ranges into `order`.
+        mins, maxs (np.ndarray): per-leaf bounding boxes, shape (k, 3).
+    """
+    def __init__(self, mins, maxs, leaf_size=16, block_size=64):
+        """
+        Args:
+            mins, maxs: per-primitive bounding boxes, shape (n, 3).
+            leaf_size: maximum number of primitives per leaf.
+            block_size: number of consecutive leaves per block.
+        """
+        (self.order, self.starts, self.counts,
+         self.mins, self.maxs) = build_chunks(mins, maxs, leaf_size)
+        self.centers = 0.5 * (self.mins + self.maxs)
+        self.radii = 0.5 * np.linalg.norm(self.maxs - self.mins, axis=1)
+
+        n_leaves = self.starts.size
+        self.block_starts = np.arange(0, n_leaves, block_size)
+        self.block_counts = np.diff(np.append(self.block_starts, n_leaves))
+        bmin = np.minimum.reduceat(self.mins, self.block_starts, axis=0)
+        bmax = np.maximum.reduceat(self.maxs, self.block_starts, axis=0)
+        self.block_centers = 0.5 * (bmin + bmax)
+        self.block_radii = 0.5 * np.linalg.norm(bmax - bmin, axis=1)
+
+    def ray_candidates(self, origin, direction, tol_base=0.0, tol_slope=0.0):
+        """
+        Return positions (into `order`) of primitives in leaves that a thick
+        ray may touch. The ray radius grows linearly with distance,
+        tol_base + tol_slope * t, to model a pixel-sized pick cone.
+
+        Args:
+            origin, direction: ray origin and unit direction, shape (3,).
+            tol_base, tol_slope: pick radius coefficients.
+
+        Returns:
+            np.ndarray of positions into `order`.
+        """
+        hit = ray_sphere_hits(origin, direction, self.block_centers,
+                              self.block_radii, tol_base, tol_slope)
+        leaves = gather_ranges(self.block_starts[hit], self.block_counts[hit])
+        hit = ray_sphere_hits(origin, direction, self.centers[leaves],
+                              self.radii[leaves], tol_base, tol_slope)
+        leaves = leaves[hit]
+        return gather_ranges(self.starts[leaves], self.counts[leaves])
@@ -1,4 +1,9 @@
+import time
 import numpy as np
+
+from feacalc import mesh as fea_mesh
+
+
 def pyramid_truss():
     """
     Returns a basic 3D pyramid wireframe:
@@ -8,28 +13,27 @@ def pyramid_truss():
       - field: dummy scalar at each node
       - bc_flags: empty for now
     """
-    nodes = np.array([
-        [0.0, 0.0, 0.0],  # 0
-        [1.0, 0.0, 0.0],  # 1
-        [1.0, 0.0, 1.0],  # 2
-        [0.0, 0.0, 1.0],  # 3
-        [0.5, 1.0, 0.5],  # 4 
-    ], dtype=float)
-
-    elems = np.array([
-        # base square
-        [0, 1],
-        [1, 2],
-        [2, 3],
-        [3, 0],
-        # sides to apex
-        [0, 4],
-        [1, 4],
-        [2, 4],
-        [3, 4],
-    ], dtype=int)
+    mesh = fea_mesh.pyramid_truss(base=1.0, height=1.0)
+    nodes, elems = mesh.nodes, mesh.elems
 
     disp = np.zeros_like(nodes)
     field = np.linspace(0.0, 1.0, nodes.shape[0])
     bc_flags = {}
-    return nodes, elems, disp, field, bc_flags
\ No newline at end of file
+    return nodes, elems, disp, field, bc_flags
+
+
+def pyramid_sway(channel, n_steps=400, dt=0.05):
+    """
+    Stand-in for a long-running solve: publishes a swaying-apex displacement
+    history for pyramid_truss() into a feacalc.streaming.StateChannel.
+    """
+    nodes, _, _, _, _ = pyramid_truss()
+    for step in range(n_steps):
+        if channel.abort_requested:
+            return
+        t = step * dt
+        disp = np.zeros_like(nodes)
+        disp[4, 0] = 0.2 * np.sin(2.0 * np.pi * 0.5 * t)
+        field = np.abs(disp).sum(axis=1)
+        channel.publish(disp, field, step=step, time=t)
+        time.sleep(dt)
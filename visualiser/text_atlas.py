@@ -0,0 +1,120 @@
+"""
+text_atlas.py
+
+Glyph texture atlas for HUD text: printable ASCII rasterized once into a
+single alpha bitmap, plus vectorized layout of strings into textured quads.
+No GL here; HUDOverlay uploads the bitmap and the quad buffers.
+"""
+import numpy as np
+
+FIRST_CHAR = 32      # ' '
+LAST_CHAR  = 126     # '~'
+
+
+class GlyphAtlas:
+    """
+    Fixed-cell glyph atlas. Every glyph occupies one cell of a grid, drawn
+    with its baseline `baseline` pixels below the cell top; the pen advances
+    by the glyph's own width.
+
+    Attributes:
+        bitmap (np.ndarray): (height, width) uint8 coverage, row 0 at the top.
+        cell (tuple): (cell_w, cell_h) in pixels.
+        columns (int): cells per atlas row.
+        baseline (int): baseline offset from the cell top, in pixels.
+        advance (np.ndarray): (256,) pen advance per character code.
+        line_height (int): suggested distance between baselines.
+    """
+    def __init__(self, bitmap, cell, columns, baseline, advance):
+        self.bitmap = np.ascontiguousarray(bitmap, dtype=np.uint8)
+        self.cell = (int(cell[0]), int(cell[1]))
+        self.columns = int(columns)
+        self.baseline = int(baseline)
+        self.advance = np.asarray(advance, dtype=np.float32)
+        self.line_height = self.cell[1] + 2
+
+        # Texture rectangle (s0, t0, s1, t1) of every code; t0 is the cell top
+        codes = np.arange(256)
+        slot = np.clip(codes, FIRST_CHAR, LAST_CHAR) - FIRST_CHAR
+        slot[(codes < FIRST_CHAR) | (codes > LAST_CHAR)] = ord('?') - FIRST_CHAR
+        col, row = slot % self.columns, slot // self.columns
+        h, w = self.bitmap.shape
+        cw, ch = self.cell
+        self._uv = np.stack([col * cw / w, row * ch / h,
+                             (col + 1) * cw / w, (row + 1) * ch / h],
+                            axis=1).astype(np.float32)
+        self._advance = self.advance[FIRST_CHAR + slot]
+
+    @classmethod
+    def from_font(cls, size=18, font_path=None, columns=16):
+        """
+        Rasterize printable ASCII with PIL.
+
+        Args:
+            size (int): font size in pixels (TrueType fonts only).
+            font_path (str): TrueType font file; PIL's default font otherwise.
+            columns (int): cells per atlas row.
+        """
+        from PIL import Image, ImageDraw, ImageFont  # only needed to build the atlas
+        if font_path is not None:
+            font = ImageFont.truetype(font_path, size)
+        else:
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:                  # older Pillow: fixed bitmap font
+                font = ImageFont.load_default()
+
+        chars = [chr(c) for c in range(FIRST_CHAR, LAST_CHAR + 1)]
+        boxes = np.array([font.getbbox(c) for c in chars])   # (l, t, r, b) from the draw origin
+        top = int(min(0, boxes[:, 1].min()))
+        cell_w = int(boxes[:, 2].max() - min(0, boxes[:, 0].min())) + 1
+        cell_h = int(boxes[:, 3].max() - top) + 1
+        rows = -(-len(chars) // columns)
+
+        image = Image.new('L', (columns * cell_w, rows * cell_h), 0)
+        draw = ImageDraw.Draw(image)
+        left = -min(0, int(boxes[:, 0].min()))
+        for i, c in enumerate(chars):
+            col, row = i % columns, i // columns
+            draw.text((col * cell_w + left, row * cell_h - top), c, fill=255, font=font)
+
+        advance = np.zeros(256, dtype=np.float32)
+        measure = getattr(font, 'getlength', None)
+        advance[FIRST_CHAR:LAST_CHAR + 1] = [
+            measure(c) if measure is not None else font.getsize(c)[0] for c in chars]
+        baseline = font.getbbox('H')[3] - top                # capitals sit on the baseline
+        return cls(np.array(image), (cell_w, cell_h), columns, baseline, advance)
+
+    def text_width(self, text):
+        """Pen advance of a whole string, in pixels."""
+        return float(self._advance[self._codes(text)].sum())
+
+    @staticmethod
+    def _codes(text):
+        return np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8)
+
+    def layout(self, text, x, y):
+        """
+        Quads for a string whose baseline starts at (x, y), in a y-up pixel
+        space (glOrtho(0, w, 0, h)).
+
+        Returns:
+            (4 * len(text), 4) float32 array of (x, y, s, t) vertices,
+            counter-clockwise per glyph, ready for GL_QUADS. Texture t runs
+            down the bitmap as uploaded (row 0 first).
+        """
+        codes = self._codes(text)
+        adv = self._advance[codes]
+        pen = x + np.concatenate([[0.0], np.cumsum(adv[:-1])]) if codes.size else adv
+        cw, ch = self.cell
+        x0, x1 = pen, pen + cw
+        y1 = np.full(codes.size, y + self.baseline, dtype=np.float32)
+        y0 = y1 - ch
+        s0, t0, s1, t1 = self._uv[codes].T
+        quads = np.stack([
+            np.stack([x0, y0, s0, t1], axis=1),
+            np.stack([x1, y0, s1, t1], axis=1),
+            np.stack([x1, y1, s1, t0], axis=1),
+            np.stack([x0, y1, s0, t0], axis=1),
+        ], axis=1)
+        return np.ascontiguousarray(quads.reshape(-1, 4), dtype=np.float32)
@@ -0,0 +1,112 @@
+"""
+viewport.py
+
+Side-by-side comparison panes for MiniFEA renderer. Each Viewport owns a
+camera, its view presets and one load case (displacements and field); the
+Renderer draws every pane from the Scene's single set of static node and
+index buffers, binding only the pane's own deformed-position buffer.
+"""
+import numpy as np
+
+from .view_manager import ViewManager
+
+
+def grid_layout(n, width, height, cols=None):
+    """
+    Split a window into n panes on a near-square grid, filled row by row
+    from the top left.
+
+    Args:
+        n (int): number of panes.
+        width, height (int): window size in pixels.
+        cols (int): columns (default ceil(sqrt(n))).
+
+    Returns:
+        list of (x, y, w, h) in GL window coordinates (origin bottom left).
+    """
+    cols = cols or int(np.ceil(np.sqrt(n)))
+    rows = -(-n // cols)
+    w, h = width // cols, height // rows
+    return [((i % cols) * w, height - (i // cols + 1) * h, w, h) for i in range(n)]
+
+
+def pane_at(rects, x, y, height):
+    """
+    Index of the pane under a window position (GLUT convention, origin top
+    left), or None.
+    """
+    gy = height - 1 - y                 # GL row of the pixel
+    for i, (px, py, pw, ph) in enumerate(rects):
+        if px <= x < px + pw and py <= gy < py + ph:
+            return i
+    return None
+
+
+class Viewport:
+    """
+    One pane of a split window.
+
+    Attributes:
+        camera: Camera of this pane.
+        views: ViewManager bound to that camera.
+        disp (np.ndarray): (n_nodes, dim) displacements of the pane's load
+            case, in the mesh's input order, or None.
+        field (np.ndarray): per-node or per-element values, or None.
+        field_kind (str): 'node' or 'element', or None to tell them apart by
+            length (see MeshData.value_kind).
+        label (str): caption drawn in the pane's corner.
+        scale (float): displacement magnification of the deformed overlay.
+        vbo_disp: deformed-position buffer (set by initialize_gl).
+        disp_extent (float): largest scaled displacement, pads culling bounds.
+    """
+    def __init__(self, camera, view_manager=None, disp=None, field=None, label=None,
+                 scale=1.0, field_kind=None):
+        self.camera      = camera
+        self.views       = view_manager or ViewManager(camera)
+        self.disp        = None if disp is None else np.asarray(disp, dtype=float)
+        self.field       = None if field is None else np.asarray(field, dtype=float)
+        self.field_kind  = field_kind
+        self.label       = label
+        self.scale       = scale
+        self.vbo_disp    = None
+        self.disp_extent = 0.0
+
+    def positions(self, mesh_data):
+        """
+        Deformed node positions of this case as a flat float32 buffer in
+        the MeshData's stored order (node_buffer layout).
+        """
+        pos = mesh_data._nodes3d.astype(np.float32)
+        self.disp_extent = 0.0
+        if self.disp is not None:
+            disp = mesh_data.to_render_order(self.disp, 'node')
+            pos[:, :disp.shape[1]] += self.scale * disp
+            self.disp_extent = self.scale * float(np.linalg.norm(disp, axis=1).max(initial=0.0))
+        return pos.reshape(-1)
+
+    def render_case(self, mesh_data):
+        """
+        (disp, field, field_kind) of this case with values in the MeshData's
+        stored order, for Picker.set_case.
+        """
+        kind = None if self.field is None else mesh_data.value_kind(self.field, self.field_kind)
+        return (mesh_data.to_render_order(self.disp, 'node'),
+                mesh_data.to_render_order(self.field, kind), kind)
+
+    def initialize_gl(self, scene):
+        """Upload this case's deformed positions; the mesh buffers stay shared."""
+        self.vbo_disp = scene.upload_positions(self.positions(scene.mesh_data))
+
+    def set_case(self, scene, disp=None, field=None, field_kind=None, picker=None):
+        """
+        Replace the load case, re-uploading into the pane's existing buffer.
+        Pass the Picker when this pane is the active one so that picks
+        report the new case straight away.
+        """
+        self.disp = None if disp is None else np.asarray(disp, dtype=float)
+        self.field = None if field is None else np.asarray(field, dtype=float)
+        self.field_kind = field_kind
+        if self.vbo_disp is not None:
+            scene.upload_positions(self.positions(scene.mesh_data), self.vbo_disp)
+        if picker is not None:
+            picker.set_case(*self.render_case(scene.mesh_data))